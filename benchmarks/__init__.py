@@ -0,0 +1,10 @@
+"""
+오프라인 벤치마크 도구 모음
+
+Discord 서버나 Gemini 키 없이 봇의 처리량/지연을 측정합니다.
+- fakes.py:        가짜 discord 객체 (Bot / 채널 / 메시지 / 사용자)
+- stub_gemini.py:  지연 분포를 설정할 수 있는 로컬 Gemini(+ OpenWeather) 스텁 서버
+- harness.py:      스텁 + 가짜 봇 + 실제 Cog 조립, 이벤트 루프 지연/메모리 측정, 리포트
+- bench_bot.py:    시나리오 실행 (python -m benchmarks.bench_bot --help)
+- replay.py:       peanut_full_data.txt 대화를 여러 사용자/채널 트래픽으로 N배속 재생 (python -m benchmarks.replay --help)
+"""
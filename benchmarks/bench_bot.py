@@ -0,0 +1,129 @@
+"""
+봇 오프라인 벤치마크
+
+    python -m benchmarks.bench_bot chat --users 20 --messages 300 --rate 10
+    python -m benchmarks.bench_bot scheduler --schedules 200 --channels 20
+    python -m benchmarks.bench_bot weather --subscribers 100
+    python -m benchmarks.bench_bot all
+
+[공통 옵션]
+--latency         스텁 응답 지연 분포 (const:0.5 / uniform:a,b / normal:m,s / lognormal:중앙값,σ)
+--error-rate      스텁 503 비율 (재시도 경로 포함 측정)
+--collect-delay   ChatHandler 수집 대기 시간 재정의 (기본: 설정값 그대로)
+--real-rate-limits  설정된 RATE_LIMITS / 사용자 한도(USER_QUOTA_*) 그대로 사용 (기본: 제한 해제 — 봇 자체 처리량 측정)
+--trace-memory    tracemalloc 으로 할당 증가량/상위 위치 측정 (느려짐)
+--verbose         Cog 로그 출력
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.harness import BenchEnv, percentiles  # noqa: E402
+from benchmarks.stub_gemini import LatencyDistribution, StubConfig  # noqa: E402
+
+CHAT_FILE = os.path.join(ROOT, 'data', 'datasets', 'peanut_full_data.txt')
+
+
+def _chat_lines() -> List[str]:
+    try:
+        with open(CHAT_FILE, encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+    except OSError:
+        lines = []
+    return lines or ["헐 진짜요?", "오늘 뭐해요", "저두 심심해요", "아이고", "부엉부엉.."]
+
+
+async def run_chat(env: BenchEnv, args):
+    rng = random.Random(args.seed)
+    lines = _chat_lines()
+    users = [env.add_user(f"user{i}") for i in range(args.users)]
+    for _ in range(args.messages):
+        await env.inject(env.message(rng.choice(users), rng.choice(lines)))
+        # 포아송 도착 (평균 rate 개/초)
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await env.drain()
+
+
+async def run_scheduler(env: BenchEnv, args):
+    cog = env.cogs['scheduler']
+    channels = [env.add_channel(name=f"sched{i}") for i in range(args.channels)]
+    owner = env.add_user("scheduler-owner")
+    due = datetime.now() + timedelta(seconds=1)
+    for i in range(args.schedules):
+        cog.manager.add(channels[i % len(channels)].id, owner.id, due, f"bench-schedule-{i}")
+    cog._notify_scheduled(due)
+    env.begin()
+
+    deadline = time.monotonic() + 60 + args.schedules
+    while sum(len(c.sent) for c in channels) < args.schedules and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    delays = [m.created_at.timestamp() - due.timestamp() for c in channels for m in c.sent]
+    env.extra['전송 지연'] = "  ".join(f"{k}={v * 1000:.0f}ms" for k, v in percentiles(delays).items())
+    env.extra['전송 완료'] = f"{len(delays)}/{args.schedules}"
+
+
+async def run_weather(env: BenchEnv, args):
+    cog = env.cogs['weather']
+    cities = ["Seoul", "Suwon", "Busan", "Incheon", "Daegu"]
+    for i in range(args.subscribers):
+        user = env.add_user(f"weather{i}")
+        cog.subscription_manager.add(user.id, cities[i % len(cities)])
+    env.begin()
+    started = time.perf_counter()
+    await cog.daily_weather_alert()
+    env.extra['알림 전체'] = f"{time.perf_counter() - started:.2f}초 (구독 {args.subscribers}명)"
+
+
+SCENARIOS = {
+    'chat':      (run_chat, ('chat', 'reaction')),
+    'scheduler': (run_scheduler, ('scheduler',)),
+    'weather':   (run_weather, ('weather',)),
+}
+
+
+async def run(name: str, args):
+    scenario, cogs = SCENARIOS[name]
+    stub = StubConfig(LatencyDistribution.parse(args.latency), args.error_rate, args.reply_chars, args.seed)
+    env = BenchEnv(stub, cogs=cogs, collect_delay=args.collect_delay,
+                   real_rate_limits=args.real_rate_limits, trace_memory=args.trace_memory,
+                   quiet=not args.verbose, send_latency=args.send_latency)
+    async with env:
+        await scenario(env, args)
+        env.print_report(f"{name} (지연 {stub.latency}, 오류율 {args.error_rate})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenario', choices=[*SCENARIOS, 'all'])
+    parser.add_argument('--latency', default="lognormal:0.8,0.5")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--reply-chars', type=int, default=120)
+    parser.add_argument('--send-latency', type=float, default=0.05, help="가짜 Discord send 지연 (초)")
+    parser.add_argument('--collect-delay', type=float, default=None)
+    parser.add_argument('--real-rate-limits', action='store_true')
+    parser.add_argument('--trace-memory', action='store_true')
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=5.0, help="chat: 초당 평균 메시지 수")
+    parser.add_argument('--schedules', type=int, default=100)
+    parser.add_argument('--channels', type=int, default=10)
+    parser.add_argument('--subscribers', type=int, default=50)
+    args = parser.parse_args()
+
+    for name in (SCENARIOS if args.scenario == 'all' else [args.scenario]):
+        asyncio.run(run(name, args))
+
+
+if __name__ == '__main__':
+    main()
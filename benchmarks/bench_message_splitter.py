@@ -0,0 +1,121 @@
+"""
+MessageSplitter 마이크로 벤치마크
+
+v2.0 단일 패스 스캐너와 이전(v1) 구현을 같은 입력으로 비교합니다.
+
+    python benchmarks/bench_message_splitter.py [--number N]
+
+[입력]
+- short:  봇이 보통 보내는 2~4문장 답장
+- lines:  줄바꿈이 많은 목록형 답장 (줄 단위 분할 경로)
+- long:   문장 수백 개짜리 긴 단락 (문장 단위 분할 경로)
+- escaped: 모델이 '\\n' 을 글자 그대로 보낸 경우
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.message_splitter import MessageSplitter, StreamSplitter  # noqa: E402
+
+
+class LegacyMessageSplitter:
+    """v1 구현 (비교 기준용 원본 그대로)"""
+
+    @staticmethod
+    def split_by_lines(text: str, parts: int = 3) -> List[str]:
+        text = text.replace('\\n', '\n')
+        lines = text.split('\n')
+        if len(lines) <= parts:
+            return [l for l in lines if l.strip()]
+
+        lines_per_part = len(lines) // parts
+        remainder = len(lines) % parts
+        chunks, start = [], 0
+
+        for i in range(parts):
+            end = start + lines_per_part + (1 if i < remainder else 0)
+            chunk = '\n'.join(lines[start:end]).strip()
+            if chunk: chunks.append(chunk)
+            start = end
+        return chunks
+
+    @staticmethod
+    def split_by_sentences(text: str, parts: int = 3) -> List[str]:
+        text = text.replace('\\n', '\n')
+        sentences = re.split(r'([.!?\n])', text)
+        combined = []
+        for i in range(0, len(sentences) - 1, 2):
+            if i + 1 < len(sentences):
+                c = sentences[i] + sentences[i+1]
+                if c.strip(): combined.append(c.strip())
+        if len(sentences) % 2 == 1 and sentences[-1].strip():
+            combined.append(sentences[-1].strip())
+        if not combined: return [text]
+        if len(combined) <= parts: return combined
+
+        spp = len(combined) // parts
+        rem = len(combined) % parts
+        chunks, start = [], 0
+        for i in range(parts):
+            end = start + spp + (1 if i < rem else 0)
+            chunk = ' '.join(combined[start:end]).strip()
+            if chunk: chunks.append(chunk)
+            start = end
+        return chunks
+
+    @staticmethod
+    def smart_split(text: str, parts: int = 3) -> List[str]:
+        if text.count('\n') >= parts or text.count('\\n') >= parts:
+            return LegacyMessageSplitter.split_by_lines(text, parts)
+        return LegacyMessageSplitter.split_by_sentences(text, parts)
+
+
+SAMPLES = {
+    'short':   "헐 진짜? 나도 그거 봤어 ㅋㅋ 근데 결말이 좀 아쉽더라. 너는 어땠어?",
+    'lines':   "\n".join(f"{i}. 오늘 할 일 목록 항목이에요 — 세부 설명 조금" for i in range(1, 31)),
+    'long':    " ".join(
+        "이건 꽤 긴 문장이에요. 중간에 3.5 같은 숫자도 있고요! 질문도 있나? 웃음도 있다 ㅋㅋ"
+        for _ in range(150)
+    ),
+    'escaped': "\\n".join("모델이 줄바꿈을 이스케이프해서 보냈어요." for _ in range(12)),
+}
+
+
+def _stream(text: str, step: int = 7) -> int:
+    splitter = StreamSplitter()
+    count = 0
+    for i in range(0, len(text), step):
+        count += sum(1 for _ in splitter.feed(text[i:i + step]))
+    return count + sum(1 for _ in splitter.flush())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=2000, help="케이스당 반복 횟수")
+    parser.add_argument('--parts', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'case':<10}{'chars':>7}{'legacy µs':>12}{'v2 µs':>10}{'speedup':>9}   chunks(legacy→v2)")
+    for name, text in SAMPLES.items():
+        number = max(1, args.number * 200 // max(200, len(text)))
+        legacy = timeit.timeit(lambda: LegacyMessageSplitter.smart_split(text, args.parts), number=number)
+        current = timeit.timeit(lambda: MessageSplitter.smart_split(text, args.parts), number=number)
+        legacy_us, current_us = legacy / number * 1e6, current / number * 1e6
+        lens_old = [len(c) for c in LegacyMessageSplitter.smart_split(text, args.parts)]
+        lens_new = [len(c) for c in MessageSplitter.smart_split(text, args.parts)]
+        print(f"{name:<10}{len(text):>7}{legacy_us:>12.1f}{current_us:>10.1f}{legacy_us / current_us:>8.2f}x"
+              f"   {lens_old} → {lens_new}")
+
+    text = SAMPLES['long']
+    number = max(1, args.number // 20)
+    stream = timeit.timeit(lambda: _stream(text), number=number) / number * 1e6
+    print(f"\nstream    {len(text):>7} chars, 7자씩 입력: {stream:.1f} µs/메시지 ({_stream(text)}개 조각)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+가짜 discord 객체
+
+Cog 코드가 실제로 사용하는 속성/메서드만 구현합니다.
+채널/사용자의 send 는 네트워크 대신 기록만 남기고 on_send 콜백으로 하네스에 알립니다.
+"""
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import discord
+from discord.ext import commands
+
+# Discord snowflake 와 비슷한 크기의 증가 ID
+_ids = itertools.count(1_400_000_000_000_000_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str, bot: bool = False):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+        self.sent: List = []
+        self.on_send: Optional[Callable] = None
+
+    def __eq__(self, other):
+        return isinstance(other, FakeUser) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    async def send(self, content: Optional[str] = None, **kwargs):
+        """DM 전송 (날씨 알림 등)"""
+        message = FakeMessage(content or "", author=None, channel=None, embeds=[kwargs.get('embed')])
+        self.sent.append(message)
+        if self.on_send is not None:
+            self.on_send(self, message)
+        return message
+
+
+class FakeChannel:
+    """텍스트 채널 — send 는 기록 + on_send 콜백, history 는 기록된 메시지 반환"""
+
+    def __init__(self, channel_id: int, name: str = "bench", send_latency: float = 0.0):
+        self.id = channel_id
+        self.name = name
+        self.send_latency = send_latency
+        self.messages: List["FakeMessage"] = []
+        self.sent: List["FakeMessage"] = []
+        self.on_send: Optional[Callable] = None
+        self.bot_user: Optional[FakeUser] = None
+
+    async def send(self, content: Optional[str] = None, **kwargs):
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        message = FakeMessage(content or "", author=self.bot_user, channel=self,
+                              embeds=[kwargs['embed']] if kwargs.get('embed') else [])
+        self.sent.append(message)
+        self.messages.append(message)
+        if self.on_send is not None:
+            self.on_send(self, message)
+        return message
+
+    @asynccontextmanager
+    async def typing(self):
+        yield
+
+    async def history(self, limit: Optional[int] = 100, after=None, before=None, oldest_first=None):
+        items = [m for m in self.messages
+                 if (after is None or m.created_at > after) and (before is None or m.created_at < before)]
+        if not oldest_first:
+            items.reverse()
+        for m in items[:limit] if limit else items:
+            yield m
+
+
+class FakeAttachment:
+    def __init__(self, filename: str, data: bytes, content_type: str = "image/png"):
+        self.filename = filename
+        self.content_type = content_type
+        self._data = data
+
+    async def read(self) -> bytes:
+        return self._data
+
+
+class FakeMessage:
+    def __init__(self, content: str, author: Optional[FakeUser], channel: Optional[FakeChannel],
+                 attachments: Optional[List[FakeAttachment]] = None, embeds: Optional[List] = None,
+                 created_at: Optional[datetime] = None):
+        self.id = next_id()
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = None
+        self.attachments = attachments or []
+        self.stickers = []
+        self.embeds = [e for e in (embeds or []) if e is not None]
+        self.mentions = []
+        self.reference = None
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.reactions: List[str] = []
+        # 하네스용: 메시지가 봇에 전달된 시각 / 첫 리액션 시각
+        self.injected_at = time.perf_counter()
+        self.reaction_at: Optional[float] = None
+
+    async def add_reaction(self, emoji: str):
+        if self.reaction_at is None:
+            self.reaction_at = time.perf_counter()
+        self.reactions.append(emoji)
+
+
+class FakeBot(commands.Bot):
+    """
+    로그인하지 않는 Bot. 채널/사용자 조회는 등록된 가짜 객체로 응답하고,
+    start_offline() 이 wait_until_ready() 를 바로 통과시킵니다.
+    """
+
+    def __init__(self):
+        intents = discord.Intents.default()
+        intents.message_content = True
+        super().__init__(command_prefix='!', intents=intents, help_command=None)
+        self.fake_user = FakeUser(next_id(), "공책봇", bot=True)
+        self.fake_channels: Dict[int, FakeChannel] = {}
+        self.fake_users: Dict[int, FakeUser] = {}
+
+    @property
+    def user(self):
+        return self.fake_user
+
+    async def start_offline(self):
+        await self._async_setup_hook()
+        self._ready.set()
+
+    def add_channel(self, channel: FakeChannel) -> FakeChannel:
+        channel.bot_user = self.fake_user
+        self.fake_channels[channel.id] = channel
+        return channel
+
+    def add_user(self, user: FakeUser) -> FakeUser:
+        self.fake_users[user.id] = user
+        return user
+
+    def get_channel(self, channel_id: int, /):
+        return self.fake_channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int, /):
+        channel = self.fake_channels.get(channel_id)
+        if channel is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Channel")
+        return channel
+
+    def get_user(self, user_id: int, /):
+        return self.fake_users.get(user_id)
+
+    async def fetch_user(self, user_id: int, /):
+        user = self.fake_users.get(user_id)
+        if user is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown User")
+        return user
+
+    async def process_commands(self, message):
+        """접두어 명령은 벤치마크 대상이 아님"""
+
+
+class _FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = "Not Found"
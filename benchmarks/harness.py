@@ -0,0 +1,390 @@
+"""
+벤치마크 하네스
+
+스텁 서버 + 가짜 Bot 위에 실제 Cog(ChatHandler / ReactionHandler / Scheduler / WeatherHandler)를
+조립하고, 가짜 메시지를 주입하면서 다음을 측정합니다.
+
+- 응답 지연: 사용자 메시지 주입 → 같은 채널의 다음 봇 메시지까지 (수집 대기 시간 포함)
+- 리액션 지연: 사용자 메시지 주입 → 첫 리액션까지
+- 처리량: 주입한 메시지 수 / (첫 주입 ~ 모든 처리 완료)
+- 이벤트 루프 지연: interval 마다 깨어나는 감시 태스크의 지각 시간
+- 메모리: RSS 증가량 (+ trace_memory=True 이면 tracemalloc 증가량/최대치/상위 할당 위치)
+
+실행 중 생기는 저장소 파일은 임시 디렉터리에 만들어지고 끝나면 삭제됩니다.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from google import genai
+from google.genai import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from config.settings import (  # noqa: E402
+    CHANNEL_BOT, DEFAULT_MODEL, DEFAULT_TEMPERATURE, DEFAULT_TOP_P, MAX_OUTPUT_TOKENS, PROMPT_FILE
+)
+from benchmarks.fakes import FakeBot, FakeChannel, FakeMessage, FakeUser, next_id  # noqa: E402
+from benchmarks.stub_gemini import StubConfig, StubServer  # noqa: E402
+from utils.logger import flush_logging  # noqa: E402
+
+ALL_COGS = ('chat', 'reaction', 'scheduler', 'weather')
+
+
+def percentiles(values: Sequence[float], pcts: Iterable[float] = (50, 90, 99)) -> Dict[str, float]:
+    """값 목록의 백분위수 + 최대값 (비어 있으면 빈 dict)"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {f"p{p:g}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in pcts}
+    result['max'] = ordered[-1]
+    return result
+
+
+def rss_bytes() -> int:
+    """현재 RSS (리눅스 /proc, 그 외에는 최대 RSS)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class LoopLagMonitor:
+    """interval 마다 깨어나 예정보다 늦은 시간을 기록 — 이벤트 루프 블로킹 측정"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+
+class BenchEnv:
+    """
+    async with BenchEnv(...) as env:
+        await env.inject(env.message(user, "안녕"))
+        await env.drain()
+        env.print_report()
+    """
+
+    def __init__(self, stub: Optional[StubConfig] = None, cogs: Sequence[str] = ALL_COGS,
+                 collect_delay: Optional[float] = None, real_rate_limits: bool = False,
+                 trace_memory: bool = False, quiet: bool = True, send_latency: float = 0.0,
+                 channels: int = 1):
+        self.stub_config = stub or StubConfig()
+        self.cog_names = tuple(cogs)
+        self.collect_delay = collect_delay
+        self.real_rate_limits = real_rate_limits
+        self.trace_memory = trace_memory
+        self.quiet = quiet
+        self.send_latency = send_latency
+        self.channel_count = max(1, channels)
+
+        self.stub: Optional[StubServer] = None
+        self.bot: Optional[FakeBot] = None
+        self.cogs: Dict[str, object] = {}
+        self.channel: Optional[FakeChannel] = None
+        self.channels: List[FakeChannel] = []
+        self.monitor = LoopLagMonitor()
+
+        self.injected = 0
+        self.reply_latencies: List[float] = []
+        self.reaction_latencies: List[float] = []
+        self.replies = 0
+        self.dms = 0
+        self._pending: Dict[int, List[FakeMessage]] = {}
+        self._reaction_pending: List[FakeMessage] = []
+        self._tasks: List[asyncio.Task] = []
+        self._listeners: List = []
+        self._first_inject: Optional[float] = None
+        self._last_done: Optional[float] = None
+        # 시나리오별 추가 지표 (리포트 끝에 출력)
+        self.extra: Dict[str, object] = {}
+
+        self._cwd = os.getcwd()
+        self._workdir: Optional[str] = None
+        self._stdout = contextlib.ExitStack()
+        self._rss_start = 0
+        self._trace_start = 0
+        self._trace_snapshot = None
+        self._patched: List = []    # (모듈, 이름, 원래 값) — 종료 시 복원
+
+    # ------------------------------------------------------------------ #
+    #  조립 / 정리
+    # ------------------------------------------------------------------ #
+    async def __aenter__(self) -> "BenchEnv":
+        if self.quiet:
+            self._stdout.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        self.stub = StubServer(self.stub_config).start()
+
+        self._workdir = tempfile.mkdtemp(prefix="peanut-bench-")
+        os.makedirs(os.path.join(self._workdir, "data"))
+        os.chdir(self._workdir)
+
+        if not self.real_rate_limits:
+            from utils.rate_limiter import rate_limiter
+            rate_limiter.limits = {}
+            rate_limiter.default = (10 ** 9, 10 ** 12)
+            rate_limiter._buckets.clear()
+            import utils.quota as quota_module
+            unlimited = {'rpm': 10 ** 9, 'tpm': 10 ** 12, 'weight': 1.0}
+            self._patch(quota_module, 'USER_QUOTA_DEFAULT', unlimited)
+            self._patch(quota_module, 'USER_QUOTA_ROLES', {})
+            quota_module.user_quotas._buckets.clear()
+        import cogs.chat_handler as chat_module
+        import cogs.reaction_handler as reaction_module
+        if self.collect_delay is not None:
+            self._patch(chat_module, 'MESSAGE_COLLECT_DELAY', self.collect_delay)
+
+        client = genai.Client(
+            api_key="bench",
+            http_options=types.HttpOptions(base_url=self.stub.base_url, timeout=120_000),
+        )
+        from utils.gemini_client import GeminiClient
+        from utils.emotion_analyzer import EmotionAnalyzer
+        self.gemini_client = GeminiClient(
+            api_key="bench", model_name=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+            top_p=DEFAULT_TOP_P, max_output_tokens=MAX_OUTPUT_TOKENS, client=client,
+        )
+        self.gemini_client.load_system_prompt(os.path.join(ROOT, PROMPT_FILE))
+        self.emotion_analyzer = EmotionAnalyzer(api_key="bench", gemini_client=self.gemini_client, client=client)
+
+        self.bot = FakeBot()
+        await self.bot.start_offline()
+        self.channel = self.add_channel(CHANNEL_BOT, "bot")
+        self.channels = [self.channel] + [self.add_channel(name=f"bot{i}") for i in range(1, self.channel_count)]
+        if self.channel_count > 1:
+            # 봇 채널 하나만 처리하는 Cog 들이 추가 채널도 봇 채널로 보도록
+            bot_channels = _ChannelSet(c.id for c in self.channels)
+            self._patch(chat_module, 'CHANNEL_BOT', bot_channels)
+            self._patch(reaction_module, 'CHANNEL_BOT', bot_channels)
+        await self._add_cogs()
+
+        self.monitor.start()
+        self._rss_start = rss_bytes()
+        if self.trace_memory:
+            tracemalloc.start(10)
+            self._trace_start = tracemalloc.get_traced_memory()[0]
+            self._trace_snapshot = tracemalloc.take_snapshot()
+        return self
+
+    async def _add_cogs(self):
+        names = self.cog_names
+        if 'chat' in names:
+            from cogs.chat_handler import ChatHandler
+            self.cogs['chat'] = ChatHandler(self.bot, self.gemini_client)
+        if 'reaction' in names:
+            from cogs.reaction_handler import ReactionHandler
+            self.cogs['reaction'] = ReactionHandler(self.bot, self.emotion_analyzer)
+        if 'scheduler' in names:
+            from cogs.scheduler import Scheduler
+            self.cogs['scheduler'] = Scheduler(self.bot)
+        if 'weather' in names:
+            from cogs.weather_handler import WeatherHandler
+            cog = WeatherHandler(self.bot, "bench")
+            cog.weather_client.base_url = f"{self.stub.base_url}/data/2.5"
+            self.cogs['weather'] = cog
+        for cog in self.cogs.values():
+            await self.bot.add_cog(cog)
+        self._listeners = [cog.on_message for name, cog in self.cogs.items() if name in ('chat', 'reaction')]
+
+    async def __aexit__(self, *exc):
+        await self.monitor.stop()
+        for name in list(self.bot.cogs):
+            await self.bot.remove_cog(name)
+        await self.bot.close()
+        self.stub.stop()
+        for module, name, value in reversed(self._patched):
+            setattr(module, name, value)
+        os.chdir(self._cwd)
+        shutil.rmtree(self._workdir, ignore_errors=True)
+        # 로그는 백그라운드 스레드가 출력 — 리다이렉트를 풀기 전에 큐 비우기
+        flush_logging()
+        self._stdout.close()
+
+    def _patch(self, module, name: str, value):
+        self._patched.append((module, name, getattr(module, name)))
+        setattr(module, name, value)
+
+    # ------------------------------------------------------------------ #
+    #  가짜 객체
+    # ------------------------------------------------------------------ #
+    def add_channel(self, channel_id: Optional[int] = None, name: str = "bench") -> FakeChannel:
+        channel = self.bot.add_channel(FakeChannel(channel_id or next_id(), name, self.send_latency))
+        channel.on_send = self._on_channel_send
+        return channel
+
+    def add_user(self, name: str) -> FakeUser:
+        user = self.bot.add_user(FakeUser(next_id(), name))
+        user.on_send = self._on_dm
+        return user
+
+    def message(self, user: FakeUser, content: str, channel: Optional[FakeChannel] = None) -> FakeMessage:
+        channel = channel or self.channel
+        message = FakeMessage(content, author=user, channel=channel)
+        channel.messages.append(message)
+        return message
+
+    # ------------------------------------------------------------------ #
+    #  주입 / 측정
+    # ------------------------------------------------------------------ #
+    def begin(self):
+        """측정 시작 시각 기록 (메시지 주입 없이 봇 스스로 보내는 시나리오용)"""
+        if self._first_inject is None:
+            self._first_inject = time.perf_counter()
+
+    async def inject(self, message: FakeMessage):
+        """모든 on_message 리스너에 메시지 전달 (Discord 의 이벤트 디스패치처럼 각자 태스크로 실행)"""
+        now = time.perf_counter()
+        message.injected_at = now
+        if self._first_inject is None:
+            self._first_inject = now
+        self.injected += 1
+        self._pending.setdefault(message.channel.id, []).append(message)
+        self._reaction_pending.append(message)
+        for listener in self._listeners:
+            task = asyncio.create_task(listener(message))
+            task.add_done_callback(self._on_task_done)
+            self._tasks.append(task)
+
+    def _on_task_done(self, task: asyncio.Task):
+        self._last_done = time.perf_counter()
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️ 리스너 오류: {task.exception()!r}", file=sys.stderr)
+
+    def _on_channel_send(self, channel: FakeChannel, message: FakeMessage):
+        now = time.perf_counter()
+        self.replies += 1
+        self._last_done = now
+        for pending in self._pending.pop(channel.id, []):
+            self.reply_latencies.append(now - pending.injected_at)
+
+    def _on_dm(self, user: FakeUser, message: FakeMessage):
+        self.dms += 1
+        self._last_done = time.perf_counter()
+
+    def _collect_reactions(self):
+        remaining = []
+        for message in self._reaction_pending:
+            if message.reactions:
+                self.reaction_latencies.append(message.reaction_at - message.injected_at)
+            else:
+                remaining.append(message)
+        self._reaction_pending = remaining
+
+    async def drain(self, timeout: float = 300.0, settle: float = 0.5):
+        """주입한 메시지 처리 + 뒤따르는 백그라운드 작업(봇 응답 리액션 등)이 끝날 때까지 대기"""
+        deadline = time.monotonic() + timeout
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+        self._tasks = [t for t in self._tasks if not t.done()]
+        # create_task 로 떼어낸 작업은 추적할 수 없으므로 태스크 수가 줄어들 때까지 대기
+        baseline = {asyncio.current_task(), self.monitor._task}
+        while time.monotonic() < deadline:
+            others = [t for t in asyncio.all_tasks() if t not in baseline and not t.done()
+                      and not _is_idle_background(t)]
+            if not others:
+                break
+            await asyncio.wait(others, timeout=settle)
+        self._collect_reactions()
+
+    # ------------------------------------------------------------------ #
+    #  리포트
+    # ------------------------------------------------------------------ #
+    def report(self) -> Dict:
+        elapsed = (self._last_done or time.perf_counter()) - (self._first_inject or time.perf_counter())
+        handled = self.injected or self.replies + self.dms
+        lag = self.monitor.samples
+        report = {
+            'injected': self.injected,
+            'replies': self.replies,
+            'dms': self.dms,
+            'elapsed': elapsed,
+            'msgs_per_sec': handled / elapsed if elapsed > 0 else 0.0,
+            'reply_latency': percentiles(self.reply_latencies),
+            'reaction_latency': percentiles(self.reaction_latencies),
+            'reacted': len(self.reaction_latencies),
+            'loop_lag': percentiles(lag, (50, 99)),
+            'loop_lag_over_100ms': sum(1 for x in lag if x > 0.1),
+            'rss_growth': rss_bytes() - self._rss_start,
+            'stub': dict(self.stub.stats.requests, errors=self.stub.stats.errors,
+                         max_in_flight=self.stub.stats.max_in_flight),
+        }
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report['traced_growth'] = current - self._trace_start
+            report['traced_peak'] = peak
+            top = tracemalloc.take_snapshot().compare_to(self._trace_snapshot, 'lineno')
+            report['top_allocations'] = [
+                (str(stat.traceback[0]), stat.size_diff) for stat in top
+                if ROOT in str(stat.traceback[0].filename)
+            ][:5]
+        return report
+
+    def print_report(self, title: str = "", file=None):
+        r = self.report()
+        out = file or sys.__stdout__
+
+        def ms(d: Dict) -> str:
+            return "  ".join(f"{k}={v * 1000:.0f}ms" for k, v in d.items()) or "-"
+
+        print(f"\n=== {title or 'benchmark'} ===", file=out)
+        print(f"주입 {r['injected']}개 / 봇 메시지 {r['replies']}개 / DM {r['dms']}개 / "
+              f"{r['elapsed']:.2f}초 → {r['msgs_per_sec']:.1f} msgs/sec", file=out)
+        print(f"응답 지연     {ms(r['reply_latency'])}", file=out)
+        print(f"리액션 지연   {ms(r['reaction_latency'])}  (리액션 {r['reacted']}/{r['injected']})", file=out)
+        print(f"루프 지연     {ms(r['loop_lag'])}  (100ms 초과 {r['loop_lag_over_100ms']}회)", file=out)
+        print(f"RSS 증가      {r['rss_growth'] / 1024 / 1024:+.1f} MiB", file=out)
+        if 'traced_growth' in r:
+            print(f"tracemalloc   증가 {r['traced_growth'] / 1024:+.0f} KiB / 최대 {r['traced_peak'] / 1024 / 1024:.1f} MiB",
+                  file=out)
+            for where, size in r['top_allocations']:
+                print(f"  {size / 1024:+8.0f} KiB  {os.path.relpath(where, ROOT)}", file=out)
+        print(f"스텁 요청     {r['stub']}", file=out)
+        for key, value in self.extra.items():
+            print(f"{key:<13} {value}", file=out)
+
+
+class _ChannelSet(frozenset):
+    """`channel.id != CHANNEL_BOT` 비교를 '여러 봇 채널 중 하나인가'로 바꾸는 채널 ID 집합"""
+
+    def __eq__(self, other):
+        return other in self
+
+    def __ne__(self, other):
+        return other not in self
+
+    __hash__ = frozenset.__hash__
+
+
+def _is_idle_background(task: asyncio.Task) -> bool:
+    """측정 대상이 아닌 상주 태스크 (tasks.loop / 스케줄러 디스패처 등)"""
+    coro = task.get_coro()
+    name = getattr(coro, '__qualname__', '')
+    return name.startswith(('Loop._loop', 'Scheduler._dispatch_loop', 'LoopLagMonitor._run', 'Event.wait', 'Client.'))
@@ -0,0 +1,195 @@
+"""
+실제 대화 리플레이 부하 생성기
+
+data/datasets/peanut_full_data.txt 의 대화 줄을 여러 사용자 / 여러 채널의 트래픽으로 바꿔
+실제 속도의 N배로 봇 Cog(ChatHandler + ReactionHandler)에 흘려 넣습니다. 모델은 로컬 스텁.
+
+    python -m benchmarks.replay --speedup 10 30 100 --lines 2000 --users 30 --channels 3
+
+[대화 리듬]
+데이터에 시각 정보가 없으므로 실제 채팅처럼 '한 사람이 몇 줄 연달아 → 다른 사람' 리듬을 만듭니다.
+- 한 사람의 연속 발화 길이: 기하분포 (평균 --burst-mean 줄)
+- 연속 발화 안의 간격:      로그정규 (중앙값 --line-gap 초)
+- 화자가 바뀔 때의 간격:    로그정규 (중앙값 --turn-gap 초)
+- 사용자마다 주로 쓰는 채널이 있고 --hop 확률로 다른 채널에 말합니다.
+모든 간격은 실제 시간 기준이며 --speedup 으로 나눠 재생합니다. 수집 대기(MESSAGE_COLLECT_DELAY)는
+설정값 그대로이므로 배속이 높을수록 한 번의 응답에 더 많은 메시지가 묶입니다.
+
+[측정]
+- 수집/디바운스: 응답 1회당 묶인 메시지 수, 생성 요청 대비 실제 응답 (버려진 추측 생성)
+- 히스토리 증가: 사용자 히스토리 항목/문자 수와 수집 대기 중 메시지 수를 주기적으로 샘플링
+- 리액션 파이프라인: 리액션 비율(쿨다운으로 건너뛴 비율), 리액션 지연, 감정 분석 요청 수
+- 재생 지연: 예정 시각보다 늦게 주입된 정도 (이벤트 루프가 밀리면 커짐)
++ harness 공통 지표 (응답 지연 백분위, 루프 지연, 메모리)
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.harness import BenchEnv, percentiles  # noqa: E402
+from benchmarks.stub_gemini import LatencyDistribution, StubConfig  # noqa: E402
+
+DATA_FILE = os.path.join(ROOT, 'data', 'datasets', 'peanut_full_data.txt')
+
+
+@dataclass
+class ReplayEvent:
+    at: float           # 재생 시작 기준 실제 시간 (초, 배속 적용 전)
+    user: int           # 사용자 인덱스
+    channel: int        # 채널 인덱스
+    content: str
+
+
+def load_lines(path: str, start: int = 0, limit: int = 0) -> List[str]:
+    with open(path, encoding='utf-8', errors='replace') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    lines = lines[start:]
+    return lines[:limit] if limit else lines
+
+
+def build_schedule(lines: List[str], users: int, channels: int, burst_mean: float,
+                   line_gap: float, turn_gap: float, hop: float, seed: int) -> List[ReplayEvent]:
+    """대화 줄 → (시각, 사용자, 채널, 내용) 이벤트 목록"""
+    rng = random.Random(seed)
+    home = [i % channels for i in range(users)]
+    events: List[ReplayEvent] = []
+    now = 0.0
+    speaker = 0
+    i = 0
+    while i < len(lines):
+        if events:
+            now += rng.lognormvariate(math.log(turn_gap), 0.8)
+        # 직전 화자와 다른 사람으로 교대
+        speaker = (speaker + rng.randrange(1, users)) % users if users > 1 else 0
+        channel = home[speaker] if rng.random() >= hop else rng.randrange(channels)
+        burst = 1
+        while rng.random() > 1 / burst_mean:
+            burst += 1
+        for j, content in enumerate(lines[i:i + burst]):
+            if j:
+                now += rng.lognormvariate(math.log(line_gap), 0.6)
+            events.append(ReplayEvent(now, speaker, channel, content))
+        i += burst
+    return events
+
+
+class HistorySampler:
+    """ChatHandler 내부 상태를 주기적으로 기록"""
+
+    def __init__(self, chat):
+        self.chat = chat
+        self.rows: List[tuple] = []     # (경과초, 주입 수, 히스토리 항목, 히스토리 문자, 사용자 수, 수집 대기 메시지)
+
+    def sample(self, elapsed: float, injected: int) -> tuple:
+        histories = self.chat.user_histories
+        entries = sum(len(h) for h in histories.values())
+        chars = sum(len(part.get('text', '')) for h in histories.values() for item in h for part in item['parts'])
+        waiting = sum(len(state['messages']) for state in self.chat._channel_state.values())
+        row = (elapsed, injected, entries, chars, len(histories), waiting)
+        self.rows.append(row)
+        return row
+
+
+async def replay(env: BenchEnv, events: List[ReplayEvent], speedup: float, users: int,
+                 sample_interval: float, timeline: bool):
+    chat = env.cogs['chat']
+    members = [env.add_user(f"peanut{i}") for i in range(users)]
+    sampler = HistorySampler(chat)
+    drift: List[float] = []
+
+    start = time.perf_counter()
+    next_sample = 0.0
+    for event in events:
+        target = start + event.at / speedup
+        delay = target - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        drift.append(max(0.0, time.perf_counter() - target))
+        await env.inject(env.message(members[event.user], event.content, env.channels[event.channel]))
+
+        elapsed = time.perf_counter() - start
+        if elapsed >= next_sample:
+            row = sampler.sample(elapsed, env.injected)
+            next_sample = elapsed + sample_interval
+            if timeline:
+                print(f"  {row[0]:7.1f}s  주입 {row[1]:6d}  응답 {env.replies:5d}  히스토리 {row[2]:6d}항목/"
+                      f"{row[3] / 1024:7.1f}KiB  대기 {row[5]:4d}", file=sys.__stdout__)
+    await env.drain()
+    sampler.sample(time.perf_counter() - start, env.injected)
+    return sampler, drift
+
+
+def summarize(env: BenchEnv, sampler: HistorySampler, drift: List[float], events: List[ReplayEvent]):
+    stats = env.stub.stats.requests
+    replies = max(1, env.replies)
+    first, last = sampler.rows[0], sampler.rows[-1]
+    peak_waiting = max(row[5] for row in sampler.rows)
+    per_1k = (last[3] - first[3]) / max(1, last[1] - first[1]) * 1000
+
+    env.extra['묶음']   = f"응답 1회당 메시지 {env.injected / replies:.1f}개 (응답 {env.replies}회, 수집 대기 최대 {peak_waiting}개)"
+    env.extra['생성 요청'] = f"{stats.get('chat', 0)}회 → 응답 {env.replies}회 (버려진 추측 {max(0, stats.get('chat', 0) - env.replies)}회)"
+    env.extra['히스토리'] = (f"{last[4]}명 / {last[2]}항목 / {last[3] / 1024:.1f} KiB "
+                         f"(1000메시지당 {per_1k / 1024:+.1f} KiB)")
+    env.extra['리액션']  = (f"{len(env.reaction_latencies)}/{env.injected} "
+                         f"({len(env.reaction_latencies) / max(1, env.injected):.0%}, 나머지는 쿨다운 생략) / "
+                         f"감정 분석 {stats.get('emotion', 0)}회")
+    env.extra['재생 지연'] = "  ".join(f"{k}={v * 1000:.0f}ms" for k, v in percentiles(drift).items()) or "-"
+    env.extra['재생 구간'] = f"실제 {events[-1].at / 60:.1f}분 분량"
+
+
+async def run(speedup: float, events: List[ReplayEvent], args):
+    stub = StubConfig(LatencyDistribution.parse(args.latency), args.error_rate, args.reply_chars, args.seed)
+    env = BenchEnv(stub, cogs=('chat', 'reaction'), collect_delay=args.collect_delay,
+                   real_rate_limits=args.real_rate_limits, trace_memory=args.trace_memory,
+                   quiet=not args.verbose, send_latency=args.send_latency, channels=args.channels)
+    async with env:
+        sampler, drift = await replay(env, events, speedup, args.users, args.sample, args.timeline)
+        summarize(env, sampler, drift, events)
+        env.print_report(f"replay x{speedup:g} ({len(events)}줄, 사용자 {args.users}명, 채널 {args.channels}개, "
+                         f"지연 {stub.latency})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=DATA_FILE)
+    parser.add_argument('--speedup', type=float, nargs='+', default=[10.0, 100.0])
+    parser.add_argument('--start', type=int, default=0, help="시작 줄")
+    parser.add_argument('--lines', type=int, default=1000, help="재생할 줄 수 (0 = 전부)")
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--channels', type=int, default=3)
+    parser.add_argument('--hop', type=float, default=0.1, help="주 채널이 아닌 곳에 말할 확률")
+    parser.add_argument('--burst-mean', type=float, default=3.0)
+    parser.add_argument('--line-gap', type=float, default=2.0, help="연속 발화 간격 중앙값 (실제 초)")
+    parser.add_argument('--turn-gap', type=float, default=6.0, help="화자 교대 간격 중앙값 (실제 초)")
+    parser.add_argument('--latency', default="lognormal:0.8,0.5")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--reply-chars', type=int, default=120)
+    parser.add_argument('--send-latency', type=float, default=0.05)
+    parser.add_argument('--collect-delay', type=float, default=None)
+    parser.add_argument('--real-rate-limits', action='store_true')
+    parser.add_argument('--trace-memory', action='store_true')
+    parser.add_argument('--sample', type=float, default=1.0, help="히스토리 샘플링 간격 (초)")
+    parser.add_argument('--timeline', action='store_true', help="샘플링 결과를 진행 중에 출력")
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    lines = load_lines(args.file, args.start, args.lines)
+    events = build_schedule(lines, args.users, args.channels, args.burst_mean,
+                            args.line_gap, args.turn_gap, args.hop, args.seed)
+    for speedup in args.speedup:
+        asyncio.run(run(speedup, events, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+로컬 Gemini 스텁 서버
+
+genai.Client(http_options=HttpOptions(base_url=...)) 가 보내는 generateContent 요청에
+설정한 지연 분포만큼 기다린 뒤 응답합니다. 같은 서버가 OpenWeather 예보 API 도 흉내 냅니다.
+
+[지연 분포 표기]
+- const:0.5            항상 0.5초
+- uniform:0.2,1.5      0.2~1.5초 균등
+- normal:0.8,0.2       평균 0.8, 표준편차 0.2 (음수는 0)
+- lognormal:0.8,0.5    중앙값 0.8초, 로그 표준편차 0.5 (긴 꼬리 — 실제 API 와 비슷)
+
+단독 실행:
+    python -m benchmarks.stub_gemini --port 8765 --latency lognormal:0.8,0.5 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+EMOTION_MARKER = "Analyze the emotion"
+EMOTIONS = ["happy", "amused", "curious", "tired", "surprised", "sad", "neutral"]
+REPLY_WORDS = ["헐", "진짜", "ㅋㅋ", "오늘", "뭐해요", "저두", "심심해요", "아이고", "그러면", "맞아요", "부엉부엉.."]
+
+
+class LatencyDistribution:
+    """'종류:인자' 문자열로 만드는 지연 분포"""
+
+    def __init__(self, kind: str, params: List[float]):
+        self.kind = kind
+        self.params = params
+        if kind not in ('const', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"알 수 없는 지연 분포: {kind}")
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, args = spec.partition(':')
+        params = [float(x) for x in args.split(',')] if args else [0.0]
+        return cls(kind.strip(), params)
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == 'const':
+            return p[0]
+        if self.kind == 'uniform':
+            return rng.uniform(p[0], p[1])
+        if self.kind == 'normal':
+            return max(0.0, rng.gauss(p[0], p[1]))
+        return rng.lognormvariate(math.log(p[0]), p[1])
+
+    def __str__(self):
+        return f"{self.kind}:{','.join(f'{x:g}' for x in self.params)}"
+
+
+@dataclass
+class StubConfig:
+    latency: LatencyDistribution = field(default_factory=lambda: LatencyDistribution('const', [0.3]))
+    error_rate: float = 0.0         # 이 비율만큼 503 응답 (재시도 경로 측정)
+    reply_chars: int = 120          # 채팅 응답 길이 (대략)
+    seed: Optional[int] = None
+
+
+class StubStats:
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def enter(self, kind: str):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _text_of(body: Dict) -> str:
+    parts = []
+    for content in body.get('contents', []):
+        for part in content.get('parts', []):
+            if 'text' in part:
+                parts.append(part['text'])
+    return "\n".join(parts)
+
+
+def _gemini_response(text: str, prompt_chars: int, model: str) -> Dict:
+    prompt_tokens = prompt_chars // 2 + 1
+    output_tokens = len(text) // 2 + 1
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+        "modelVersion": model,
+    }
+
+
+def _forecast(city: str) -> Dict:
+    now = int(time.time()) // 10800 * 10800
+    items = []
+    for i in range(16):
+        dt = now + i * 10800
+        items.append({
+            "dt": dt,
+            "dt_txt": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(dt)),
+            "main": {"temp": 10 + 6 * math.sin(i / 3), "feels_like": 9, "temp_min": 5, "temp_max": 15,
+                     "humidity": 60, "pressure": 1013},
+            "wind": {"speed": 2.5 + i % 4},
+            "clouds": {"all": (i * 13) % 100},
+            "weather": [{"main": "Rain" if i % 5 == 3 else "Clouds", "description": ""}],
+            "rain": {"3h": 1.2} if i % 5 == 3 else {},
+            "pop": 0.4,
+        })
+    return {"city": {"name": city, "country": "KR"}, "list": items}
+
+
+class StubServer:
+    """aiohttp 스텁 서버 — start() 는 별도 스레드의 이벤트 루프에서 실행 (봇 루프 지연에 섞이지 않음)"""
+
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.host = host
+        self.port = port
+        self.stats = StubStats()
+        self._rng = random.Random(config.seed)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_post('/{version}/models/{model_action}', self._generate)
+        app.router.add_get('/data/2.5/forecast', self._weather_forecast)
+        app.router.add_get('/data/2.5/weather', self._weather_now)
+        return app
+
+    async def _generate(self, request: web.Request) -> web.Response:
+        model, _, action = request.match_info['model_action'].partition(':')
+        body = await request.json()
+        prompt = _text_of(body)
+        is_emotion = EMOTION_MARKER in prompt
+        kind = 'emotion' if is_emotion else 'chat'
+        self.stats.enter(kind)
+        try:
+            await asyncio.sleep(self.config.latency.sample(self._rng))
+            if self.config.error_rate and self._rng.random() < self.config.error_rate:
+                self.stats.errors += 1
+                return web.json_response(
+                    {"error": {"code": 503, "message": "stub overloaded", "status": "UNAVAILABLE"}},
+                    status=503,
+                )
+            if is_emotion:
+                emotions = self._rng.sample(EMOTIONS, 2)
+                text = json.dumps({"emotions": emotions, "confidence": round(self._rng.uniform(0.4, 0.95), 2)})
+            else:
+                words = []
+                while sum(len(w) + 1 for w in words) < self.config.reply_chars:
+                    words.append(self._rng.choice(REPLY_WORDS))
+                text = " ".join(words)
+            return web.json_response(_gemini_response(text, len(prompt), model))
+        finally:
+            self.stats.leave()
+
+    async def _weather_forecast(self, request: web.Request) -> web.Response:
+        self.stats.enter('weather')
+        try:
+            await asyncio.sleep(self.config.latency.sample(self._rng) / 4)
+            return web.json_response(_forecast(request.query.get('q', 'Seoul')))
+        finally:
+            self.stats.leave()
+
+    async def _weather_now(self, request: web.Request) -> web.Response:
+        city = request.query.get('q', 'Seoul')
+        item = _forecast(city)['list'][0]
+        return web.json_response({
+            "name": city, "sys": {"country": "KR"}, "main": item['main'], "wind": item['wind'],
+            "clouds": item['clouds'], "weather": item['weather'],
+        })
+
+    # ------------------------------------------------------------------ #
+    #  백그라운드 실행
+    # ------------------------------------------------------------------ #
+    def start(self) -> "StubServer":
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.make_app(), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, self.host, self.port)
+            self._loop.run_until_complete(site.start())
+            self.port = self._runner.addresses[0][1]
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="stub-gemini", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', default="lognormal:0.8,0.5")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--reply-chars', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(LatencyDistribution.parse(args.latency), args.error_rate, args.reply_chars, args.seed)
+    server = StubServer(config, args.host, args.port)
+    print(f"🧪 Gemini 스텁 서버: http://{args.host}:{args.port} (지연 {config.latency}, 오류율 {args.error_rate})")
+    web.run_app(server.make_app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == '__main__':
+    main()
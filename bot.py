@@ -1,5 +1,33 @@
 """
-Discord 공책봇 - 메인 파일 (v3.3 - 아키텍처 수정)
+Discord 공책봇 - 메인 파일 (v4.2 - 재연결에 안전한 1회 초기화)
+
+[v4.2 변경]
+- FIX: 게이트웨이 재연결마다 on_ready 가 다시 오면서 초기화가 반복될 수 있던 구조 정리
+  · setup_hook 은 _setup_started 로 1회만 실행 (다시 호출돼도 바로 반환)
+  · 이미 로드된 Cog 는 생성 자체를 건너뜀 (저장소 재로드 / 루프 작업 중복 방지)
+  · on_ready / on_resumed 는 로그와 peanut_gateway_events_total 카운터만 — 두 번째 이후 ready 는 bot.reconnected
+
+[v4.1 변경]
+- PERF: 시작할 때마다 서버 / 전역 트리를 모두 sync 하던 것을 커맨드 구성이 바뀐 범위만 sync
+  (utils/command_sync.py — 트리 payload 해시를 COMMAND_SYNC_FILE 에 보관, 같으면 API 호출 없음)
+  /sync 는 해시와 무관하게 강제 동기화 (bot.command_sync 공유)
+
+[v4.0 변경]
+- PERF: 초기화를 on_ready → setup_hook 으로 이동 (게이트웨이 연결 전에 1회)
+  · 서로 무관한 초기화를 asyncio.gather 로 동시에 실행
+    genai 클라이언트 생성(httpx / SSL 준비, 가장 느림) · 메모 로드 · 시스템 프롬프트 로드 · 데이터셋 확인
+    (파일 / 클라이언트 준비는 to_thread — 이벤트 루프는 그동안 다른 준비를 진행)
+  · 핵심 Cog(계측 / 채팅 / 명령어 / 리액션 / 다이제스트)만 setup_hook 에서 로드
+  · DEFERRED_COGS(페르소나 / 스케줄러 / 날씨)는 백그라운드 태스크에서 생성(to_thread, 저장소 로드 포함) 후 로드
+    → 게이트웨이 연결과 겹쳐 진행, 첫 메시지 처리를 막지 않음
+  · 슬래시 커맨드 동기화도 백그라운드 — 선택 Cog 까지 로드된 완전한 트리로
+  · 시작부터 단계(prepare / core / deferred / sync) 완료까지 걸린 시간을 bot.startup 로그와 peanut_stage_seconds{flow="startup"} 로 기록
+- wait_startup(): 백그라운드 로드 / 동기화 완료 대기 (벤치마크 / 종료 처리용)
+
+[v3.4 변경]
+- print() → utils/logger 구조화 로그
+  main() 시작 시 setup_logging(), bot.run(log_handler=None) 으로 discord.py 로그도 같은 큐 / 형식으로 출력
+  종료 시 shutdown_logging() 으로 남은 기록 출력
 
 [수정 내역]
 - ARCH FIX: command_prefix를 '/'에서 '!'로 변경
@@ -8,16 +36,20 @@ Discord 공책봇 - 메인 파일 (v3.3 - 아키텍처 수정)
   결과: /model, /prompt 등은 이제 Discord 슬래시커맨드(app_commands)로만 동작.
         관리자 전용 텍스트 명령어는 !reset, !down 등으로 사용 가능.
 """
+import asyncio
 import discord
 from discord.ext import commands
 import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
 from config.settings import (
     CHANNEL_BOT, DEFAULT_MODEL, DEFAULT_TEMPERATURE, DEFAULT_TOP_P,
-    MAX_OUTPUT_TOKENS, PROMPT_FILE, DATASET_FILE, MEMO_FILE, SERVER_ID
+    MAX_OUTPUT_TOKENS, PROMPT_FILE, DATASET_FILE, MEMO_FILE, SERVER_ID, DEFERRED_COGS
 )
 from utils.gemini_client import GeminiClient
+from utils.genai_pool import get_genai_client
 from utils.memo_manager import MemoManager
 from utils.emotion_analyzer import EmotionAnalyzer
 from cogs.chat_handler import ChatHandler
@@ -26,7 +58,16 @@ from cogs.slash_commands import SlashCommands
 from cogs.reaction_handler import ReactionHandler
 from cogs.persona_handler import PersonaHandler
 from cogs.scheduler import Scheduler
+from cogs.channel_digest import ChannelDigest
 from cogs.weather_handler import WeatherHandler
+from cogs.metrics_handler import MetricsHandler
+from utils.metrics import metrics
+from utils.command_sync import CommandSync
+from utils.logger import get_logger, setup_logging, shutdown_logging
+
+log = get_logger(__name__)
+
+GATEWAY_EVENTS = 'peanut_gateway_events_total'
 
 
 class PeanutBot:
@@ -46,7 +87,7 @@ class PeanutBot:
             )
 
         if not self.weather_api_key:
-            print("⚠️ OPENWEATHER_API_KEY가 설정되지 않아 날씨 기능이 비활성화됩니다.")
+            log.warning("weather.disabled", "⚠️ OPENWEATHER_API_KEY가 설정되지 않아 날씨 기능이 비활성화됩니다.")
 
         intents = discord.Intents.default()
         intents.message_content = True
@@ -60,27 +101,24 @@ class PeanutBot:
             intents=intents,
             help_command=None
         )
+        # v4.0: 클라이언트 / 메모 / Cog 준비는 setup_hook 에서 (login 직후, 게이트웨이 연결 전)
+        self.bot.setup_hook = self.setup_hook
 
-        self.gemini_client = GeminiClient(
-            api_key=self.google_api_key,
-            model_name=DEFAULT_MODEL,
-            temperature=DEFAULT_TEMPERATURE,
-            top_p=DEFAULT_TOP_P,
-            max_output_tokens=MAX_OUTPUT_TOKENS
-        )
-
-        self.memo_manager     = MemoManager(memo_file=MEMO_FILE)
-        # gemini_client 이후에 생성 — model_name 동기화를 위해 참조 전달
-        self.emotion_analyzer = EmotionAnalyzer(
-            api_key=self.google_api_key,
-            gemini_client=self.gemini_client
-        )
+        self.genai_client     = None
+        self.gemini_client    = None
+        self.memo_manager     = None
+        self.emotion_analyzer = None
 
         self.chat_handler    = None
         self.bot_commands    = None
         self.slash_commands  = None
         self.reaction_handler = None
 
+        self.command_sync: Optional[CommandSync] = None
+        self._setup_started = False
+        self._ready_count = 0
+        self._startup_task: Optional[asyncio.Task] = None
+
         self.setup_events()
 
     def setup_events(self):
@@ -88,20 +126,23 @@ class PeanutBot:
 
         @self.bot.event
         async def on_ready():
-            print("=" * 50)
-            print(f"✅ {self.bot.user} 봇이 준비되었습니다!")
-            print(f"📌 현재 모델: {self.gemini_client.model_name}")
-            print(f"🌡️ Temperature: {self.gemini_client.temperature}")
-            print(f"🎯 Top-p: {self.gemini_client.top_p}")
-            print(f"⌨️ Prefix: ! (슬래시커맨드: /model /prompt 등)")
-            print("=" * 50)
-
-            self.gemini_client.load_system_prompt(PROMPT_FILE)
-            self.load_dataset()
-            await self.setup_cogs()
+            # 재연결(세션 재생성) 때마다 다시 호출됨 — 초기화는 setup_hook 에서 이미 1회 완료
+            self._ready_count += 1
+            metrics.inc(GATEWAY_EVENTS, event='ready')
+            if self._ready_count > 1:
+                log.info("bot.reconnected", "🔁 게이트웨이 재연결 (초기화 생략)",
+                         ready_count=self._ready_count, guilds=len(self.bot.guilds))
+                return
+            log.info("bot.ready", f"✅ {self.bot.user} 봇이 준비되었습니다!",
+                     model=self.gemini_client.model_name,
+                     temperature=self.gemini_client.temperature,
+                     top_p=self.gemini_client.top_p,
+                     prefix="!")
 
-            print("✅ 모든 초기화 완료!")
-            print("=" * 50)
+        @self.bot.event
+        async def on_resumed():
+            metrics.inc(GATEWAY_EVENTS, event='resumed')
+            log.info("bot.resumed", "🔁 게이트웨이 세션 재개")
 
         @self.bot.event
         async def on_command_error(ctx, error):
@@ -114,107 +155,197 @@ class PeanutBot:
             elif isinstance(error, commands.MissingPermissions):
                 await ctx.send("❌ 이 명령어를 사용할 권한이 없습니다.")
             else:
-                print(f"❌ 명령어 오류: {error}")
+                log.error("command.failed", "❌ 명령어 오류", command=str(ctx.command), error=str(error))
                 await ctx.send(f"❌ 오류가 발생했습니다: {error}")
 
+    # ------------------------------------------------------------------ #
+    #  시작
+    # ------------------------------------------------------------------ #
+    async def setup_hook(self):
+        """클라이언트 / 메모 / 핵심 Cog 준비 — 선택 Cog 와 커맨드 동기화는 백그라운드로 (1회만)"""
+        if self._setup_started:
+            log.info("bot.setup_skipped", "⏭️ 이미 초기화됨 (setup_hook 재호출 무시)")
+            return
+        self._setup_started = True
+        started = time.perf_counter()
+        phases: Dict[str, float] = {}
+
+        # 1) 서로 무관한 초기화 동시 실행
+        async def prepare_gemini():
+            # 모든 Gemini 사용처가 공유하는 genai 클라이언트 (연결 풀 1개)
+            self.genai_client = await asyncio.to_thread(get_genai_client, self.google_api_key)
+            self.gemini_client = GeminiClient(
+                api_key=self.google_api_key,
+                model_name=DEFAULT_MODEL,
+                temperature=DEFAULT_TEMPERATURE,
+                top_p=DEFAULT_TOP_P,
+                max_output_tokens=MAX_OUTPUT_TOKENS,
+                client=self.genai_client
+            )
+            await asyncio.to_thread(self.gemini_client.load_system_prompt, PROMPT_FILE)
+
+        async def prepare_memo():
+            self.memo_manager = await asyncio.to_thread(MemoManager, memo_file=MEMO_FILE)
+
+        await asyncio.gather(prepare_gemini(), prepare_memo(), asyncio.to_thread(self.load_dataset))
+        # gemini_client 이후에 생성 — model_name 동기화를 위해 참조 전달
+        self.emotion_analyzer = EmotionAnalyzer(
+            api_key=self.google_api_key,
+            gemini_client=self.gemini_client,
+            client=self.genai_client
+        )
+        self.gemini_client.update_memories(self.memo_manager.get_memories_as_text())
+        log.info("memo.loaded", "✅ 메모리 로드 완료", count=self.memo_manager.get_memory_count())
+        phases['prepare'] = time.perf_counter() - started
+
+        # 2) 핵심 Cog — 메시지 처리에 필요한 것만
+        await self.setup_cogs()
+        deferred = []
+        for name, factory in self._optional_cogs():
+            if name in DEFERRED_COGS:
+                deferred.append((name, factory))
+            else:
+                await self._load_cog(name, factory)
+        phases['core'] = time.perf_counter() - started
+
+        # 3) 선택 Cog + 커맨드 동기화는 게이트웨이 연결과 겹쳐서
+        self._startup_task = asyncio.create_task(self._finish_startup(deferred, started, phases))
+
     async def setup_cogs(self):
-        """Cogs 설정 및 추가"""
+        """핵심 Cogs 설정 및 추가"""
         # bot 객체에 공유 인스턴스 등록 (동적 로드 대비)
         self.bot.gemini_client    = self.gemini_client
         self.bot.memo_manager     = self.memo_manager
         self.bot.emotion_analyzer = self.emotion_analyzer
+        # bot 객체에 api_key 등록 (PersonaHandler / WeatherHandler 동적 로드 대비)
+        self.bot.google_api_key   = self.google_api_key
+        self.bot.weather_api_key  = self.weather_api_key
+
+        # 계측 Cog 먼저 — 이후 초기화 구간의 이벤트 루프 지연도 기록
+        self.metrics_handler = MetricsHandler(self.bot)
+        await self._add_cog("MetricsHandler", self.metrics_handler)
 
         self.chat_handler = ChatHandler(self.bot, self.gemini_client)
-        await self.bot.add_cog(self.chat_handler)
+        await self._add_cog("ChatHandler", self.chat_handler)
         self.bot.chat_handler = self.chat_handler
-        print("✅ ChatHandler Cog 로드 완료")
 
         self.bot_commands = BotCommands(
             self.bot, self.gemini_client, self.chat_handler, self.memo_manager
         )
-        await self.bot.add_cog(self.bot_commands)
-        print("✅ BotCommands Cog 로드 완료")
+        await self._add_cog("BotCommands", self.bot_commands)
 
         self.slash_commands = SlashCommands(
             self.bot, self.gemini_client, self.chat_handler, self.memo_manager
         )
-        await self.bot.add_cog(self.slash_commands)
-        print("✅ SlashCommands Cog 로드 완료")
+        await self._add_cog("SlashCommands", self.slash_commands)
 
         self.reaction_handler = ReactionHandler(self.bot, self.emotion_analyzer)
-        await self.bot.add_cog(self.reaction_handler)
-        print("✅ ReactionHandler Cog 로드 완료")
-
-        # bot 객체에 api_key 등록 (PersonaHandler 동적 로드 대비)
-        self.bot.google_api_key = self.google_api_key
-        self.persona_handler = PersonaHandler(self.bot, self.google_api_key)
-        await self.bot.add_cog(self.persona_handler)
-        print("✅ PersonaHandler Cog 로드 완료")
-
-        self.scheduler = Scheduler(self.bot)
-        await self.bot.add_cog(self.scheduler)
-        print("✅ Scheduler Cog 로드 완료")
-
+        await self._add_cog("ReactionHandler", self.reaction_handler)
+
+        # 생성자에서 버킷 / 커버리지 저장소를 읽음 → 스레드에서 생성
+        self.channel_digest = await asyncio.to_thread(ChannelDigest, self.bot, self.gemini_client)
+        await self._add_cog("ChannelDigest", self.channel_digest)
+
+    def _optional_cogs(self) -> List[Tuple[str, Callable[[], commands.Cog]]]:
+        """(Cog 이름, 생성 함수) — 생성 함수는 스레드에서 실행 (저장소 로드 포함, 루프 작업 시작은 cog_load)"""
+        optional = [
+            ("PersonaHandler", lambda: PersonaHandler(self.bot, self.google_api_key, client=self.genai_client)),
+            ("Scheduler",      lambda: Scheduler(self.bot)),
+        ]
         # WeatherHandler (API 키 있을 때만)
         if self.weather_api_key:
-            self.bot.weather_api_key = self.weather_api_key
-            self.weather_handler = WeatherHandler(self.bot, self.weather_api_key)
-            await self.bot.add_cog(self.weather_handler)
-            print("✅ WeatherHandler Cog 로드 완료")
+            optional.append(("WeatherHandler", lambda: WeatherHandler(self.bot, self.weather_api_key)))
         else:
-            print("⏭️ WeatherHandler Cog 스킵 (API 키 없음)")
+            log.info("cog.skipped", "⏭️ WeatherHandler Cog 스킵 (API 키 없음)", cog="WeatherHandler")
+        return optional
 
-        # Guild 단위 즉시 동기화 (Discord 반영 즉시)
-        MY_GUILD = discord.Object(id=int(os.getenv('GUILD_ID', '0')) or SERVER_ID)
-        try:
-            # Guild 커맨드를 전역 커맨드와 동일하게 복사 후 즉시 동기화
-            self.bot.tree.copy_global_to(guild=MY_GUILD)
-            guild_synced = await self.bot.tree.sync(guild=MY_GUILD)
-            print(f"✅ 슬래시 커맨드 서버 즉시 동기화 완료: {len(guild_synced)}개")
-        except Exception as e:
-            print(f"⚠️ 서버 즉시 동기화 실패 (전역 동기화만 적용): {e}")
+    async def _add_cog(self, name: str, cog: commands.Cog):
+        await self.bot.add_cog(cog)
+        log.info("cog.loaded", f"✅ {name} Cog 로드 완료", cog=name)
 
-        try:
-            self.bot.tree.clear_commands(guild=None)
-            synced = await self.bot.tree.sync()
-            print(f"✅ 슬래시 커맨드 전역 동기화 완료: {len(synced)}개 명령어")
-            for cmd in synced:
-                print(f"   └ /{cmd.name}")
-        except Exception as e:
-            print(f"⚠️ 슬래시 커맨드 동기화 실패: {e}")
+    async def _load_cog(self, name: str, factory: Callable[[], commands.Cog]):
+        """아직 없을 때만 스레드에서 생성 후 추가 (이미 있으면 생성하지 않음 — 저장소 / 루프 작업 중복 방지)"""
+        if self.bot.get_cog(name) is not None:
+            log.info("cog.already_loaded", f"⏭️ {name} Cog 이미 로드됨", cog=name)
+            return
+        await self._add_cog(name, await asyncio.to_thread(factory))
 
-        memory_text = self.memo_manager.get_memories_as_text()
-        self.gemini_client.update_memories(memory_text)
-        print(f"✅ 메모리 로드 완료: {self.memo_manager.get_memory_count()}개")
+    async def _load_deferred(self, name: str, factory: Callable[[], commands.Cog]):
+        try:
+            await self._load_cog(name, factory)
+        except Exception:
+            # 선택 기능 하나가 실패해도 나머지 / 커맨드 동기화는 진행
+            log.exception("cog.load_failed", f"❌ {name} Cog 로드 실패", cog=name)
+
+    async def _finish_startup(self, deferred, started: float, phases: Dict[str, float]):
+        """선택 Cog 동시 로드 → 커맨드 동기화 → 단계별 소요 시간 기록"""
+        await asyncio.gather(*(self._load_deferred(name, factory) for name, factory in deferred))
+        phases['deferred'] = time.perf_counter() - started
+
+        await self.sync_commands()
+        phases['sync'] = time.perf_counter() - started
+
+        for phase, seconds in phases.items():
+            metrics.observe_stage('startup', phase, seconds)
+        log.info("bot.startup", "✅ 모든 초기화 완료!",
+                 **{f"{phase}_ms": round(seconds * 1000) for phase, seconds in phases.items()},
+                 deferred=[name for name, _ in deferred])
+
+    async def wait_startup(self):
+        """백그라운드 선택 Cog 로드 / 커맨드 동기화 완료까지 대기"""
+        if self._startup_task is not None:
+            await self._startup_task
+
+    async def sync_commands(self, force: bool = False):
+        """슬래시 커맨드 서버 즉시 동기화 + 전역 동기화 — 커맨드 구성이 바뀐 범위만 (force 면 전부)"""
+        if self.command_sync is None:
+            # Guild 단위 즉시 동기화 (Discord 반영 즉시)
+            MY_GUILD = discord.Object(id=int(os.getenv('GUILD_ID', '0')) or SERVER_ID)
+            self.command_sync = await asyncio.to_thread(CommandSync, self.bot.tree, MY_GUILD)
+            self.bot.command_sync = self.command_sync
+
+        results = await self.command_sync.sync_all(force=force)
+        for scope, result in results.items():
+            if isinstance(result, Exception):
+                log.warning("commands.sync_failed", "⚠️ 슬래시 커맨드 동기화 실패", scope=scope, error=str(result))
+            elif result is None:
+                log.info("commands.sync_skipped", "⏭️ 슬래시 커맨드 변경 없음 (동기화 생략)", scope=scope)
+            else:
+                log.info("commands.synced", "✅ 슬래시 커맨드 동기화 완료", scope=scope,
+                         count=len(result), commands=[cmd.name for cmd in result], forced=force)
 
     def load_dataset(self):
         try:
             with open(DATASET_FILE, 'r', encoding='utf-8') as f:
                 f.readline()
-            print(f"✅ 데이터셋 파일 확인 완료: {DATASET_FILE}")
+            log.info("dataset.checked", "✅ 데이터셋 파일 확인 완료", path=DATASET_FILE)
         except FileNotFoundError:
-            print(f"⚠️ {DATASET_FILE} 파일을 찾을 수 없습니다.")
+            log.warning("dataset.missing", f"⚠️ {DATASET_FILE} 파일을 찾을 수 없습니다.", path=DATASET_FILE)
         except Exception as e:
-            print(f"⚠️ 데이터셋 로드 중 오류: {e}")
+            log.warning("dataset.failed", "⚠️ 데이터셋 로드 중 오류", path=DATASET_FILE, error=str(e))
 
     def run(self):
         try:
-            print("🚀 봇을 시작합니다...")
-            self.bot.run(self.discord_token)
+            log.info("bot.starting", "🚀 봇을 시작합니다...")
+            # discord.py 기본 핸들러 대신 루트 로거(구조화 로그 큐)로 출력
+            self.bot.run(self.discord_token, log_handler=None)
         except KeyboardInterrupt:
-            print("\n⏹️ 봇을 종료합니다...")
-        except Exception as e:
-            print(f"❌ 봇 실행 중 오류: {e}")
+            log.info("bot.stopped", "⏹️ 봇을 종료합니다...")
+        except Exception:
+            log.exception("bot.crashed", "❌ 봇 실행 중 오류")
 
 
 def main():
+    setup_logging()
     try:
         bot = PeanutBot()
         bot.run()
     except ValueError as e:
-        print(str(e))
-    except Exception as e:
-        print(f"❌ 초기화 중 오류 발생: {e}")
+        log.error("bot.config_error", str(e))
+    except Exception:
+        log.exception("bot.init_failed", "❌ 초기화 중 오류 발생")
+    finally:
+        shutdown_logging()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,287 @@
+"""
+채널 다이제스트 Cog (v1.0)
+
+DIGEST_CHANNELS 의 대화를 시간 단위 버킷으로 모아 백그라운드에서 미리 요약합니다.
+/summarize hours=N (메시지 ID 생략) 은 Discord 기록을 다시 읽지 않고
+마감된 버킷 요약 + 진행 중인 버킷만 요약해서 병합합니다.
+
+[동작]
+- 수집:  on_message 로 메시지를 현재 시간 버킷(메모리)에 추가
+- 마감:  DIGEST_TICK_SECONDS 마다 지난 시간 버킷을 저장소에 기록 (요약 대기 상태)
+- 요약:  대기 중인 버킷을 저비용 모델로 요약 후 원문 줄은 버리고 요약만 보관
+- 정리:  DIGEST_RETENTION_HOURS 보다 오래된 버킷 삭제
+- 복구:  시작 시 마지막 마감 시각 이후(최대 DIGEST_BACKFILL_HOURS)를 채널 기록에서 다시 채움
+
+[연속 수집 범위]
+coverage 레코드의 since ~ until 구간은 빠짐없이 버킷에 기록되어 있음을 뜻합니다.
+요청 구간이 이 범위를 벗어나면 None 을 반환하고, 호출 측은 기존 방식으로 요약합니다.
+
+[저장 구조]
+data/digests/buckets.json  : {"buckets":  [{"key", "channel_id", "start", "count", "lines", "summary"}]}
+data/digests/coverage.json : {"channels": [{"channel_id", "since", "until"}]}
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import discord
+from discord.ext import commands, tasks
+
+from config.settings import (
+    DIGEST_CHANNELS, DIGEST_BUCKET_FILE, DIGEST_COVERAGE_FILE,
+    DIGEST_RETENTION_HOURS, DIGEST_BACKFILL_HOURS, DIGEST_TICK_SECONDS
+)
+from utils.storage import open_store
+from utils.summarizer import ChannelSummarizer, format_message
+from utils.usage import bind_usage
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+BUCKET_SECONDS = 3600
+
+
+def _bucket_start(ts: float) -> int:
+    return int(ts // BUCKET_SECONDS * BUCKET_SECONDS)
+
+
+def _bucket_label(start: int) -> str:
+    return datetime.fromtimestamp(start).strftime('%m/%d %H시')
+
+
+class ChannelDigest(commands.Cog):
+    """채널 대화 시간 버킷 수집 + 백그라운드 요약"""
+
+    def __init__(self, bot: commands.Bot, gemini_client):
+        self.bot = bot
+        self.summarizer = ChannelSummarizer(gemini_client)
+        self._buckets  = open_store(DIGEST_BUCKET_FILE, collection="buckets",
+                                    key_field="key", index_fields=("channel_id",))
+        self._coverage = open_store(DIGEST_COVERAGE_FILE, collection="channels",
+                                    key_field="channel_id")
+        # channel_id → {"start", "lines"} (진행 중인 버킷, 메모리에만 존재)
+        self._open: Dict[int, Dict] = {}
+        self._last_id: Dict[int, int] = {}
+        # 백필 중인 채널 → 그동안 도착한 실시간 메시지
+        self._backfilling: Dict[int, List[discord.Message]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        try:
+            self._buckets.load()
+            self._coverage.load()
+            log.info("digest.loaded", "✅ 채널 다이제스트 로드", buckets=len(self._buckets))
+        except Exception as e:
+            log.warning("digest.load_failed", "⚠️ 채널 다이제스트 로드 실패", error=str(e))
+
+    async def cog_load(self):
+        if not self.digest_loop.is_running():
+            self.digest_loop.start()
+
+    def cog_unload(self):
+        self.digest_loop.cancel()
+        for task in self._inflight.values():
+            task.cancel()
+        # 진행 중인 버킷은 버림 — 다음 시작 시 coverage.until 이후를 백필
+        self._buckets.close()
+        self._coverage.close()
+
+    # ------------------------------------------------------------------ #
+    #  수집
+    # ------------------------------------------------------------------ #
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        channel_id = message.channel.id
+        if channel_id not in DIGEST_CHANNELS:
+            return
+        if channel_id in self._backfilling:
+            self._backfilling[channel_id].append(message)
+            return
+        self._append(channel_id, message)
+
+    def _append(self, channel_id: int, message: discord.Message):
+        if message.id <= self._last_id.get(channel_id, 0):
+            return
+        self._last_id[channel_id] = message.id
+
+        line = format_message(message)
+        start = _bucket_start(message.created_at.timestamp())
+        bucket = self._open.get(channel_id)
+
+        if bucket is not None and start < bucket['start']:
+            # 마감 직후 도착한 이전 시간 메시지 → 저장된 버킷에 추가 후 재요약
+            if line:
+                self._append_closed(channel_id, start, [line])
+            return
+        if bucket is None or start > bucket['start']:
+            if bucket is not None:
+                self._close(channel_id, bucket)
+            bucket = self._open[channel_id] = {'start': start, 'lines': []}
+        if line:
+            bucket['lines'].append(line)
+
+    def _append_closed(self, channel_id: int, start: int, lines: List[str]):
+        key = f"{channel_id}:{start}"
+        record = self._buckets.get(key)
+        if record is None:
+            record = {'key': key, 'channel_id': channel_id, 'start': start,
+                      'count': 0, 'lines': [], 'summary': None}
+        elif record.get('summary') is not None:
+            # 요약 완료된 버킷: 기존 요약을 원문 앞에 두고 다시 요약
+            record['lines'] = [f"(이전 요약) {record['summary']}"]
+            record['summary'] = None
+        record['lines'].extend(lines)
+        record['count'] += len(lines)
+        self._buckets.put(record)
+
+    def _close(self, channel_id: int, bucket: Dict):
+        """진행 중인 버킷 마감 → 저장소 기록 + coverage.until 전진"""
+        if bucket['lines']:
+            self._append_closed(channel_id, bucket['start'], bucket['lines'])
+        self._advance(channel_id, bucket['start'] + BUCKET_SECONDS)
+
+    def _advance(self, channel_id: int, until: int):
+        coverage = self._coverage.get(channel_id)
+        if coverage is None:
+            self._coverage.put({'channel_id': channel_id, 'since': until, 'until': until})
+        elif until > coverage['until']:
+            coverage['until'] = until
+            self._coverage.put(coverage)
+
+    # ------------------------------------------------------------------ #
+    #  백필 (재시작 시 놓친 구간 복구)
+    # ------------------------------------------------------------------ #
+    async def _backfill(self, channel_id: int):
+        now = time.time()
+        earliest = _bucket_start(now - DIGEST_BACKFILL_HOURS * 3600)
+        coverage = self._coverage.get(channel_id)
+        if coverage is not None and coverage['until'] >= earliest:
+            start = coverage['until']
+        else:
+            start = earliest
+            coverage = {'channel_id': channel_id, 'since': earliest, 'until': earliest}
+            self._coverage.put(coverage)
+
+        self._backfilling[channel_id] = []
+        fetched = 0
+        try:
+            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+            after = datetime.fromtimestamp(start, tz=timezone.utc)
+            async for msg in channel.history(limit=None, after=after, oldest_first=True):
+                self._append(channel_id, msg)
+                fetched += 1
+            log.info("digest.backfilled", "✅ 다이제스트 백필 완료", channel_id=channel_id, messages=fetched)
+        except Exception as e:
+            # 백필 실패 시 다음 시간부터 연속 수집을 새로 시작
+            log.warning("digest.backfill_failed", "⚠️ 다이제스트 백필 실패", channel_id=channel_id, error=str(e))
+            next_hour = _bucket_start(now) + BUCKET_SECONDS
+            coverage = self._coverage.get(channel_id)
+            coverage['since'] = coverage['until'] = next_hour
+            self._coverage.put(coverage)
+        finally:
+            for msg in self._backfilling.pop(channel_id, []):
+                self._append(channel_id, msg)
+
+    # ------------------------------------------------------------------ #
+    #  백그라운드: 마감 / 정리 / 요약
+    # ------------------------------------------------------------------ #
+    @tasks.loop(seconds=DIGEST_TICK_SECONDS)
+    async def digest_loop(self):
+        now = time.time()
+        current = _bucket_start(now)
+        for channel_id in DIGEST_CHANNELS:
+            if channel_id in self._backfilling:
+                continue
+            bucket = self._open.get(channel_id)
+            if bucket is not None and bucket['start'] < current:
+                self._close(channel_id, bucket)
+                del self._open[channel_id]
+            self._advance(channel_id, current)
+
+        self._prune(now)
+
+        for channel_id in DIGEST_CHANNELS:
+            for record in self._buckets.find(channel_id=channel_id, order_by="start"):
+                if record.get('summary') is None:
+                    try:
+                        await self._bucket_summary(record)
+                    except Exception as e:
+                        log.warning("digest.summary_failed", "⚠️ 다이제스트 버킷 요약 실패", bucket=record['key'], error=str(e))
+
+    @digest_loop.before_loop
+    async def before_digest_loop(self):
+        await self.bot.wait_until_ready()
+        await asyncio.gather(*(self._backfill(cid) for cid in DIGEST_CHANNELS))
+
+    def _prune(self, now: float):
+        cutoff = _bucket_start(now - DIGEST_RETENTION_HOURS * 3600)
+        for channel_id in DIGEST_CHANNELS:
+            for record in self._buckets.find(channel_id=channel_id):
+                if record['start'] < cutoff:
+                    self._buckets.delete(record['key'])
+            coverage = self._coverage.get(channel_id)
+            if coverage is not None and coverage['since'] < cutoff:
+                coverage['since'] = cutoff
+                self._coverage.put(coverage)
+
+    async def _bucket_summary(self, record: Dict) -> str:
+        """버킷 요약 반환 (대기 중이면 요약 실행 — 같은 버킷 중복 요청은 하나로 합침)"""
+        if record.get('summary') is not None:
+            return record['summary']
+        key = record['key']
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(self._summarize_bucket(record))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _summarize_bucket(self, record: Dict) -> str:
+        bind_usage(channel_id=record['channel_id'])
+        lines = list(record['lines'])
+        summary, _ = await self.summarizer.summarize_texts(lines)
+        latest = self._buckets.get(record['key'])
+        # 요약 중 새 줄이 추가됐으면 저장하지 않고 다음 주기에 다시 요약
+        if latest is not None and latest['lines'] == lines:
+            latest['summary'] = summary
+            latest['lines'] = []
+            self._buckets.put(latest)
+        return summary
+
+    # ------------------------------------------------------------------ #
+    #  빠른 요약 (/summarize)
+    # ------------------------------------------------------------------ #
+    async def summarize_recent(self, channel_id: int, hours: int) -> Optional[Tuple[Optional[str], int]]:
+        """
+        최근 hours 시간 요약 → (요약문, 메시지 수). 대화가 없으면 (None, 0).
+        연속 수집 범위가 요청 구간을 덮지 못하면 None (호출 측에서 기존 방식 사용).
+        구간 시작은 시간 버킷 단위로 내림 처리됩니다.
+        """
+        if channel_id not in DIGEST_CHANNELS or channel_id in self._backfilling:
+            return None
+        if hours > DIGEST_RETENTION_HOURS:
+            return None
+        window_start = _bucket_start(time.time() - hours * 3600)
+        coverage = self._coverage.get(channel_id)
+        if coverage is None or coverage['since'] > window_start:
+            return None
+
+        records = [r for r in self._buckets.find(channel_id=channel_id, order_by="start")
+                   if r['start'] >= window_start]
+        summaries = await asyncio.gather(*(self._bucket_summary(r) for r in records))
+        parts = [(r['start'], s) for r, s in zip(records, summaries) if s]
+        count = sum(r['count'] for r in records)
+
+        bucket = self._open.get(channel_id)
+        if bucket is not None and bucket['lines']:
+            summary, n = await self.summarizer.summarize_texts(list(bucket['lines']))
+            parts.append((bucket['start'], summary))
+            count += n
+
+        if not parts:
+            return None, 0
+        if len(parts) == 1:
+            return parts[0][1], count
+        merged = await self.summarizer.merge_summaries(
+            [f"({_bucket_label(start)})\n{summary}" for start, summary in parts]
+        )
+        return merged, count
@@ -1,7 +1,60 @@
 """
-채팅 메시지 감지 및 응답 처리 Cog (v3.5 - 버그수정)
-
-[수정 내역]
+채팅 메시지 감지 및 응답 처리 Cog (v4.4 - 미디어 한도 차감 순서)
+
+[v4.4 수정 내역]
+- FIX: 미디어 메시지가 이미지 추출 전에 사용자 한도를 차감해, 분석할 이미지가 없어 응답하지 않아도
+  한도가 줄던 문제 → 이미지를 먼저 추출하고 있을 때만 차감
+
+[v4.3 수정 내역]
+- FIX: 추측 생성을 버릴 때 asyncio 래퍼만 취소되고 스레드의 Gemini 호출은 끝까지 실행되던 문제
+  → generate_response_async(client.aio)로 생성 — 취소하면 요청 자체가 끊김
+  · 그래도 이미 보낸 요청은 비용이 들 수 있어 SPECULATIVE_GENERATION 기본값은 꺼짐
+- FIX: 추측 생성을 시작할 때 사용자 한도를 차감 (available 확인만 하던 것 → try_acquire)
+  버려진 추측도 한도에 포함, 채택된 추측은 응답 시 다시 차감하지 않음
+- FIX: 추측 결과 채택 조건에 히스토리 스냅샷 비교 추가
+  (대기 중 /초기화 · 다른 채널 응답으로 히스토리가 바뀌었으면 버리고 다시 생성)
+
+[v4.2 수정 내역]
+- FEATURE: 사용자별 호출 한도 (utils/quota, 서버 역할별 설정)
+  · 답장 생성 전 응답 대상 사용자의 한도 확인 — 넘으면 채워질 때까지 대기, USER_QUOTA_MAX_WAIT 를 넘으면 안내 후 생략
+  · 한도 여유가 없는 사용자는 추측 생성도 시작하지 않음
+  · 응답 대상 사용자를 공정 대기열 요청자로 등록 (utils/rate_limiter) → 몰아 보내는 사용자 뒤로 다른 사람 답장이 밀리지 않음
+- FIX: 묶음 응답의 토큰 집계가 수집을 시작한 첫 메시지 작성자에게 귀속되던 문제 → 응답 대상(마지막 발화자) 기준
+
+[v4.1 수정 내역]
+- 수집 시 bind_usage(작성자, 채널) → 생성 호출의 토큰 사용량이 사용자 / 채널별로 집계 (utils/usage)
+
+[v4.0 수정 내역]
+- print() → utils/logger 구조화 로그 (백그라운드 스레드 출력)
+- 수집 묶음마다 상관 ID(cid) 발급 → 수집 / 생성 / 전송 / 봇 응답 리액션 로그가 같은 cid
+  (메시지 ID 도 cid 에 연결 → ReactionHandler 의 사용자 메시지 리액션 로그도 같은 cid)
+
+[v3.9 수정 내역]
+- FEATURE: utils/metrics 단계별 계측 (/metrics, Prometheus)
+  · chat:  collect(첫 메시지 ~ 생성 시작) / generate(추측 생성 잔여 대기 포함) / send / total
+  · media: extract / generate / send / total
+  · 생성 호출은 metrics.to_thread 로 스레드 풀 대기 시간도 따로 기록
+
+[v3.8 수정 내역]
+- BUG FIX: 분할 모드가 꺼져 있으면 응답을 그대로 전송 → 2000자를 넘으면 전송 실패
+  → 모든 전송을 utils/outbound 로 통일 (코드 블록/문단/문장 경계에서 자동 분할)
+  · 분할 모드의 각 조각도 한도를 넘으면 다시 분할, 조각 사이 간격은 기존과 동일
+  · 채널별 잠금 + 전송 간격 조절로 같은 채널의 다른 응답과 섞이지 않음
+
+[v3.7 수정 내역]
+- PERF: SPECULATIVE_GENERATION — MESSAGE_COLLECT_DELAY 동안 모델이 놀지 않도록
+  메시지가 도착하는 즉시 그때까지의 컨텍스트로 생성 시작
+  · 대기 시간 안에 메시지가 더 오면 이전 생성은 버리고 합쳐진 컨텍스트로 재시작
+    (SPECULATIVE_MAX_RESTARTS 초과 시 추측 중단 → 대기 종료 후 일반 생성)
+  · 대기 종료 시 컨텍스트가 같으면 추측 결과(또는 진행 중인 생성)를 그대로 사용
+  · 버려진 생성은 취소됨 (v4.3 부터 요청 자체를 끊음, 시작 시 차감한 사용자 한도는 그대로 소진)
+    → 결과는 히스토리에 반영 안 함
+
+[v3.6 수정 내역]
+- FEATURE: GeminiClient 가 GenerationResult 를 반환 → 실제 응답한 모델을 로그에 기록
+  (대체 체인으로 다른 모델이 응답한 경우 ↪️ 표시)
+
+[v3.5 수정 내역]
 - BUG FIX: pending_messages / collecting 이 Cog 전역 공유 → 채널별 독립 Dict로 분리
   (멀티유저 환경에서 A의 메시지가 B의 응답에 섞이던 경쟁조건 해소)
 - BUG FIX: generate_response / generate_response_with_image 가 동기 함수여서
@@ -12,13 +65,22 @@
 import discord
 from discord.ext import commands
 import asyncio
-import random
+import time
 from typing import List, Dict
 
 from config.settings import CHANNEL_BOT, MESSAGE_COLLECT_DELAY, MAX_HISTORY_LENGTH
 from config.settings import SPLIT_PARTS, SPLIT_MIN_DELAY, SPLIT_MAX_DELAY
+from config.settings import SPECULATIVE_GENERATION, SPECULATIVE_MAX_RESTARTS
 from utils.gemini_client import GeminiClient
 from utils.message_splitter import MessageSplitter
+from utils.rate_limiter import bind_requester, estimate_tokens
+from utils.quota import user_quotas, bind_quota, DEFAULT_POLICY, QUOTA_NOTICE
+from utils.usage import bind_usage
+from utils.logger import get_logger, bind_cid, link_message, new_cid
+from utils.metrics import metrics
+from utils.outbound import outbound
+
+log = get_logger(__name__)
 
 
 class ChatHandler(commands.Cog):
@@ -31,7 +93,11 @@ class ChatHandler(commands.Cog):
         self.split_mode = False
 
         # BUG FIX: 전역 pending_messages/collecting → 채널별 독립 상태 Dict
-        # key: channel_id  |  value: {'messages': [], 'collecting': bool, 'last_user_id': int}
+        # key: channel_id  |  value: {'messages': [], 'collecting': bool, 'last_user_id': int,
+        #                             'speculation': dict|None, 'spec_count': int,
+        #                             'first_at': float|None (수집 시작 perf_counter — 계측용),
+        #                             'cid': str|None (수집 묶음 상관 ID — 로그용),
+        #                             'last_policy': QuotaPolicy|None (마지막 발화자 한도)}
         self._channel_state: Dict[int, Dict] = {}
 
     # ------------------------------------------------------------------ #
@@ -43,6 +109,11 @@ class ChatHandler(commands.Cog):
                 'messages': [],
                 'collecting': False,
                 'last_user_id': None,
+                'speculation': None,
+                'spec_count': 0,
+                'first_at': None,
+                'cid': None,
+                'last_policy': None,
             }
         return self._channel_state[channel_id]
 
@@ -63,7 +134,7 @@ class ChatHandler(commands.Cog):
     def clear_user_history(self, user_id: int):
         if user_id in self.user_histories:
             self.user_histories[user_id] = []
-            print(f"🗑️ {user_id} 사용자의 대화 히스토리가 초기화되었습니다.")
+            log.info("chat.history_cleared", "🗑️ 사용자 대화 히스토리 초기화", user_id=user_id)
 
     # ------------------------------------------------------------------ #
     #  이미지/스티커 추출
@@ -80,9 +151,9 @@ class ChatHandler(commands.Cog):
                         "filename": attachment.filename,
                         "type": "attachment"
                     })
-                    print(f"📷 이미지 감지: {attachment.filename} ({attachment.content_type})")
+                    log.info("chat.image_detected", "📷 이미지 감지", filename=attachment.filename, content_type=attachment.content_type)
                 except Exception as e:
-                    print(f"❌ 이미지 다운로드 실패: {e}")
+                    log.error("chat.image_download_failed", "❌ 이미지 다운로드 실패", error=str(e))
 
         if message.stickers:
             for sticker in message.stickers:
@@ -99,9 +170,9 @@ class ChatHandler(commands.Cog):
                                     "filename": f"{sticker.name}.png",
                                     "type": "sticker"
                                 })
-                                print(f"🎭 스티커 감지: {sticker.name}")
+                                log.info("chat.sticker_detected", "🎭 스티커 감지", sticker=sticker.name)
                 except Exception as e:
-                    print(f"❌ 스티커 다운로드 실패: {e}")
+                    log.error("chat.sticker_download_failed", "❌ 스티커 다운로드 실패", error=str(e))
         return images
 
     def has_media(self, message: discord.Message) -> bool:
@@ -132,12 +203,23 @@ class ChatHandler(commands.Cog):
             return
 
         if self.has_media(message):
-            print("🖼️ 미디어 감지됨 - 즉시 분석 시작")
+            link_message(message.id, bind_cid())
+            bind_usage(user_id=message.author.id, channel_id=message.channel.id)
+            bind_quota(message.author)
+            log.info("chat.media_detected", "🖼️ 미디어 감지됨 - 즉시 분석 시작", user_id=message.author.id)
             await self.process_message_with_media(message)
             return
 
         # BUG FIX: 채널별 상태 사용
         state = self._get_channel_state(message.channel.id)
+        if not state['messages']:
+            state['first_at'] = time.perf_counter()
+            state['cid'] = new_cid()
+        bind_cid(state['cid'])
+        link_message(message.id, state['cid'])
+        # 추측 생성은 이 컨텍스트에서 시작 → 마지막 발화자(last_user_id) 기준으로 집계 / 대기열 등록
+        bind_usage(user_id=message.author.id, channel_id=message.channel.id)
+        state['last_policy'] = bind_quota(message.author)
         state['messages'].append({
             'content': message.content,
             'author': message.author.name,
@@ -145,6 +227,10 @@ class ChatHandler(commands.Cog):
             'timestamp': message.created_at,
         })
         state['last_user_id'] = message.author.id
+        log.debug("chat.collected", "📥 메시지 수집", user_id=message.author.id, batch=len(state['messages']))
+
+        if SPECULATIVE_GENERATION:
+            self._speculate(state)
 
         if state['collecting']:
             return
@@ -155,17 +241,76 @@ class ChatHandler(commands.Cog):
 
         await self.generate_and_send_response(message.channel, state['last_user_id'])
 
+    # ------------------------------------------------------------------ #
+    #  추측 생성
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _build_context(messages: List[Dict]) -> str:
+        return "\n".join(f"{msg['author']}: {msg['content']}" for msg in messages)
+
+    def _estimate_tokens(self, context: str, history: List[Dict]) -> int:
+        """사용자 한도 차감용 입력 토큰 추정 (시스템 프롬프트 포함)"""
+        history_chars = sum(len(part.get('text', '')) for item in history for part in item['parts'])
+        return estimate_tokens(self.gemini_client.system_prompt) + (len(context) + history_chars) // 2
+
+    def _speculate(self, state: Dict):
+        """현재까지 모인 메시지로 생성 시작 (이전 추측은 폐기)"""
+        previous = state['speculation']
+        if previous is not None:
+            previous['task'].cancel()
+            state['speculation'] = None
+        if state['spec_count'] > SPECULATIVE_MAX_RESTARTS:
+            return
+        state['spec_count'] += 1
+
+        context = self._build_context(state['messages'])
+        user_id = state['last_user_id']
+        history = list(self.get_user_history(user_id))
+        # 시작하는 순간 차감 — 버려져도 이미 보낸 요청일 수 있으므로 사용자 한도에 포함
+        if not user_quotas.try_acquire(user_id, self._estimate_tokens(context, history),
+                                       state['last_policy'] or DEFAULT_POLICY):
+            return
+        # client.aio 호출 → 버릴 때 cancel() 하면 요청도 함께 끊김
+        task = asyncio.create_task(self.gemini_client.generate_response_async(context, history))
+        # 폐기된 추측의 예외는 여기서 소비 (커밋된 추측은 await 하는 쪽에서 처리)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        state['speculation'] = {'context': context, 'user_id': user_id, 'history': history, 'task': task}
+
+    def _take_speculation(self, state: Dict, context: str, user_id: int, history: List[Dict]):
+        """컨텍스트 / 대상 / 히스토리가 모두 일치하는 추측 생성 태스크 반환 (없으면 None)"""
+        spec = state['speculation']
+        state['speculation'] = None
+        state['spec_count'] = 0
+        if spec is None:
+            return None
+        if (spec['context'] == context and spec['user_id'] == user_id and spec['history'] == history
+                and not spec['task'].cancelled()):
+            return spec['task']
+        spec['task'].cancel()
+        return None
+
     # ------------------------------------------------------------------ #
     #  미디어 메시지 처리
     # ------------------------------------------------------------------ #
     async def process_message_with_media(self, message: discord.Message):
         user_id = message.author.id
+        started = time.perf_counter()
+        policy  = bind_quota(message.author)
 
-        async with message.channel.typing():
+        # 분석할 이미지가 없으면 (이미지가 아닌 첨부 / 다운로드 실패) 한도를 차감하지 않음
+        with metrics.stage('media', 'extract'):
             images = await self.extract_images_from_message(message)
-            if not images:
-                return
+        if not images:
+            return
 
+        # 이미지는 토큰 추정에서 제외 (요청 수 한도로 제어)
+        tokens = self._estimate_tokens(message.content, self.get_user_history(user_id))
+        if not await user_quotas.acquire(user_id, tokens, policy):
+            if user_quotas.notice_due(user_id):
+                await outbound.send(message.channel, f"<@{user_id}> {QUOTA_NOTICE}")
+            return
+
+        async with message.channel.typing():
             first_image = images[0]
             user_text = message.content.strip()
 
@@ -193,25 +338,32 @@ class ChatHandler(commands.Cog):
 
             try:
                 # BUG FIX: blocking 동기 API → asyncio.to_thread() 비동기 래핑
-                response_text = await asyncio.to_thread(
-                    self.gemini_client.generate_response_with_image,
-                    prompt,
-                    first_image['data'],
-                    first_image['mime_type'],
-                    user_history[:-1]
-                )
+                with metrics.stage('media', 'generate'):
+                    result = await metrics.to_thread(
+                        'media',
+                        self.gemini_client.generate_response_with_image,
+                        prompt,
+                        first_image['data'],
+                        first_image['mime_type'],
+                        user_history[:-1]
+                    )
+                response_text = result.text
                 self.add_to_user_history(user_id, "model", response_text)
 
-                if self.split_mode:
-                    await self.send_split_message(message.channel, response_text)
-                else:
-                    await message.channel.send(response_text.replace('\\n', '\n'))
+                with metrics.stage('media', 'send'):
+                    if self.split_mode:
+                        await self.send_split_message(message.channel, response_text)
+                    else:
+                        await outbound.send(message.channel, response_text.replace('\\n', '\n'))
+                metrics.observe_stage('media', 'total', time.perf_counter() - started)
 
-                print(f"🖼️ {first_image['type']} 분석 완료: {first_image['filename']} (user: {user_id})")
+                log.info("chat.media_reply", f"🖼️ {first_image['type']} 분석 완료", filename=first_image['filename'],
+                         user_id=user_id, model=self._served_label(result))
 
             except Exception as e:
-                print(f"❌ 이미지 분석 중 오류: {e}")
-                await message.channel.send("앗, 이미지를 분석하는 중에 문제가 생겼네... 😅")
+                metrics.error('media', 'generate')
+                log.exception("chat.media_failed", "❌ 이미지 분석 중 오류", user_id=user_id)
+                await outbound.send(message.channel, "앗, 이미지를 분석하는 중에 문제가 생겼네... 😅")
 
     # ------------------------------------------------------------------ #
     #  텍스트 응답 생성
@@ -222,52 +374,76 @@ class ChatHandler(commands.Cog):
         if not state['messages']:
             return
 
-        context = "\n".join(
-            f"{msg['author']}: {msg['content']}"
-            for msg in state['messages']
-        )
+        context = self._build_context(state['messages'])
         state['messages'].clear()
-
+        first_at, state['first_at'] = state['first_at'], None
+        policy, state['last_policy'] = state['last_policy'] or DEFAULT_POLICY, None
+        if first_at is not None:
+            metrics.observe_stage('chat', 'collect', time.perf_counter() - first_at)
         user_history = self.get_user_history(user_id)
+        speculation = self._take_speculation(state, context, user_id, list(user_history))
+
+        # 이 태스크는 수집을 시작한 첫 메시지의 것 → 응답 대상 사용자로 다시 지정
+        bind_usage(user_id=user_id, channel_id=channel.id)
+        bind_requester(user_id, policy.weight)
+        # 채택한 추측은 시작할 때 이미 한도를 차감함
+        if speculation is None and not await user_quotas.acquire(
+                user_id, self._estimate_tokens(context, user_history), policy):
+            if user_quotas.notice_due(user_id):
+                await outbound.send(channel, f"<@{user_id}> {QUOTA_NOTICE}")
+            return
+
         self.add_to_user_history(user_id, "user", context)
 
         try:
             async with channel.typing():
-                # BUG FIX: blocking 동기 API → asyncio.to_thread() 비동기 래핑
-                response_text = await asyncio.to_thread(
-                    self.gemini_client.generate_response,
-                    context,
-                    user_history[:-1]
-                )
+                with metrics.stage('chat', 'generate'):
+                    if speculation is not None:
+                        # 대기 시간 동안 미리 시작한 생성 결과 사용
+                        result = await speculation
+                    else:
+                        # BUG FIX: blocking 동기 API → asyncio.to_thread() 비동기 래핑
+                        result = await metrics.to_thread(
+                            'chat',
+                            self.gemini_client.generate_response,
+                            context,
+                            user_history[:-1]
+                        )
+            response_text = result.text
             self.add_to_user_history(user_id, "model", response_text)
 
-            if self.split_mode:
-                await self.send_split_message(channel, response_text)
-            else:
-                sent_msg = await channel.send(response_text.replace('\\n', '\n'))
-                # 봇 응답에도 감정 리액션 추가 (ReactionHandler가 로드된 경우)
-                reaction_cog = self.bot.cogs.get('ReactionHandler')
-                if reaction_cog:
-                    asyncio.create_task(
-                        reaction_cog.react_to_bot_response(sent_msg)
-                    )
-
-            print(f"💬 {user_id} 사용자와 대화 (히스토리: {len(self.get_user_history(user_id))}개)")
+            with metrics.stage('chat', 'send'):
+                if self.split_mode:
+                    await self.send_split_message(channel, response_text)
+                else:
+                    sent = await outbound.send(channel, response_text.replace('\\n', '\n'))
+                    # 봇 응답에도 감정 리액션 추가 (ReactionHandler가 로드된 경우)
+                    reaction_cog = self.bot.cogs.get('ReactionHandler')
+                    if reaction_cog and sent:
+                        asyncio.create_task(
+                            reaction_cog.react_to_bot_response(sent[-1])
+                        )
+            if first_at is not None:
+                metrics.observe_stage('chat', 'total', time.perf_counter() - first_at)
+
+            log.info("chat.reply", "💬 응답 전송", user_id=user_id, history=len(self.get_user_history(user_id)),
+                     model=self._served_label(result), chars=len(response_text))
 
         except Exception as e:
-            print(f"❌ 응답 생성 중 오류: {e}")
-            await channel.send("앗, 뭔가 잘못됐네... 😅")
+            metrics.error('chat', 'generate')
+            log.exception("chat.reply_failed", "❌ 응답 생성 중 오류", user_id=user_id)
+            await outbound.send(channel, "앗, 뭔가 잘못됐네... 😅")
+
+    @staticmethod
+    def _served_label(result) -> str:
+        return f"↪️ {result.model}" if result.fallback else result.model
 
     # ------------------------------------------------------------------ #
     #  분할 전송
     # ------------------------------------------------------------------ #
     async def send_split_message(self, channel: discord.TextChannel, text: str):
         chunks = MessageSplitter.smart_split(text, SPLIT_PARTS)
-        for i, chunk in enumerate(chunks):
-            if chunk:
-                await channel.send(chunk)
-                if i < len(chunks) - 1:
-                    await asyncio.sleep(random.uniform(SPLIT_MIN_DELAY, SPLIT_MAX_DELAY))
+        await outbound.send_parts(channel, chunks, delay=(SPLIT_MIN_DELAY, SPLIT_MAX_DELAY))
 
     # ------------------------------------------------------------------ #
     #  공개 인터페이스
@@ -284,7 +460,7 @@ class ChatHandler(commands.Cog):
     def clear_history(self, user_id: int = None):
         if user_id is None:
             self.user_histories.clear()
-            print("🗑️ 모든 사용자의 대화 히스토리가 초기화되었습니다.")
+            log.info("chat.history_cleared", "🗑️ 모든 사용자의 대화 히스토리 초기화")
         else:
             self.clear_user_history(user_id)
 
@@ -303,4 +479,4 @@ async def setup(bot: commands.Bot):
     if not hasattr(bot, 'gemini_client'):
         raise RuntimeError("ChatHandler를 로드하기 전에 bot.gemini_client를 설정해야 합니다.")
     await bot.add_cog(ChatHandler(bot, bot.gemini_client))
-    print("✅ ChatHandler Cog 동적 로드 완료")
\ No newline at end of file
+    log.info("cog.loaded", "✅ ChatHandler Cog 동적 로드 완료", cog="ChatHandler")
\ No newline at end of file
@@ -16,6 +16,9 @@ from datetime import timedelta
 from config.settings import AVAILABLE_PROMPTS
 from utils.gemini_client import GeminiClient
 from utils.memo_manager import MemoManager
+from utils.logger import get_logger
+
+log = get_logger(__name__)
 
 
 class BotCommands(commands.Cog):
@@ -246,7 +249,7 @@ class BotCommands(commands.Cog):
             color=discord.Color.red()
         )
         await ctx.send(embed=embed)
-        print(f"⏹️ !down 명령어로 봇 종료 (요청자: {ctx.author.name})")
+        log.info("bot.shutdown", "⏹️ !down 명령어로 봇 종료", by=ctx.author.id)
         await self.bot.close()
 
 
@@ -259,4 +262,4 @@ async def setup(bot: commands.Bot):
     if not hasattr(bot, 'memo_manager'):
         raise RuntimeError("bot.memo_manager가 설정되지 않았습니다.")
     await bot.add_cog(BotCommands(bot, bot.gemini_client, bot.chat_handler, bot.memo_manager))
-    print("✅ BotCommands Cog 동적 로드 완료")
\ No newline at end of file
+    log.info("cog.loaded", "✅ BotCommands Cog 동적 로드 완료", cog="BotCommands")
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+계측 Cog (v1.2)
+
+utils/metrics.py 로 모은 단계별 소요 시간과 utils/usage.py 로 모은 토큰 사용량을 확인하는 창구입니다.
+
+[v1.2 변경]
+- cog_load 재호출 시 flush 루프 / HTTP 서버를 다시 시작하지 않음 (포트 중복 바인딩 방지)
+- 사용량 저장소도 이미 열려 있으면 다시 열지 않음 (저장된 합계 중복 합산 방지)
+
+[v1.1 변경]
+- FEATURE: /usage — 모델 / 기능 / 사용자 / 채널별 Gemini 토큰 · 추정 비용 · 평균 지연
+  합계는 USAGE_FILE 저장소에 USAGE_FLUSH_INTERVAL 마다 바뀐 항목만 기록 (재시작 후에도 이어서 집계)
+
+[동작]
+- 로드 시 이벤트 루프 지연 감시 시작 (LOOP_LAG_INTERVAL 주기)
+- METRICS_PORT 가 0 이 아니면 METRICS_HOST:METRICS_PORT/metrics 에 Prometheus 형식 노출
+- 언로드 시 감시 태스크 / HTTP 서버 정리
+
+[슬래시 커맨드]
+- /metrics [reset]  — 단계별 p50 / p95 / 최대 / 건수 요약 (관리자 전용, reset=True 면 요약 후 초기화)
+- /usage [by] [reset] — 토큰 사용량 상위 항목 (관리자 전용, by: model / feature / user / channel)
+
+[주요 단계]
+- chat:     collect(첫 메시지 ~ 생성 시작) / generate / send / total
+- media:    extract / generate / send / total
+- emotion:  api / total
+- weather:  current / forecast
+- schedule: lateness(예약 시각 대비 지각) / send
+- to_thread 대기: 스레드 풀이 밀려 실행이 늦어진 시간 (작업별)
+"""
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+from datetime import datetime
+
+from config.settings import METRICS_HOST, METRICS_PORT, LOOP_LAG_INTERVAL, USAGE_FILE, USAGE_FLUSH_INTERVAL
+from utils.metrics import (
+    metrics, LoopLagMonitor, MetricsServer, STAGE_SECONDS, THREAD_WAIT, LOOP_LAG, ERRORS_TOTAL
+)
+from utils.storage import open_store
+from utils.usage import usage, UNATTRIBUTED
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}ms" if seconds < 10 else f"{seconds:.1f}s"
+
+
+def _summary_line(label: str, hist) -> str:
+    return (f"`{label:<18}` p50 {_ms(hist.quantile(0.5))} · p95 {_ms(hist.quantile(0.95))} · "
+            f"max {_ms(hist.max)} · {hist.count}건")
+
+
+def _tokens(n: float) -> str:
+    return f"{n / 1_000_000:.2f}M" if n >= 1_000_000 else f"{n / 1000:.1f}K" if n >= 1000 else f"{n:.0f}"
+
+
+def _usage_line(label: str, totals: dict) -> str:
+    calls = max(1, totals['calls'])
+    return (f"{label} — {totals['calls']}회 · 입력 {_tokens(totals['prompt'])}"
+            f" (캐시 {_tokens(totals['cached'])}, 회당 {_tokens(totals['prompt'] / calls)})"
+            f" · 출력 {_tokens(totals['output'] + totals['thoughts'])}"
+            f" · ${totals['cost']:.4f} · 평균 {_ms(totals['seconds'] / calls)}")
+
+
+USAGE_LABELS = {
+    'model':   lambda key: f"`{key}`",
+    'feature': lambda key: f"`{key}`",
+    'user':    lambda key: "(미지정)" if key == UNATTRIBUTED else f"<@{key}>",
+    'channel': lambda key: "(미지정)" if key == UNATTRIBUTED else f"<#{key}>",
+}
+USAGE_TOP = 10
+
+
+class MetricsHandler(commands.Cog):
+    """이벤트 루프 지연 감시 + 계측 조회 Cog"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.monitor = LoopLagMonitor(metrics, LOOP_LAG_INTERVAL)
+        self.server = MetricsServer(metrics, METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+
+    async def cog_load(self):
+        self.monitor.start()
+        if not usage.is_open:
+            try:
+                usage.open(open_store(USAGE_FILE, collection="usage"))
+            except Exception as e:
+                log.warning("usage.load_failed", "⚠️ 토큰 사용량 로드 실패 (메모리에만 집계)", error=str(e))
+        if not self.flush_usage.is_running():
+            self.flush_usage.start()
+        if self.server is not None and not self.server.running:
+            try:
+                await self.server.start()
+                log.info("metrics.serving", f"📈 계측 노출: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+            except OSError as e:
+                log.warning("metrics.serve_failed", "⚠️ 계측 HTTP 서버 시작 실패 (/metrics 명령어만 사용)", error=str(e))
+                self.server = None
+
+    async def cog_unload(self):
+        self.flush_usage.cancel()
+        usage.close()
+        await self.monitor.stop()
+        if self.server is not None:
+            await self.server.stop()
+
+    @tasks.loop(seconds=USAGE_FLUSH_INTERVAL)
+    async def flush_usage(self):
+        usage.flush()
+
+    # ========== /metrics ==========
+
+    @app_commands.command(name="metrics", description="응답 단계별 소요 시간 / 이벤트 루프 지연 확인 (관리자 전용)")
+    @app_commands.describe(reset="요약을 보여준 뒤 수집값 초기화")
+    @app_commands.default_permissions(administrator=True)
+    async def show_metrics(self, interaction: discord.Interaction, reset: bool = False):
+        embed = discord.Embed(title="📈 계측 요약", color=discord.Color.blurple())
+
+        flows = {}
+        for _, labels, hist in metrics.histograms(STAGE_SECONDS):
+            flows.setdefault(labels['flow'], []).append(_summary_line(labels['stage'], hist))
+        for flow, lines in flows.items():
+            embed.add_field(name=f"⏱️ {flow}", value="\n".join(lines)[:1024], inline=False)
+
+        waits = [_summary_line(labels['task'], hist) for _, labels, hist in metrics.histograms(THREAD_WAIT)]
+        if waits:
+            embed.add_field(name="🧵 to_thread 대기", value="\n".join(waits)[:1024], inline=False)
+
+        lag = metrics.histograms(LOOP_LAG)
+        if lag:
+            embed.add_field(name="🔁 이벤트 루프 지연", value=_summary_line("loop", lag[0][2]), inline=False)
+
+        errors = [f"`{labels['flow']}/{labels['stage']}` {value:g}건" for name, labels, value in metrics.counters()
+                  if name == ERRORS_TOTAL]
+        if errors:
+            embed.add_field(name="❌ 오류", value="\n".join(errors)[:1024], inline=False)
+
+        if not embed.fields:
+            embed.description = "아직 수집된 값이 없습니다."
+        if self.server is not None:
+            embed.set_footer(text=f"Prometheus: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        if reset:
+            metrics.reset()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # ========== /usage ==========
+
+    @app_commands.command(name="usage", description="Gemini 토큰 사용량 / 추정 비용 확인 (관리자 전용)")
+    @app_commands.describe(by="집계 기준", reset="요약을 보여준 뒤 사용량 초기화")
+    @app_commands.choices(by=[
+        app_commands.Choice(name="모델", value="model"),
+        app_commands.Choice(name="기능", value="feature"),
+        app_commands.Choice(name="사용자", value="user"),
+        app_commands.Choice(name="채널", value="channel"),
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def show_usage(self, interaction: discord.Interaction, by: str = "model", reset: bool = False):
+        total = usage.grand_total()
+        since = datetime.fromtimestamp(usage.since).strftime('%Y-%m-%d %H:%M')
+        embed = discord.Embed(title="🪙 토큰 사용량", color=discord.Color.gold())
+        embed.description = f"{since} 이후 · " + _usage_line("전체", total)
+
+        rows = usage.totals(by)
+        label = USAGE_LABELS[by]
+        lines = [_usage_line(label(key), totals) for key, totals in rows[:USAGE_TOP]]
+        if len(rows) > USAGE_TOP:
+            lines.append(f"… 외 {len(rows) - USAGE_TOP}개")
+        if lines:
+            embed.add_field(name=f"📊 {by}별 (비용 순)", value="\n".join(lines)[:1024], inline=False)
+        if total['prompt']:
+            embed.set_footer(text=f"입력 비중 {total['prompt'] / max(1, total['prompt'] + total['output'] + total['thoughts']):.0%}"
+                                  " · 비용은 USAGE_PRICES 기준 추정치")
+        if reset:
+            usage.reset()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    """Cog 설정 함수 (동적 로드용)"""
+    await bot.add_cog(MetricsHandler(bot))
+    log.info("cog.loaded", "✅ MetricsHandler Cog 동적 로드 완료", cog="MetricsHandler")
@@ -1,13 +1,80 @@
 """
-멀티 페르소나 프롬프트 빌더 Cog (v1.1)
+멀티 페르소나 프롬프트 빌더 Cog (v1.9)
+
+[v1.9 변경]
+- BUG FIX: 자동 전달이 생성(await) 전에 읽은 세션 기준으로 start/append 해서, 그 사이 들어온
+  사용자 메시지 / 새 세션 시작을 덮어쓰던 문제
+  · 사용자별 asyncio.Lock 으로 메시지 처리(생성 → 기록 → 자동 전달)를 순서대로 실행
+  · 생성 후 세션을 다시 읽어 다른 세션으로 바뀌었으면 (/prompt 재시작) 기록하지 않고,
+    자동 전달이 꺼졌으면 다음 단계로 넘어가지 않음
+- FEATURE: 사용자가 직접 붙여넣은 결과 블록도 자동 전달에 사용
+  · 추출 단계에 [Extraction Result] 를 붙여넣으면 응답에 블록이 없어도 기법 적용 단계로 전달
+  · 기법 적용 단계를 직접 시작해 추출 결과를 붙여넣은 경우에도 전략 결과가 나오면 생성 단계로 전달
+    (붙여넣은 블록은 세션 artifacts 에 보관)
+
+[v1.8 변경]
+- BUG FIX: 자동 전달이 다음 단계 생성 전에 세션을 빈 히스토리로 옮겨, 생성이 실패하면
+  직전 단계 대화가 사라지고 사용자가 다음 단계에 남던 문제 → 생성 성공 후에만 단계 이동
+  (생성 도중 세션이 종료됐으면 다시 만들지 않음)
+
+[v1.7 변경]
+- print() → utils/logger 구조화 로그 (세션 메시지마다 상관 ID 발급 → 생성 / 전송 / 자동 전달 로그가 같은 cid)
+- 생성 응답의 토큰 사용량을 utils/usage 에 기록 (기능 'persona', 메시지 작성자 / 채널 기준)
+- 사용자별 호출 한도(utils/quota, 역할별 설정) 확인 후 생성 — 한도 초과 시 대기, 너무 길면 안내 후 생략
+  (공정 대기열 요청자로 등록 → 자동 전달 단계 호출도 같은 사용자 몫)
+
+[v1.6 변경]
+- BUG FIX: 긴 응답을 1900자 고정 위치로 잘라 단어/코드 블록 중간이 끊기던 문제
+  → utils/outbound 공용 전송기로 코드 블록/문단/문장 경계에서 분할 (모듈 이모지 접두어 유지)
+
+[v1.5 변경]
+- FEATURE: 단계 자동 전달 (PERSONA_AUTO_HANDOFF, 사용자별 `!persona auto on|off`)
+  · 요구사항 추출 응답에 [Extraction Result] 블록이 있으면 기법 적용 단계로 바로 전달
+  · 기법 적용 응답에 "🛠 선택된 프롬프트 전략" 블록이 있으면 추출 결과와 함께 생성 단계로 전달
+  · 이전 단계 응답 전송과 다음 단계 생성을 동시에 진행 (생성 단계는 전략 결과가 필요해 순차)
+
+[v1.4 변경]
+- FEATURE: PersonaSessionStore — 활성 모듈 + 대화 히스토리를 사용자별 레코드로 영속화
+  (open_store 저널/SQLite 백엔드 재사용 → 재시작 후에도 인터뷰 이어서 진행)
+  · PERSONA_SESSION_TTL_HOURS 동안 대화가 없으면 세션 종료 (10분마다 정리)
+  · PERSONA_MAX_SESSIONS 초과 시 가장 오래 쉰 세션부터 종료 (LRU)
+- REFACTOR: PersonaSession 은 모듈별 시스템 프롬프트 + 호출만 담당 (히스토리는 인자로 전달)
+
+[v1.3 변경]
+- PERF: 모듈마다 genai.Client 를 만들던 것을 공용 클라이언트 1개로 통합 (utils/genai_pool)
+
+[v1.2 변경]
+- FEATURE: PersonaSession 호출에 공용 속도 제한기(CHAT 우선순위) 적용
 """
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import asyncio
-from typing import Dict, List
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from google import genai
 from google.genai.types import GenerateContentConfig
-from config.settings import CHANNEL_PERSONA
+from config.settings import CHANNEL_PERSONA, RATE_LIMIT_CHAT_MAX_WAIT
+from config.settings import (
+    PERSONA_SESSION_FILE, PERSONA_SESSION_TTL_HOURS, PERSONA_MAX_SESSIONS, PERSONA_HISTORY_LIMIT,
+    PERSONA_AUTO_HANDOFF
+)
+from utils.storage import open_store
+from utils.genai_pool import get_genai_client
+from utils.rate_limiter import rate_limiter, Priority, estimate_tokens, prompt_tokens
+from utils.outbound import outbound
+from utils.usage import usage, bind_usage
+from utils.quota import user_quotas, bind_quota, QUOTA_NOTICE, QuotaPolicy
+from utils.logger import get_logger, bind_cid
+
+log = get_logger(__name__)
+
+PERSONA_MODEL = "gemini-2.5-flash"
+
+# 단계별 결과 블록 (각 시스템 프롬프트의 출력 형식 기준)
+EXTRACTION_BLOCK_RE = re.compile(r"###\s*\[Extraction Result\].*?(?=\n-{3,}|\Z)", re.DOTALL)
+STRATEGY_BLOCK_RE   = re.compile(r"###\s*🛠\s*선택된 프롬프트 전략.*?(?=\n-{2,}\s*\n\*\*\[Next Step\]|\n\*\*\[Next Step\]|\Z)", re.DOTALL)
 
 EXTRACTION_SYSTEM_PROMPT = '# Role: 전문 프롬프트 엔지니어링 인터뷰어 (Extraction Module)\n당신의 목적은 사용자가 만들고자 하는 프롬프트의 핵심 정보를 추출하여 \'구조화된 데이터\'로 정리하는 것입니다.\n사용자가 한마디만 던지더라도, 아래의 필수 요소들을 인터뷰 형식의 질문을 통해 모두 파악해야 합니다.\n사용자는 프롬프트와 인공지능을 잘 모르는 초보자임을 명심하십시오.\n\n## 1. 인터뷰 원칙\n- 한 번에 너무 많은 질문을 하지 마십시오. (한 번에 1~2개씩 질문하여 대화 흐름 유지)\n- 사용자의 답변이 모호하면 "예를 들어 주실 수 있나요?"와 같이 구체화를 유도하십시오.\n- 전문 용어보다는 직관적이고 쉬운 단어를 사용하여 질문하십시오.\n\n## 2. 추출해야 할 필수 정보 (Extract Items)\n- **목적(Goal):** 이 프롬프트를 통해 최종적으로 얻고자 하는 결과물은 무엇인가?\n- **대상(Audience):** 이 결과물을 읽거나 사용할 사람은 누구인가?\n- **핵심 정보(Context):** AI가 알아야 할 배경지식이나 데이터는 무엇인가?\n- **제약 사항(Constraints):** 반드시 지켜야 할 규칙이나 절대 하지 말아야 할 행동은?\n- **예시(Few-shot):** 사용자가 생각하는 \'가장 이상적인 결과물\'의 샘플이 있는가?\n\n## 3. 작업 순서\n1. 사용자에게 어떤 프롬프트를 만들고 싶은지 가볍게 묻습니다.\n2. 사용자의 답변에 따라 부족한 정보를 채우기 위한 인터뷰를 진행합니다.\n3. 모든 정보가 수집되면, 아래의 [최종 출력 형식]에 맞춰 내용을 정리하여 코드블록형태로 제공합니다.\n\n## 4. [최종 출력 형식]\n(모든 정보 수집 완료 후, 사용자가 다음 Gem으로 이동할 수 있도록 이 형식을 제공하십시오.)\n\n---\n### [Extraction Result]\n- **Goal:** (내용 입력)\n- **Target Audience:** (내용 입력)\n- **Context/Topic:** (내용 입력)\n- **Constraints:** (내용 입력)\n- **Reference/Example:** (내용 입력)\n---\n위 내용을 복사하여 \'2번 Technique 결정 Gem\'에 붙여넣어 주세요.'
 
@@ -29,12 +96,11 @@ MODULE_INFO = {
 
 
 class PersonaSession:
-    """메인 GeminiClient와 완전히 분리된 독립 Gemini 세션"""
-    def __init__(self, api_key: str, module: str, system_prompt: str):
-        self.client        = genai.Client(api_key=api_key)
+    """메인 GeminiClient와 완전히 분리된 모듈별 Gemini 세션 (상태 없음)"""
+    def __init__(self, client: genai.Client, module: str, system_prompt: str):
+        self.client        = client
         self.module        = module
         self.system_prompt = system_prompt
-        self.histories: Dict[int, List[dict]] = {}
 
     def _config(self) -> GenerateContentConfig:
         return GenerateContentConfig(
@@ -44,47 +110,157 @@ class PersonaSession:
             system_instruction=self.system_prompt
         )
 
-    def get_history(self, user_id: int) -> List[dict]:
-        return self.histories.setdefault(user_id, [])
+    def estimate_input_tokens(self, history: List[dict], text: str) -> int:
+        """시스템 프롬프트 + 히스토리 + text 입력 토큰 추정"""
+        return estimate_tokens(self.system_prompt) + (
+            sum(len(m["parts"][0]["text"]) for m in history) + len(text)
+        ) // 2
 
-    def clear_history(self, user_id: int):
-        self.histories[user_id] = []
-
-    def generate(self, user_id: int, text: str) -> str:
-        history  = self.get_history(user_id)
+    def generate(self, history: List[dict], text: str) -> str:
+        """history(이전 대화) + text 로 응답 생성 — history 는 수정하지 않음"""
         messages = history + [{"role": "user", "parts": [{"text": text}]}]
+        tokens   = self.estimate_input_tokens(history, text)
+        rate_limiter.acquire(PERSONA_MODEL, tokens, Priority.CHAT, timeout=RATE_LIMIT_CHAT_MAX_WAIT)
+        started  = time.monotonic()
         response = self.client.models.generate_content(
-            model="gemini-2.5-flash",
+            model=PERSONA_MODEL,
             contents=messages,
             config=self._config()
         )
-        reply = response.text
+        usage.record(PERSONA_MODEL, 'persona', response, time.monotonic() - started)
+        rate_limiter.settle(PERSONA_MODEL, tokens, prompt_tokens(response))
+        return response.text
+
+
+class PersonaSessionStore:
+    """
+    사용자별 페르소나 세션 (user_id 키) — 유휴 TTL + LRU 상한 + 디스크 영속화
+
+    레코드: {"user_id", "module", "history": [...], "last_active": epoch초,
+             "auto": 자동 전달 여부, "artifacts": {"extraction", "strategy"} 단계 결과 블록}
+    """
+
+    def __init__(self, filepath: str = PERSONA_SESSION_FILE,
+                 ttl_seconds: float = PERSONA_SESSION_TTL_HOURS * 3600,
+                 max_sessions: int = PERSONA_MAX_SESSIONS):
+        self.ttl_seconds  = ttl_seconds
+        self.max_sessions = max_sessions
+        self._store = open_store(filepath, collection="sessions", key_field="user_id")
+        # user_id → last_active (오래 쉰 순서, LRU)
+        self._lru: "OrderedDict[int, float]" = OrderedDict()
+        self.load()
+
+    def load(self):
+        try:
+            records = self._store.load()
+            for r in sorted(records, key=lambda r: r.get('last_active', 0)):
+                self._lru[r['user_id']] = r.get('last_active', 0)
+            log.info("persona.sessions_loaded", "✅ 페르소나 세션 로드", count=len(self._lru))
+        except Exception as e:
+            log.warning("persona.sessions_load_failed", "⚠️ 페르소나 세션 로드 실패", error=str(e))
+
+    def close(self):
+        self._store.close()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        return self._store.get(user_id) if user_id in self._lru else None
+
+    def _touch(self, record: Dict):
+        record['last_active'] = time.time()
+        self._lru[record['user_id']] = record['last_active']
+        self._lru.move_to_end(record['user_id'])
+        self._store.put(record)
+
+    def start(self, user_id: int, module: str, artifacts: Optional[Dict] = None) -> List[Dict]:
+        """새 세션 시작 (기존 세션 대체, 자동 전달 설정은 유지). 상한 초과로 종료된 세션 목록 반환"""
+        previous = self.get(user_id)
+        auto = previous.get('auto', PERSONA_AUTO_HANDOFF) if previous else PERSONA_AUTO_HANDOFF
+        self._touch({"user_id": user_id, "module": module, "history": [],
+                     "auto": auto, "artifacts": artifacts or {}})
+        evicted = []
+        while len(self._lru) > self.max_sessions:
+            oldest = next(iter(self._lru))
+            evicted.append(self.end(oldest))
+        return [r for r in evicted if r is not None]
+
+    def append(self, user_id: int, text: str, reply: str, artifacts: Optional[Dict] = None):
+        """한 턴 기록 (세션이 그 사이 종료됐으면 무시). artifacts 를 주면 단계 결과 블록도 갱신"""
+        record = self.get(user_id)
+        if record is None:
+            return
+        if artifacts is not None:
+            record['artifacts'] = artifacts
+        history = record['history']
         history.append({"role": "user",  "parts": [{"text": text}]})
         history.append({"role": "model", "parts": [{"text": reply}]})
-        if len(history) > 80:
-            self.histories[user_id] = history[-80:]
-        return reply
+        if len(history) > PERSONA_HISTORY_LIMIT:
+            record['history'] = history[-PERSONA_HISTORY_LIMIT:]
+        self._touch(record)
+
+    def set_auto(self, user_id: int, enabled: bool) -> bool:
+        """자동 전달 설정 변경 (세션이 없으면 False)"""
+        record = self.get(user_id)
+        if record is None:
+            return False
+        record['auto'] = enabled
+        self._store.put(record)
+        return True
+
+    def end(self, user_id: int) -> Optional[Dict]:
+        self._lru.pop(user_id, None)
+        return self._store.delete(user_id)
+
+    def evict_idle(self, now: Optional[float] = None) -> List[Dict]:
+        """TTL 동안 활동 없는 세션 종료 후 반환"""
+        cutoff = (now or time.time()) - self.ttl_seconds
+        expired = []
+        for user_id, last_active in self._lru.items():
+            if last_active >= cutoff:
+                break
+            expired.append(user_id)
+        return [r for r in (self.end(u) for u in expired) if r is not None]
 
 
 class PersonaHandler(commands.Cog):
     """멀티 페르소나 프롬프트 빌더 Cog"""
 
-    def __init__(self, bot: commands.Bot, api_key: str):
+    def __init__(self, bot: commands.Bot, api_key: str, client: Optional[genai.Client] = None):
         self.bot = bot
+        client = client or get_genai_client(api_key)
         self.sessions: Dict[str, PersonaSession] = {
-            "extraction": PersonaSession(api_key, "extraction", EXTRACTION_SYSTEM_PROMPT),
-            "technique":  PersonaSession(api_key, "technique",  TECHNIQUE_SYSTEM_PROMPT),
-            "generator":  PersonaSession(api_key, "generator",  GENERATOR_SYSTEM_PROMPT),
+            "extraction": PersonaSession(client, "extraction", EXTRACTION_SYSTEM_PROMPT),
+            "technique":  PersonaSession(client, "technique",  TECHNIQUE_SYSTEM_PROMPT),
+            "generator":  PersonaSession(client, "generator",  GENERATOR_SYSTEM_PROMPT),
         }
-        self._active: Dict[int, str] = {}
+        self.store = PersonaSessionStore()
+        # user_id → 메시지 처리 잠금 (생성 → 기록 → 자동 전달을 사용자별로 순서대로)
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    async def cog_load(self):
+        if not self.evict_idle_sessions.is_running():
+            self.evict_idle_sessions.start()
+
+    def cog_unload(self):
+        self.evict_idle_sessions.cancel()
+        self.store.close()
+
+    @tasks.loop(minutes=10)
+    async def evict_idle_sessions(self):
+        for record in self.store.evict_idle():
+            log.info("persona.session_expired", "⏹️ 페르소나 세션 만료", user_id=record['user_id'], module=record['module'])
+        for user_id in [u for u, lock in self._locks.items() if not lock.locked() and self.store.get(u) is None]:
+            del self._locks[user_id]
 
     async def start_session(self, interaction: discord.Interaction, module: str):
         user_id     = interaction.user.id
         name, color = MODULE_INFO[module]
         emoji       = name.split()[0]
 
-        self.sessions[module].clear_history(user_id)
-        self._active[user_id] = module
+        for record in self.store.start(user_id, module):
+            log.info("persona.session_evicted", "⏹️ 페르소나 세션 정리 (상한 초과)", user_id=record['user_id'], module=record['module'])
 
         channel = self.bot.get_channel(CHANNEL_PERSONA)
         if channel is None:
@@ -109,7 +285,7 @@ class PersonaHandler(commands.Cog):
         )
         embed.set_footer(text="이 세션은 메인 봇 대화와 완전히 분리됩니다.")
         await channel.send(embed=embed)
-        await channel.send(f"{emoji} {SESSION_GREETING[module]}")
+        await outbound.send(channel, SESSION_GREETING[module], prefix=f"{emoji} ")
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -121,9 +297,21 @@ class PersonaHandler(commands.Cog):
             return
 
         user_id = message.author.id
-        module  = self._active.get(user_id)
+        bind_cid()
+        bind_usage(user_id=user_id, channel_id=message.channel.id)
+        policy = bind_quota(message.author)
+
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        async with lock:
+            await self._handle_message(message, policy)
+
+    async def _handle_message(self, message: discord.Message, policy: QuotaPolicy):
+        user_id = message.author.id
+        record  = self.store.get(user_id)
 
-        if module is None:
+        if record is None:
             await message.channel.send(
                 f"<@{user_id}> `/prompt` 명령어에서 버튼을 눌러 세션을 먼저 시작해 주세요.\n"
                 f"📋 요구사항 추출 → 🛠 기법 적용 → ✨ 프롬프트 생성 순서로 진행하시면 됩니다.",
@@ -131,32 +319,118 @@ class PersonaHandler(commands.Cog):
             )
             return
 
+        module  = record['module']
         session = self.sessions[module]
-        emoji   = MODULE_INFO[module][0].split()[0]
+
+        history = list(record['history'])
+        if not await user_quotas.acquire(user_id, session.estimate_input_tokens(history, message.content), policy):
+            if user_quotas.notice_due(user_id):
+                await outbound.send(message.channel, f"<@{user_id}> {QUOTA_NOTICE}")
+            return
 
         async with message.channel.typing():
+            sending = None
             try:
-                reply = await asyncio.to_thread(session.generate, user_id, message.content)
-                if len(reply) > 1900:
-                    for i in range(0, len(reply), 1900):
-                        await message.channel.send(f"{emoji} {reply[i:i+1900]}")
-                else:
-                    await message.channel.send(f"{emoji} {reply}")
+                reply = await asyncio.to_thread(session.generate, history, message.content)
+                # 생성하는 동안 세션이 끝났거나 새로 시작됐으면 (!persona stop / /prompt) 응답만 보내고 기록 안 함
+                current = self.store.get(user_id)
+                artifacts = self._collect_pasted(message.content, dict(record.get('artifacts') or {}))
+                if current is record:
+                    self.store.append(user_id, message.content, reply, artifacts=artifacts)
+                sending = asyncio.create_task(self._send_reply(message.channel, module, reply))
+                if current is record and current.get('auto', PERSONA_AUTO_HANDOFF):
+                    sending = await self._auto_handoff(
+                        message.channel, user_id, module, message.content, reply, dict(artifacts), sending
+                    )
+                await sending
             except Exception as e:
-                print(f"❌ PersonaSession 오류: {e}")
-                await message.channel.send("⚠️ 응답 생성 중 오류가 발생했습니다. 잠시 후 다시 시도해 주세요.")
+                log.exception("persona.reply_failed", "❌ PersonaSession 오류", user_id=user_id, module=module)
+                if sending is not None and not sending.done():
+                    await sending
+                await outbound.send(message.channel, "⚠️ 응답 생성 중 오류가 발생했습니다. 잠시 후 다시 시도해 주세요.")
+
+    async def _send_reply(self, channel: discord.abc.Messageable, module: str, reply: str,
+                          header: Optional[str] = None):
+        emoji = MODULE_INFO[module][0].split()[0]
+        await outbound.send(channel, reply, prefix=f"{emoji} ", header=header)
+
+    # ------------------------------------------------------------------ #
+    #  단계 자동 전달
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _collect_pasted(text: str, artifacts: Dict) -> Dict:
+        """사용자가 붙여넣은 이전 단계 결과 블록을 artifacts 에 보관 (단계를 직접 시작한 경우)"""
+        for name, pattern in (("extraction", EXTRACTION_BLOCK_RE), ("strategy", STRATEGY_BLOCK_RE)):
+            match = pattern.search(text)
+            if match:
+                artifacts[name] = match.group(0).strip()
+        return artifacts
+
+    @staticmethod
+    def _next_stage(module: str, text: str, reply: str, artifacts: Dict) -> Optional[tuple]:
+        """응답(없으면 사용자 입력)에서 결과 블록을 찾으면 (다음 모듈, 입력 텍스트) 반환, 없으면 None"""
+        if module == "extraction":
+            match = EXTRACTION_BLOCK_RE.search(reply) or EXTRACTION_BLOCK_RE.search(text)
+            if match:
+                artifacts['extraction'] = match.group(0).strip()
+                return "technique", artifacts['extraction']
+        elif module == "technique":
+            match = STRATEGY_BLOCK_RE.search(reply) or STRATEGY_BLOCK_RE.search(text)
+            if match and artifacts.get('extraction'):
+                artifacts['strategy'] = match.group(0).strip()
+                return "generator", f"{artifacts['extraction']}\n\n{artifacts['strategy']}"
+        return None
+
+    async def _auto_handoff(self, channel: discord.abc.Messageable, user_id: int, module: str,
+                            text: str, reply: str, artifacts: Dict, sending: asyncio.Task) -> asyncio.Task:
+        """
+        결과 블록이 나오는 동안 다음 단계를 연달아 실행.
+        직전 단계 응답 전송(sending)과 다음 단계 생성은 동시에 진행되며,
+        마지막 전송 태스크를 반환합니다. (호출 측이 사용자별 잠금을 잡고 실행)
+        """
+        while True:
+            stage = self._next_stage(module, text, reply, artifacts)
+            if stage is None:
+                return sending
+            module, text = stage
+            before = self.store.get(user_id)
+            # 생성이 성공한 뒤에만 다음 단계로 이동 — 실패하면 (예외 전파) 직전 단계 세션 / 히스토리 유지
+            reply = await asyncio.to_thread(self.sessions[module].generate, [], text)
+            current = self.store.get(user_id)
+            if current is None or current is not before or not current.get('auto', PERSONA_AUTO_HANDOFF):
+                # 생성하는 동안 세션이 끝났거나 (!persona stop / 만료) 새로 시작됐거나 자동 전달이 꺼졌으면
+                # 그 세션을 덮어쓰지 않음
+                log.info("persona.handoff_aborted", "⏹️ 세션이 바뀌어 자동 전달 중단", user_id=user_id, module=module)
+                return sending
+            self.store.start(user_id, module, artifacts=dict(artifacts))
+            self.store.append(user_id, text, reply)
+
+            await sending
+            name = MODULE_INFO[module][0]
+            sending = asyncio.create_task(self._send_reply(
+                channel, module, reply,
+                header=f"➡️ 결과를 감지해 **{name}** 단계로 자동 전달했습니다. (`!persona auto off` 로 끄기)"
+            ))
 
     @commands.command(name="persona")
-    async def persona_cmd(self, ctx: commands.Context, action: str = "stop"):
+    async def persona_cmd(self, ctx: commands.Context, action: str = "stop", value: str = None):
+        user_id = ctx.author.id
+        if action == "auto":
+            record = self.store.get(user_id)
+            if record is None:
+                await ctx.send("현재 활성 페르소나 세션이 없습니다.", delete_after=5)
+                return
+            enabled = (value == "on") if value in ("on", "off") else not record.get('auto', PERSONA_AUTO_HANDOFF)
+            self.store.set_auto(user_id, enabled)
+            await ctx.send(f"🔁 단계 자동 전달: {'🟢 켜짐' if enabled else '🔴 꺼짐'}", delete_after=10)
+            return
         if action != "stop":
             return
-        user_id = ctx.author.id
-        module  = self._active.pop(user_id, None)
-        if module is None:
+        record  = self.store.end(user_id)
+        if record is None:
             await ctx.send("현재 활성 페르소나 세션이 없습니다.", delete_after=5)
             return
-        self.sessions[module].clear_history(user_id)
-        name, color = MODULE_INFO[module]
+        name, color = MODULE_INFO[record['module']]
         embed = discord.Embed(
             title=f"⏹️ {name} 세션 종료",
             description=f"<@{user_id}> 님의 **{name}** 세션이 종료되고 히스토리가 초기화되었습니다.",
@@ -169,4 +443,4 @@ async def setup(bot: commands.Bot):
     if not hasattr(bot, "google_api_key"):
         raise RuntimeError("bot.google_api_key가 설정되지 않았습니다.")
     await bot.add_cog(PersonaHandler(bot, bot.google_api_key))
-    print("✅ PersonaHandler Cog 동적 로드 완료")
\ No newline at end of file
+    log.info("cog.loaded", "✅ PersonaHandler Cog 동적 로드 완료", cog="PersonaHandler")
\ No newline at end of file
@@ -1,5 +1,5 @@
 """
-감정 리액션 Cog (v1.0)
+감정 리액션 Cog (v1.3)
 
 메시지 수신 시 감정을 분석해 이모지 리액션을 자동으로 추가합니다.
 
@@ -11,6 +11,16 @@
 - 독립 실행: ChatHandler와 별도 on_message 리스너로 충돌 없음
 - 실패 시: 조용히 스킵 (봇 대화 흐름 블로킹 금지)
 
+[v1.1 변경]
+- 감정 분석 호출을 metrics.to_thread('emotion') 로 실행 → 스레드 풀 대기 시간 계측
+
+[v1.2 변경]
+- print() → utils/logger 구조화 로그 (리액션 로그는 LOG_SAMPLE_RATES 로 일부만 기록)
+- 사용자 메시지 리액션은 ChatHandler 가 연결해 둔 수집 묶음 cid 를 이어받음
+
+[v1.3 변경]
+- 감정 분석 토큰 사용량을 메시지 작성자 / 채널 기준으로 집계 (utils/usage)
+
 [슬래시 커맨드]
 - /reaction on   : 리액션 기능 켜기
 - /reaction off  : 리액션 기능 끄기
@@ -19,12 +29,16 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import asyncio
 import time
 from typing import Dict
 
 from config.settings import CHANNEL_BOT
 from utils.emotion_analyzer import EmotionAnalyzer
+from utils.usage import bind_usage
+from utils.logger import get_logger, bind_cid, cid_for_message
+from utils.metrics import metrics
+
+log = get_logger(__name__)
 
 
 class ReactionHandler(commands.Cog):
@@ -55,7 +69,7 @@ class ReactionHandler(commands.Cog):
             try:
                 await message.add_reaction(emoji)
             except discord.HTTPException as e:
-                print(f"⚠️ 리액션 추가 실패 ({emoji}): {e}")
+                log.warning("reaction.add_failed", "⚠️ 리액션 추가 실패", emoji=emoji, error=str(e))
 
     # ------------------------------------------------------------------ #
     #  사용자 메시지 리액션
@@ -74,6 +88,8 @@ class ReactionHandler(commands.Cog):
             return
 
         user_id = message.author.id
+        bind_cid(cid_for_message(message.id))
+        bind_usage(user_id=user_id, channel_id=message.channel.id)
 
         # 쿨다운 체크
         if self._is_cooldown(user_id):
@@ -81,11 +97,11 @@ class ReactionHandler(commands.Cog):
         self._update_cooldown(user_id)
 
         # 비동기 감정 분석 (메인 흐름 블로킹 방지)
-        emojis = await asyncio.to_thread(self.analyzer.analyze, message.content)
+        emojis = await metrics.to_thread('emotion', self.analyzer.analyze, message.content)
 
         if emojis:
             await self._add_reactions(message, emojis)
-            print(f"😊 리액션 추가: {emojis} → {message.author.name}: {message.content[:30]}")
+            log.info("reaction.added", "😊 리액션 추가", emojis=emojis, user_id=user_id, text=message.content[:30])
 
     # ------------------------------------------------------------------ #
     #  봇 응답 메시지 리액션
@@ -100,11 +116,11 @@ class ReactionHandler(commands.Cog):
         if not message.content:
             return
 
-        emojis = await asyncio.to_thread(self.analyzer.analyze, message.content)
+        emojis = await metrics.to_thread('emotion', self.analyzer.analyze, message.content)
 
         if emojis:
             await self._add_reactions(message, emojis)
-            print(f"🤖 봇 응답 리액션: {emojis} → {message.content[:30]}")
+            log.info("reaction.bot_reply", "🤖 봇 응답 리액션", emojis=emojis, text=message.content[:30])
 
     # ------------------------------------------------------------------ #
     #  슬래시 커맨드
@@ -121,7 +137,7 @@ class ReactionHandler(commands.Cog):
             "😊 감정 리액션 기능이 **켜졌습니다**!\n메시지 감정을 분석해 이모지 리액션을 자동으로 추가합니다.",
             ephemeral=True
         )
-        print("✅ 감정 리액션 ON")
+        log.info("reaction.toggled", "✅ 감정 리액션 ON", enabled=True, by=interaction.user.id)
 
     @reaction_group.command(name="off", description="감정 리액션 기능 끄기")
     async def reaction_off(self, interaction: discord.Interaction):
@@ -130,7 +146,7 @@ class ReactionHandler(commands.Cog):
             "😶 감정 리액션 기능이 **꺼졌습니다**.",
             ephemeral=True
         )
-        print("⏹️ 감정 리액션 OFF")
+        log.info("reaction.toggled", "⏹️ 감정 리액션 OFF", enabled=False, by=interaction.user.id)
 
     @reaction_group.command(name="status", description="감정 리액션 현재 상태 확인")
     async def reaction_status(self, interaction: discord.Interaction):
@@ -157,4 +173,4 @@ async def setup(bot: commands.Bot):
     if not hasattr(bot, 'emotion_analyzer'):
         raise RuntimeError("bot.emotion_analyzer가 설정되지 않았습니다.")
     await bot.add_cog(ReactionHandler(bot, bot.emotion_analyzer))
-    print("✅ ReactionHandler Cog 동적 로드 완료")
\ No newline at end of file
+    log.info("cog.loaded", "✅ ReactionHandler Cog 동적 로드 완료", cog="ReactionHandler")
\ No newline at end of file
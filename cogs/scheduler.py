@@ -1,10 +1,36 @@
 """
-스케줄러 Cog (v1.0)
+스케줄러 Cog (v1.10 - 전송 중 삭제된 예약 부활 방지)
 
 예약 메시지 기능을 제공합니다.
 
+[수정 내역]
+- PERF: 1분 주기 polling(tasks.loop) + 매 tick 전체 fromisoformat 재파싱 제거
+  → 파싱된 due 시각의 min-heap을 유지하고, 다음 예약 시각까지 정확히 sleep.
+  → /schedule add 로 더 이른 예약이 들어오면 즉시 깨어나 대기 시간 재계산.
+  → 예약 수와 무관하게 O(log n) 삽입 / 1초 미만 전송 오차.
+- FEATURE: 반복 예약 실제 동작 (utils/recurrence.py)
+  이전: repeats=True 예약은 최초 1회만 전송되고 파일에 영구 잔류
+  수정: 전송 직후 다음 발생 시각을 계산해 time 갱신 → heap에는 항상 다음 1건만 존재
+        COUNT/UNTIL 종료 조건 도달 시 자동 삭제
+- FEATURE: 봇 재시작 시 놓친 예약 보정 (SCHEDULE_MISSED_POLICY)
+  이전: 다운타임 중 1분 창을 놓친 예약은 전송도 삭제도 되지 않고 영구 잔류
+  수정: 시작 시 오프라인 동안 도래한 예약을 한 번에 수집 → 정책(send/coalesce/drop) 적용
+        일회성 삭제 + 반복 예약 다음 시각 갱신을 save() 1회로 일괄 반영
+- PERF: 변경마다 전체 파일 재작성(save) → JournalStore append-only 저널로 교체
+  (O(1) 기록, 백그라운드 fsync, 스냅샷 원자적 교체 — utils/journal_store.py)
+- PERF: user_id/channel_id/time 인덱스 기반 조회 (STORAGE_BACKEND='sqlite' 선택 가능)
+  /schedule list, delete 가 전체 목록 선형 탐색 없이 동작
+- BUG FIX: 놓친 예약 묶음 안내가 2000자에서 잘려 뒤쪽 예약이 누락되던 문제
+  → utils/outbound 공용 전송기로 줄 경계에서 나눠 모두 전송 (예약 메시지 전송도 동일)
+- FEATURE: utils/metrics 계측 — schedule/lateness (예약 시각 대비 실제 전송 시작 지각), schedule/send
+- print() → utils/logger 구조화 로그 (예약 전송마다 schedule-<ID> 상관 ID)
+- FIX: cog_load 가 다시 호출돼도 디스패처 태스크는 1개만 (실행 중이면 새로 만들지 않음)
+- BUG FIX: 전송(outbound 간격 조절로 수 초 대기) 도중 /schedule delete 된 반복 예약이
+  전송 후 reschedule 로 다시 저장되던 문제, 꺼낸 뒤 삭제된 예약이 그대로 전송되던 문제
+  → 전송 직전과 재등록 직전에 저장소의 현재 레코드를 다시 읽고, 없으면 건너뜀
+
 [기능]
-- /schedule add <시간> <메시지>  — 지정 시간에 메시지 자동 전송
+- /schedule add <시간> <메시지> [반복]  — 지정 시간에 메시지 자동 전송
 - /schedule list                — 등록된 예약 목록 확인
 - /schedule delete <ID>         — 예약 삭제
 
@@ -12,156 +38,396 @@
 - YYYY-MM-DD HH:MM  (예: 2026-02-20 09:00)
 - HH:MM             (예: 07:00 — 오늘 또는 내일)
 
+[반복 형식]
+- daily / weekly / weekdays / weekends / hourly / monthly (매일/매주/평일/주말/매시간/매월)
+- FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10  (RRULE 부분집합)
+- cron 0 9 * * 1-5                  (분 시 일 월 요일)
+
 [저장 구조]
-data/schedules.json:
+data/schedules.json (스냅샷, 최근 변경은 data/schedules.json.journal):
 {
   "schedules": [
     {
       "id": 1,
       "channel_id": 1234567890,
       "user_id": 9876543210,
-      "time": "2026-02-20T09:00:00",
+      "time": "2026-02-20T09:00:00",      # 다음 전송 시각
       "message": "좋은 아침!",
       "created_at": "2026-02-19T14:30:00",
-      "repeats": false
+      "repeats": "FREQ=DAILY",             # 일회성이면 false
+      "start": "2026-02-20T09:00:00",      # 반복 기준 시각
+      "fired": 0                           # 반복 전송 횟수 (COUNT 판정용)
     }
   ]
 }
 """
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-import json
-import os
+from typing import List, Dict, Optional, Tuple
+import asyncio
+import heapq
+import time
+
+from config.settings import (
+    SCHEDULE_MISSED_POLICY, SCHEDULE_MISSED_GRACE_SECONDS, SCHEDULE_MISSED_MAX_PER_ITEM
+)
+from utils.logger import get_logger, cid_scope
+from utils.metrics import metrics
+from utils.storage import open_store
+from utils.recurrence import Rule, parse_recurrence
+from utils.outbound import outbound
+
+log = get_logger(__name__)
 
 SCHEDULE_FILE = "data/schedules.json"
 
 
 class ScheduleManager:
-    """예약 메시지 관리 클래스 (JSON 기반 영속화)"""
+    """예약 메시지 관리 클래스 (JournalStore/SQLiteStore 기반 영속화)"""
 
     def __init__(self, filepath: str = SCHEDULE_FILE):
         self.filepath = filepath
-        self.schedules: List[Dict] = []
+        self._store = open_store(filepath, collection="schedules", key_field="id",
+                                 index_fields=("user_id", "channel_id", "time"))
+        self._last_id = 0
+        # (due timestamp, id) min-heap — 삭제/변경된 항목은 pop 시점에 지연 제거
+        self._heap: List[Tuple[float, int]] = []
+        self._due: Dict[int, float] = {}
+        self._rules: Dict[int, Rule] = {}
         self.load()
 
-    def load(self):
-        """파일에서 예약 목록 로드"""
-        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-        if os.path.exists(self.filepath):
-            try:
-                with open(self.filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.schedules = data.get("schedules", [])
-                print(f"✅ 스케줄 로드 완료: {len(self.schedules)}개")
-            except Exception as e:
-                print(f"⚠️ 스케줄 파일 로드 실패: {e}")
-                self.schedules = []
-        else:
-            self.schedules = []
+    @property
+    def schedules(self) -> List[Dict]:
+        return self._store.all()
 
-    def save(self):
-        """파일에 예약 목록 저장"""
+    def load(self):
+        """파일(스냅샷 + 저널)에서 예약 목록 로드"""
         try:
-            with open(self.filepath, 'w', encoding='utf-8') as f:
-                json.dump({"schedules": self.schedules}, f, ensure_ascii=False, indent=2)
+            self._store.load()
+            log.info("schedule.loaded", "✅ 스케줄 로드 완료", count=len(self._store))
         except Exception as e:
-            print(f"❌ 스케줄 저장 실패: {e}")
+            log.warning("schedule.load_failed", "⚠️ 스케줄 파일 로드 실패", error=str(e))
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        """반복 규칙 및 due heap 재구성 (로드 시 1회만 파싱)"""
+        self._rules = {}
+        for s in self.schedules:
+            if s.get('repeats') is True:
+                s['repeats'] = 'FREQ=DAILY'   # v1.1 이하 bool 데이터 호환
+                self._store.put(s)
+            if s.get('repeats'):
+                try:
+                    self._rules[s['id']] = parse_recurrence(s['repeats'])
+                except ValueError as e:
+                    log.warning("schedule.bad_rule", "⚠️ 반복 규칙 해석 실패 (일회성으로 처리)", schedule_id=s['id'], error=str(e))
+                    s['repeats'] = False
+                    self._store.put(s)
+        self._last_id = max(self._store.keys(), default=0)
+        self._due = {s['id']: datetime.fromisoformat(s['time']).timestamp() for s in self.schedules}
+        self._heap = [(ts, sid) for sid, ts in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def _push(self, schedule: Dict):
+        """예약을 heap에 등록 (같은 id의 이전 항목은 자동으로 무효화)"""
+        ts = datetime.fromisoformat(schedule['time']).timestamp()
+        self._due[schedule['id']] = ts
+        heapq.heappush(self._heap, (ts, schedule['id']))
+
+    def _remove(self, schedule: Dict):
+        """저장소 및 인덱스에서 제거 (heap 항목은 지연 제거)"""
+        self._store.delete(schedule['id'])
+        self._due.pop(schedule['id'], None)
+        self._rules.pop(schedule['id'], None)
+
+    def close(self):
+        """남은 저널 기록 후 종료"""
+        self._store.close()
 
     def _next_id(self) -> int:
-        """새 예약 ID 생성"""
-        if not self.schedules:
-            return 1
-        return max(s['id'] for s in self.schedules) + 1
+        """새 예약 ID 생성 (삭제된 ID는 재사용하지 않음)"""
+        self._last_id += 1
+        return self._last_id
+
+    def add(self, channel_id: int, user_id: int, time: datetime, message: str,
+            repeats: Optional[str] = None) -> Dict:
+        """새 예약 추가 (repeats: 반복 규칙 문자열, 잘못된 규칙이면 ValueError)"""
+        rule = parse_recurrence(repeats) if repeats else None
+        first = time
+        if rule is not None:
+            # BYDAY/cron 처럼 시작 시각 자체가 규칙에 맞지 않을 수 있음 → 첫 발생 시각으로 보정
+            first = rule.next_after(time - timedelta(microseconds=1), anchor=time)
+            if first is None:
+                raise ValueError("반복 규칙에 해당하는 전송 시각이 없습니다.")
 
-    def add(self, channel_id: int, user_id: int, time: datetime, message: str, repeats: bool = False) -> Dict:
-        """새 예약 추가"""
         schedule = {
             "id": self._next_id(),
             "channel_id": channel_id,
             "user_id": user_id,
-            "time": time.isoformat(),
+            "time": first.isoformat(),
             "message": message,
             "created_at": datetime.now().isoformat(),
-            "repeats": repeats
+            "repeats": rule.text if rule else False,
+            "start": time.isoformat(),
+            "fired": 0
         }
-        self.schedules.append(schedule)
-        self.save()
+        self._store.put(schedule)
+        if rule is not None:
+            self._rules[schedule['id']] = rule
+        self._push(schedule)
         return schedule
 
     def delete(self, schedule_id: int, user_id: int) -> Optional[Dict]:
         """예약 삭제 (본인 또는 관리자만)"""
-        for s in self.schedules:
-            if s['id'] == schedule_id:
-                # 본인 확인 (관리자 권한 체크는 호출부에서)
-                if s['user_id'] != user_id:
-                    return None
-                self.schedules.remove(s)
-                self.save()
-                return s
-        return None
+        s = self._store.get(schedule_id)
+        # 본인 확인 (관리자 권한 체크는 호출부에서)
+        if s is None or s['user_id'] != user_id:
+            return None
+        self._remove(s)
+        return s
+
+    def get(self, schedule_id: int) -> Optional[Dict]:
+        """현재 저장된 예약 (삭제됐으면 None)"""
+        return self._store.get(schedule_id)
 
     def get_all(self, user_id: Optional[int] = None) -> List[Dict]:
         """예약 목록 조회 (user_id 지정 시 본인 것만)"""
         if user_id is None:
             return self.schedules
-        return [s for s in self.schedules if s['user_id'] == user_id]
+        return self._store.find(user_id=user_id, order_by="time")
+
+    def next_due_at(self) -> Optional[float]:
+        """가장 이른 예약의 due timestamp (없으면 None)"""
+        while self._heap:
+            ts, sid = self._heap[0]
+            if self._due.get(sid) == ts:
+                return ts
+            heapq.heappop(self._heap)   # 삭제/변경된 stale 항목
+        return None
 
-    def get_due_schedules(self) -> List[Dict]:
-        """현재 실행해야 할 예약 목록 반환 (시간 도래 + 1분 이내)"""
-        now = datetime.now()
+    def pop_due_schedules(self, now: Optional[float] = None) -> List[Dict]:
+        """due 시각이 지난 예약을 heap에서 꺼내 반환 (이미 꺼낸 항목은 다시 반환되지 않음)"""
+        now = time.time() if now is None else now
         due = []
-        for s in self.schedules:
-            schedule_time = datetime.fromisoformat(s['time'])
-            # 1분 이내 오차 허용
-            if schedule_time <= now <= schedule_time + timedelta(minutes=1):
-                due.append(s)
+        while True:
+            ts = self.next_due_at()
+            if ts is None or ts > now:
+                break
+            _, sid = heapq.heappop(self._heap)
+            del self._due[sid]
+            due.append(self._store.get(sid))
         return due
 
+    def reconcile_missed(self, now: Optional[datetime] = None,
+                         grace_seconds: float = SCHEDULE_MISSED_GRACE_SECONDS,
+                         max_per_item: int = SCHEDULE_MISSED_MAX_PER_ITEM
+                         ) -> List[Tuple[Dict, List[datetime], int]]:
+        """
+        오프라인 동안 놓친 예약 일괄 정리 (시작 시 1회).
+        반환: [(예약, 놓친 발생 시각 목록(최대 max_per_item개), 놓친 횟수)]
+        (COUNT 없는 반복 규칙은 max_per_item 이후를 건너뛰므로 놓친 횟수는 하한값)
+        일회성은 삭제, 반복 예약은 now 이후 다음 발생 시각으로 갱신 — 저널 group commit 1회로 기록.
+        """
+        now = now or datetime.now()
+        cutoff = now - timedelta(seconds=grace_seconds)
+        missed = []
+
+        for s in self.pop_due_schedules(cutoff.timestamp()):
+            first = datetime.fromisoformat(s['time'])
+            occurrences, total = [first], 1
+            rule = self._rules.get(s['id'])
+            if rule is None:
+                self._remove(s)
+                missed.append((s, occurrences, total))
+                continue
+
+            anchor = datetime.fromisoformat(s.get('start', s['time']))
+            fired, t, nxt = s.get('fired', 0) + 1, first, None
+            while rule.count is None or fired < rule.count:
+                if rule.count is None and total >= max_per_item:
+                    # 무한 반복 규칙은 나머지 발생분을 건너뛰고 cutoff 이후로 점프
+                    nxt = rule.next_after(cutoff, anchor=anchor)
+                    break
+                nxt = rule.next_after(t, anchor=anchor)
+                if nxt is None or nxt > cutoff:
+                    break
+                if len(occurrences) < max_per_item:
+                    occurrences.append(nxt)
+                fired, total, t = fired + 1, total + 1, nxt
+            else:
+                nxt = None
+
+            missed.append((dict(s), occurrences, total))
+            if nxt is None:
+                self._remove(s)
+            else:
+                s['time'] = nxt.isoformat()
+                s['fired'] = fired
+                self._store.put(s)
+                self._push(s)
+        return missed
+
     def remove_executed(self, schedule_id: int):
         """실행 완료된 일회성 예약 제거"""
-        self.schedules = [s for s in self.schedules if s['id'] != schedule_id or s['repeats']]
-        self.save()
+        s = self._store.get(schedule_id)
+        if s is None or s['repeats']:
+            return
+        self._remove(s)
+
+    def reschedule(self, schedule: Dict, now: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        반복 예약 전송 후 다음 발생 시각으로 갱신.
+        종료 조건(COUNT/UNTIL) 도달 시 삭제 후 None 반환.
+        """
+        rule = self._rules.get(schedule['id'])
+        if rule is None:
+            self.remove_executed(schedule['id'])
+            return None
+
+        schedule['fired'] = schedule.get('fired', 0) + 1
+        nxt = None
+        if rule.count is None or schedule['fired'] < rule.count:
+            due = datetime.fromisoformat(schedule['time'])
+            anchor = datetime.fromisoformat(schedule.get('start', schedule['time']))
+            nxt = rule.next_after(max(due, now or datetime.now()), anchor=anchor)
+
+        if nxt is None:
+            self._remove(schedule)
+            return None
+
+        schedule['time'] = nxt.isoformat()
+        self._store.put(schedule)
+        self._push(schedule)
+        return schedule
 
 
 class Scheduler(commands.Cog):
     """예약 메시지 Cog"""
 
+    # 시스템 시계 변경(NTP 보정 등)에 대비한 최대 대기 시간
+    MAX_SLEEP_SECONDS = 3600.0
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.manager = ScheduleManager()
-        self.check_schedules.start()  # 백그라운드 태스크 시작
+        self._wakeup = asyncio.Event()
+        self._dispatch_task: Optional[asyncio.Task] = None
+
+    async def cog_load(self):
+        """Cog 로드 시 디스패처 태스크 시작 (이미 실행 중이면 그대로 — 디스패처는 항상 1개)"""
+        if self._dispatch_task is None or self._dispatch_task.done():
+            self._dispatch_task = asyncio.create_task(self._dispatch_loop())
 
     def cog_unload(self):
         """Cog 언로드 시 태스크 중지"""
-        self.check_schedules.cancel()
-
-    # ── 백그라운드 태스크: 1분마다 예약 확인 ────────────────────
-    @tasks.loop(minutes=1)
-    async def check_schedules(self):
-        """1분마다 실행해야 할 예약 체크"""
-        due = self.manager.get_due_schedules()
-        for s in due:
+        if self._dispatch_task is not None:
+            self._dispatch_task.cancel()
+        self.manager.close()
+
+    # ── 백그라운드 태스크: 다음 예약 시각까지 정확히 대기 ──────────
+    async def _dispatch_loop(self):
+        """heap의 최상단 예약 시각까지 sleep → 도래한 예약 전송"""
+        await self.bot.wait_until_ready()
+        await self._catch_up_missed()
+        while True:
+            self._wakeup.clear()
+            due_at = self.manager.next_due_at()
+            if due_at is None:
+                timeout = self.MAX_SLEEP_SECONDS
+            else:
+                timeout = min(max(due_at - time.time(), 0.0), self.MAX_SLEEP_SECONDS)
+
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    continue   # 더 이른 예약이 추가됨 → 대기 시간 재계산
+                except asyncio.TimeoutError:
+                    pass
+
+            for s in self.manager.pop_due_schedules():
+                metrics.observe_stage('schedule', 'lateness',
+                                      max(0.0, time.time() - datetime.fromisoformat(s['time']).timestamp()))
+                await self._fire(s)
+
+    async def _fire(self, s: Dict):
+        """예약 메시지 1건 전송 (꺼낸 뒤 / 전송 중에 삭제된 예약은 보내거나 되살리지 않음)"""
+        if self.manager.get(s['id']) is None:
+            log.info("schedule.skipped_deleted", "⏭️ 삭제된 예약 (전송 생략)", schedule_id=s['id'])
+            return
+        with cid_scope(f"schedule-{s['id']}"):
             channel = self.bot.get_channel(s['channel_id'])
             if channel is None:
-                print(f"⚠️ 채널을 찾을 수 없음: {s['channel_id']}")
-                continue
-            try:
-                await channel.send(s['message'])
-                print(f"📨 예약 메시지 전송: ID={s['id']} → {s['message'][:30]}")
-            except Exception as e:
-                print(f"❌ 예약 메시지 전송 실패: {e}")
-
-            # 일회성이면 삭제
-            if not s['repeats']:
-                self.manager.remove_executed(s['id'])
-
-    @check_schedules.before_loop
-    async def before_check_schedules(self):
-        """봇 준비될 때까지 대기"""
-        await self.bot.wait_until_ready()
+                log.warning("schedule.channel_missing", "⚠️ 채널을 찾을 수 없음", channel_id=s['channel_id'])
+            else:
+                try:
+                    with metrics.stage('schedule', 'send'):
+                        await outbound.send(channel, s['message'])
+                    log.info("schedule.sent", "📨 예약 메시지 전송", schedule_id=s['id'], text=s['message'][:30])
+                except Exception as e:
+                    metrics.error('schedule', 'send')
+                    log.error("schedule.send_failed", "❌ 예약 메시지 전송 실패", schedule_id=s['id'], error=str(e))
+
+        # 전송을 기다리는 동안 삭제됐으면 그대로 둠 (꺼내 둔 사본으로 다시 저장하지 않음)
+        current = self.manager.get(s['id'])
+        if current is None:
+            return
+        # 일회성이면 삭제, 반복이면 다음 발생 시각으로 재등록
+        if current['repeats']:
+            self.manager.reschedule(current)
+        else:
+            self.manager.remove_executed(current['id'])
+
+    async def _catch_up_missed(self):
+        """오프라인 동안 놓친 예약에 SCHEDULE_MISSED_POLICY 적용"""
+        missed = self.manager.reconcile_missed()
+        if not missed:
+            return
+        policy = SCHEDULE_MISSED_POLICY
+        if policy not in ('send', 'coalesce', 'drop'):
+            log.warning("schedule.unknown_policy", f"⚠️ 알 수 없는 SCHEDULE_MISSED_POLICY '{policy}' → coalesce 로 처리")
+            policy = 'coalesce'
+        log.info("schedule.missed", "⏰ 놓친 예약 보정", count=sum(total for _, _, total in missed), policy=policy)
+
+        if policy == 'send':
+            for s, occurrences, _ in missed:
+                for t in occurrences:
+                    await self._send_to_channel(
+                        s['channel_id'], f"⏰ *지연 전송 — 예약 시각 {t.strftime('%m-%d %H:%M')}*\n{s['message']}"
+                    )
+            return
+
+        by_channel: Dict[int, List[Tuple[Dict, List[datetime], int]]] = {}
+        for item in missed:
+            by_channel.setdefault(item[0]['channel_id'], []).append(item)
+
+        for channel_id, items in by_channel.items():
+            if policy == 'coalesce':
+                lines = [f"⏰ 봇이 오프라인이던 동안 놓친 예약 메시지 {len(items)}건입니다."]
+                for s, occurrences, total in items:
+                    count = f" (×{total}{'+' if total >= SCHEDULE_MISSED_MAX_PER_ITEM else ''})" if total > 1 else ""
+                    lines.append(f"• `{occurrences[0].strftime('%m-%d %H:%M')}`{count} {s['message']}")
+            else:
+                ids = ", ".join(str(s['id']) for s, _, _ in items)
+                lines = [f"⚠️ 봇이 오프라인이던 동안 예약 {len(items)}건(ID: {ids})이 전송되지 못해 건너뛰었습니다."]
+            await self._send_to_channel(channel_id, "\n".join(lines))
+
+    async def _send_to_channel(self, channel_id: int, text: str):
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            log.warning("schedule.channel_missing", "⚠️ 채널을 찾을 수 없음", channel_id=channel_id)
+            return
+        try:
+            await outbound.send(channel, text)
+        except Exception as e:
+            log.error("schedule.send_failed", "❌ 예약 메시지 전송 실패", channel_id=channel_id, error=str(e))
+
+    def _notify_scheduled(self, due: datetime):
+        """현재 대기 중인 시각보다 이른 예약이면 디스패처를 깨움"""
+        current = self.manager.next_due_at()
+        if current is None or due.timestamp() <= current:
+            self._wakeup.set()
 
     # ── 슬래시 커맨드 ──────────────────────────────────────────
     schedule_group = app_commands.Group(name="schedule", description="예약 메시지 관리")
@@ -169,9 +435,11 @@ class Scheduler(commands.Cog):
     @schedule_group.command(name="add", description="예약 메시지 추가")
     @app_commands.describe(
         time="시간 (YYYY-MM-DD HH:MM 또는 HH:MM)",
-        message="전송할 메시지"
+        message="전송할 메시지",
+        repeat="반복 규칙 (daily, weekdays, FREQ=WEEKLY;BYDAY=MO,WE, cron 0 9 * * 1-5)"
     )
-    async def schedule_add(self, interaction: discord.Interaction, time: str, message: str):
+    async def schedule_add(self, interaction: discord.Interaction, time: str, message: str,
+                           repeat: Optional[str] = None):
         """예약 메시지 추가"""
         # 시간 파싱
         try:
@@ -204,12 +472,19 @@ class Scheduler(commands.Cog):
             return
 
         # 예약 추가
-        s = self.manager.add(
-            channel_id=interaction.channel_id,
-            user_id=interaction.user.id,
-            time=schedule_time,
-            message=message
-        )
+        try:
+            s = self.manager.add(
+                channel_id=interaction.channel_id,
+                user_id=interaction.user.id,
+                time=schedule_time,
+                message=message,
+                repeats=repeat
+            )
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+        schedule_time = datetime.fromisoformat(s['time'])
+        self._notify_scheduled(schedule_time)
 
         embed = discord.Embed(
             title="✅ 예약 메시지 추가 완료",
@@ -217,6 +492,8 @@ class Scheduler(commands.Cog):
         )
         embed.add_field(name="예약 ID", value=f"`{s['id']}`", inline=True)
         embed.add_field(name="전송 시간", value=f"`{schedule_time.strftime('%Y-%m-%d %H:%M')}`", inline=True)
+        if s['repeats']:
+            embed.add_field(name="반복", value=f"`{s['repeats']}`", inline=True)
         embed.add_field(name="메시지", value=message, inline=False)
         embed.set_footer(text="삭제하려면 /schedule delete <ID>")
         await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -238,8 +515,9 @@ class Scheduler(commands.Cog):
         )
         for s in schedules:
             time_str = datetime.fromisoformat(s['time']).strftime('%Y-%m-%d %H:%M')
+            repeat_str = f" | 🔁 {s['repeats']}" if s['repeats'] else ""
             embed.add_field(
-                name=f"ID: {s['id']} | {time_str}",
+                name=f"ID: {s['id']} | {time_str}{repeat_str}",
                 value=f"{s['message'][:50]}{'...' if len(s['message']) > 50 else ''}",
                 inline=False
             )
@@ -268,4 +546,4 @@ class Scheduler(commands.Cog):
 async def setup(bot: commands.Bot):
     """Cog 설정 함수 (동적 로드용)"""
     await bot.add_cog(Scheduler(bot))
-    print("✅ Scheduler Cog 동적 로드 완료")
\ No newline at end of file
+    log.info("cog.loaded", "✅ Scheduler Cog 동적 로드 완료", cog="Scheduler")
\ No newline at end of file
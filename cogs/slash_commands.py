@@ -1,7 +1,29 @@
 """
-Discord 슬래시 커맨드 Cog (v3.4 - 레퍼런스 이미지 스타일 드롭다운)
-
-[수정 내역]
+Discord 슬래시 커맨드 Cog (v3.8 - /summarize 최신 메시지 우선)
+
+[v3.8 수정 내역]
+- BUG FIX: /summarize 가 after 지정 히스토리를 오래된 순으로 받아, SUMMARY_MAX_MESSAGES 를 넘는 구간에서
+  가장 최근 메시지가 잘려 나가던 문제 → 최신순으로 받아 뒤집어서 요약, 잘렸으면 footer 에 표시
+  (스트리밍 대신 최대 SUMMARY_MAX_MESSAGES 줄을 모아서 요약)
+
+[v3.7 수정 내역]
+- /sync: 시작 시 동기화와 같은 경로(bot.command_sync, utils/command_sync.py)를 force=True 로 사용
+  · 시작 시에는 커맨드 구성이 바뀐 범위만 동기화하므로, Discord 쪽이 어긋났을 때의 복구용
+  · 서버 범위도 다시 등록 (기존: 전역만 비우고 재동기화 → 서버 커맨드는 그대로)
+
+[v3.6 수정 내역]
+- FEATURE: /status 에 실제 응답 모델별 횟수와 대체 응답 수 표시
+
+[v3.5 수정 내역]
+- PERF: /summarize 가 이벤트 루프에서 동기 generate_response 를 호출하던 문제 수정
+  · 히스토리를 페이지 단위로 스트리밍 (기존 200개 제한 제거, SUMMARY_MAX_MESSAGES)
+  · utils/summarizer.py 로 구간 분할 → 저비용 모델 동시 요약 → 병합
+  · 요약은 페르소나 시스템 프롬프트 없이 실행 (요청당 입력 토큰 절감)
+- FIX: embed description 4096자 제한 초과 시 잘라서 전송
+- FEATURE: message_id 생략 가능 — 다이제스트 채널은 시간 버킷 사전 요약을 병합 (cogs/channel_digest.py)
+  수집 범위 밖이거나 메시지 ID 지정 시 기존 map-reduce 경로 사용
+
+[v3.4 수정 내역]
 - REDESIGN: /model 드롭다운을 레퍼런스 이미지 스타일로 전면 재설계
   · embed 제거 → 심플한 텍스트 메시지 + 드롭다운만 표시
   · "현재 LLM 모델: **모델명**" 형태로 현재 선택 표시
@@ -14,11 +36,16 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from datetime import timedelta
-from typing import List
+from typing import List, Optional
 
-from config.settings import AVAILABLE_MODELS, AVAILABLE_PROMPTS
+from config.settings import AVAILABLE_MODELS, AVAILABLE_PROMPTS, SUMMARY_MAX_MESSAGES
 from utils.gemini_client import GeminiClient
 from utils.memo_manager import MemoManager
+from utils.summarizer import ChannelSummarizer, format_message
+from utils.usage import bind_usage
+from utils.logger import get_logger
+
+log = get_logger(__name__)
 
 
 # ========== 모델별 메타 정보 ==========
@@ -255,6 +282,7 @@ class SlashCommands(commands.Cog):
         self.gemini_client = gemini_client
         self.chat_handler = chat_handler
         self.memo_manager = memo_manager
+        self.summarizer = ChannelSummarizer(gemini_client)
     
     # ========== 설정 명령어 ==========
     
@@ -459,30 +487,39 @@ class SlashCommands(commands.Cog):
     # ========== 기능 명령어 ==========
     
     @app_commands.command(name="summarize", description="대화 요약")
-    @app_commands.describe(message_id="기준 메시지 ID", hours="몇 시간 전까지")
-    async def summarize(self, interaction: discord.Interaction, message_id: str, hours: int):
+    @app_commands.describe(message_id="기준 메시지 ID (생략 시 지금 기준)", hours="몇 시간 전까지")
+    async def summarize(self, interaction: discord.Interaction, hours: int, message_id: Optional[str] = None):
+        bind_usage(user_id=interaction.user.id, channel_id=interaction.channel_id)
         await interaction.response.defer()
         try:
-            target = await interaction.channel.fetch_message(int(message_id))
-            time_threshold = target.created_at - timedelta(hours=hours)
+            # 빠른 경로: 채널 다이제스트의 미리 계산된 시간 버킷 요약 병합
+            if message_id is None:
+                digest = self.bot.get_cog('ChannelDigest')
+                result = await digest.summarize_recent(interaction.channel.id, hours) if digest else None
+                if result is not None:
+                    response_text, count = result
+                    await self._send_summary(interaction, hours, response_text, count)
+                    return
             
-            messages = []
-            async for msg in interaction.channel.history(limit=200, before=target.created_at):
-                if msg.created_at >= time_threshold:
-                    if not msg.author.bot and not msg.content.startswith(('/', '!', '\\')):
-                        messages.append(f"{msg.author.name}: {msg.content}")
-                else:
-                    break
+            target_time = discord.utils.utcnow()
+            if message_id is not None:
+                target = await interaction.channel.fetch_message(int(message_id))
+                target_time = target.created_at
+            time_threshold = target_time - timedelta(hours=hours)
             
-            messages.reverse()
-            if not messages:
-                await interaction.followup.send("❌ 요약할 대화가 없습니다.")
-                return
-            
-            response_text = self.gemini_client.generate_response(f"다음 대화를 간단히 요약해주세요:\n\n" + "\n".join(messages))
-            embed = discord.Embed(title=f"📝 최근 {hours}시간 대화 요약", description=response_text, color=discord.Color.green())
-            embed.set_footer(text=f"총 {len(messages)}개 메시지 분석")
-            await interaction.followup.send(embed=embed)
+            # 최신순으로 받아야 SUMMARY_MAX_MESSAGES 초과 시 오래된 쪽이 잘림 (오래된 순이면 최근 대화가 빠짐)
+            # 1개 더 받아서 잘림 여부 확인 → 요약 입력은 다시 시간순으로
+            lines = [
+                format_message(msg) async for msg in interaction.channel.history(
+                    limit=SUMMARY_MAX_MESSAGES + 1, after=time_threshold, before=target_time,
+                    oldest_first=False,
+                )
+            ]
+            truncated = len(lines) > SUMMARY_MAX_MESSAGES
+            lines = [line for line in reversed(lines[:SUMMARY_MAX_MESSAGES]) if line]
+
+            response_text, count = await self.summarizer.summarize_texts(lines)
+            await self._send_summary(interaction, hours, response_text, count, truncated)
             
         except discord.NotFound:
             await interaction.followup.send("❌ 해당 메시지를 찾을 수 없습니다.")
@@ -491,6 +528,21 @@ class SlashCommands(commands.Cog):
         except Exception as e:
             await interaction.followup.send(f"❌ 오류: {e}")
     
+    async def _send_summary(self, interaction: discord.Interaction, hours: int, text: Optional[str], count: int,
+                            truncated: bool = False):
+        if not count:
+            await interaction.followup.send("❌ 요약할 대화가 없습니다.")
+            return
+        text = text or ""
+        if len(text) > 4096:
+            text = text[:4093] + "..."
+        embed = discord.Embed(title=f"📝 최근 {hours}시간 대화 요약", description=text, color=discord.Color.green())
+        footer = f"총 {count}개 메시지 분석"
+        if truncated:
+            footer += f" · 최근 {SUMMARY_MAX_MESSAGES}개까지만 읽음 (이전 메시지 생략)"
+        embed.set_footer(text=footer)
+        await interaction.followup.send(embed=embed)
+    
     @app_commands.command(name="status", description="현재 봇 설정 확인")
     async def status(self, interaction: discord.Interaction):
         user_id = interaction.user.id
@@ -516,6 +568,11 @@ class SlashCommands(commands.Cog):
             value=f"**내 대화:** {user_history_count}개 메시지\n**전체 사용자:** {stats['total_users']}명",
             inline=False
         )
+        served = self.gemini_client.served_counts
+        if served:
+            lines = [f"`{model}` {count}회" for model, count in sorted(served.items(), key=lambda x: -x[1])]
+            lines.append(f"**대체 응답:** {self.gemini_client.fallback_count}회")
+            embed.add_field(name="📈 실제 응답 모델", value="\n".join(lines), inline=False)
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="command", description="사용 가능한 명령어 목록")
@@ -561,7 +618,7 @@ class SlashCommands(commands.Cog):
         embed.add_field(
             name="📊 기타",
             value=(
-                "• `/summarize <메시지ID> <시간>` - 대화 요약\n"
+                "• `/summarize <시간> [메시지ID]` - 대화 요약\n"
                 "• `/status` - 봇 현재 설정 확인\n"
                 "• `/sync` - 슬래시 커맨드 동기화 (관리자)\n"
                 "• `/down` - 봇 종료 (관리자)"
@@ -599,7 +656,7 @@ class SlashCommands(commands.Cog):
             color=discord.Color.red()
         )
         await interaction.response.send_message(embed=embed)
-        print(f"⏹️ /down 명령어로 봇 종료 (요청자: {interaction.user.name})")
+        log.info("bot.shutdown", "⏹️ /down 명령어로 봇 종료", by=interaction.user.id)
         await self.bot.close()
     
     @app_commands.command(name="reset", description="대화 히스토리 초기화")
@@ -628,30 +685,38 @@ class SlashCommands(commands.Cog):
             self.chat_handler.clear_history(None)
             await interaction.response.send_message(f"🗑️ 모든 사용자의 히스토리가 초기화되었습니다! ({total_users}명)", ephemeral=True)
     
-    @app_commands.command(name="sync", description="슬래시 커맨드 전체 초기화 후 재동기화 (관리자 전용)")
+    @app_commands.command(name="sync", description="슬래시 커맨드 강제 재동기화 (관리자 전용)")
     @app_commands.default_permissions(administrator=True)
     async def sync_commands(self, interaction: discord.Interaction):
+        command_sync = getattr(self.bot, 'command_sync', None)
+        if command_sync is None:
+            await interaction.response.send_message("⏳ 봇이 아직 시작 준비 중입니다. 잠시 후 다시 시도해 주세요.", ephemeral=True)
+            return
         await interaction.response.defer(ephemeral=True)
-        try:
-            # 기존 등록된 명령어 전체 삭제 후 재동기화
-            self.bot.tree.clear_commands(guild=None)
-            synced = await self.bot.tree.sync()
-            embed = discord.Embed(
-                title="✅ 슬래시 커맨드 재동기화 완료",
-                description=f"기존 명령어를 전부 제거하고 **{len(synced)}개** 명령어를 새로 등록했습니다.",
-                color=discord.Color.green()
-            )
-            command_list = "\n".join([f"• `/{cmd.name}`" for cmd in synced[:20]])
-            if len(synced) > 20:
-                command_list += f"\n... 외 {len(synced) - 20}개"
-            embed.add_field(name="등록된 명령어", value=command_list, inline=False)
-            embed.set_footer(text="⚠️ Discord 반영까지 최대 1시간 소요될 수 있습니다.")
-            await interaction.followup.send(embed=embed, ephemeral=True)
-            print(f"✅ 슬래시 커맨드 수동 재동기화: {len(synced)}개")
-        except Exception as e:
-            embed = discord.Embed(title="❌ 동기화 실패", description=f"오류: {str(e)}", color=discord.Color.red())
+        # 시작 시에는 바뀐 범위만 동기화 — /sync 는 기록된 해시와 무관하게 전부 다시 등록
+        results = await command_sync.sync_all(force=True)
+        errors = {scope: result for scope, result in results.items() if isinstance(result, Exception)}
+        synced = results['guild'] if not isinstance(results['guild'], Exception) else []
+        if errors:
+            description = "\n".join(f"**{scope}**: {error}" for scope, error in errors.items())
+            embed = discord.Embed(title="❌ 동기화 실패", description=f"오류: {description}"[:4096], color=discord.Color.red())
             await interaction.followup.send(embed=embed, ephemeral=True)
+            log.warning("commands.sync_failed", "⚠️ 슬래시 커맨드 수동 재동기화 실패",
+                        scopes=list(errors), error="; ".join(str(e) for e in errors.values()), forced=True)
+            return
 
+        embed = discord.Embed(
+            title="✅ 슬래시 커맨드 재동기화 완료",
+            description=f"서버 명령어 **{len(synced)}개**를 다시 등록하고 전역 명령어는 비웠습니다.",
+            color=discord.Color.green()
+        )
+        command_list = "\n".join([f"• `/{cmd.name}`" for cmd in synced[:20]])
+        if len(synced) > 20:
+            command_list += f"\n... 외 {len(synced) - 20}개"
+        if command_list:
+            embed.add_field(name="등록된 명령어", value=command_list, inline=False)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        log.info("commands.synced", "✅ 슬래시 커맨드 수동 재동기화", count=len(synced), forced=True)
 
 async def setup(bot: commands.Bot):
     """Cog 설정 함수 (동적 로드용)"""
@@ -663,4 +728,4 @@ async def setup(bot: commands.Bot):
         raise RuntimeError("bot.memo_manager가 설정되지 않았습니다.")
     
     await bot.add_cog(SlashCommands(bot, bot.gemini_client, bot.chat_handler, bot.memo_manager))
-    print("✅ SlashCommands Cog 동적 로드 완료")
\ No newline at end of file
+    log.info("cog.loaded", "✅ SlashCommands Cog 동적 로드 완료", cog="SlashCommands")
\ No newline at end of file
@@ -1,8 +1,20 @@
 """
-날씨 Cog (v1.0)
+날씨 Cog (v1.4 - 알림 루프 중복 시작 방지)
 
 OpenWeatherMap API 기반 날씨 조회 및 자동 알림 기능
 
+[v1.4 변경]
+- cog_load 가 다시 호출돼도 알림 루프가 이미 돌고 있으면 그대로 (07시 알림 중복 방지)
+
+[v1.3 변경]
+- 07시 알림 루프 시작을 생성자 → cog_load 로 이동
+  (생성자는 구독 저장소만 읽음 → 시작 시 스레드에서 생성 가능, 루프 작업은 이벤트 루프에서)
+
+[수정 내역]
+- PERF: 구독 변경마다 전체 파일 재작성 → JournalStore append-only 저널로 교체
+  (user_id 키 기반 O(1) 추가/해제/조회, 백그라운드 fsync)
+- FEATURE: STORAGE_BACKEND='sqlite' 선택 시 SQLite 테이블 사용 (JSON은 가져오기/내보내기)
+
 [기능]
 - /weather <도시>           — 현재 날씨 즉시 조회
 - /weather forecast <도시>  — 오늘 하루 예보 (3시간 간격)
@@ -15,7 +27,7 @@ OpenWeatherMap API 기반 날씨 조회 및 자동 알림 기능
 - 비 시작 또는 급격한 기온 변화(±5도) 구간에서 추가 행 삽입
 
 [저장 구조]
-data/weather_subscriptions.json:
+data/weather_subscriptions.json (스냅샷, 최근 변경은 .journal):
 {
   "subscriptions": [
     {
@@ -32,64 +44,51 @@ from discord import app_commands
 from discord.ext import commands, tasks
 from datetime import datetime, time as dt_time, timedelta
 from typing import List, Dict, Optional
-import json
-import os
-
+from utils.storage import open_store
 from utils.weather_client import WeatherClient
+from utils.logger import get_logger
+
+log = get_logger(__name__)
 
 SUBSCRIPTION_FILE = "data/weather_subscriptions.json"
 
 
 class WeatherSubscriptionManager:
-    """날씨 구독 관리 (JSON 기반 영속화)"""
+    """날씨 구독 관리 (JournalStore/SQLiteStore 기반 영속화, user_id 키)"""
 
     def __init__(self, filepath: str = SUBSCRIPTION_FILE):
         self.filepath = filepath
-        self.subscriptions: List[Dict] = []
+        self._store = open_store(filepath, collection="subscriptions", key_field="user_id")
         self.load()
 
-    def load(self):
-        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-        if os.path.exists(self.filepath):
-            try:
-                with open(self.filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.subscriptions = data.get("subscriptions", [])
-                print(f"✅ 날씨 구독 로드: {len(self.subscriptions)}개")
-            except Exception as e:
-                print(f"⚠️ 날씨 구독 파일 로드 실패: {e}")
-                self.subscriptions = []
-        else:
-            self.subscriptions = []
+    @property
+    def subscriptions(self) -> List[Dict]:
+        return self._store.all()
 
-    def save(self):
+    def load(self):
         try:
-            with open(self.filepath, 'w', encoding='utf-8') as f:
-                json.dump({"subscriptions": self.subscriptions}, f, ensure_ascii=False, indent=2)
+            self._store.load()
+            log.info("weather.subscriptions_loaded", "✅ 날씨 구독 로드", count=len(self._store))
         except Exception as e:
-            print(f"❌ 날씨 구독 저장 실패: {e}")
+            log.warning("weather.subscriptions_load_failed", "⚠️ 날씨 구독 파일 로드 실패", error=str(e))
+
+    def close(self):
+        """남은 저널 기록 후 종료"""
+        self._store.close()
 
     def add(self, user_id: int, city: str) -> Dict:
-        """구독 추가 (중복 시 덮어쓰기)"""
-        # 기존 구독 제거 (1인 1지역)
-        self.subscriptions = [s for s in self.subscriptions if s['user_id'] != user_id]
+        """구독 추가 (중복 시 덮어쓰기 — 1인 1지역)"""
         sub = {
             "user_id": user_id,
             "city": city,
             "created_at": datetime.now().isoformat()
         }
-        self.subscriptions.append(sub)
-        self.save()
+        self._store.put(sub)
         return sub
 
     def remove(self, user_id: int) -> bool:
         """구독 해제"""
-        before = len(self.subscriptions)
-        self.subscriptions = [s for s in self.subscriptions if s['user_id'] != user_id]
-        if len(self.subscriptions) < before:
-            self.save()
-            return True
-        return False
+        return self._store.delete(user_id) is not None
 
     def get_all(self) -> List[Dict]:
         """전체 구독 목록"""
@@ -97,10 +96,7 @@ class WeatherSubscriptionManager:
 
     def get_by_user(self, user_id: int) -> Optional[Dict]:
         """특정 유저의 구독 조회"""
-        for s in self.subscriptions:
-            if s['user_id'] == user_id:
-                return s
-        return None
+        return self._store.get(user_id)
 
 
 class WeatherHandler(commands.Cog):
@@ -110,10 +106,14 @@ class WeatherHandler(commands.Cog):
         self.bot = bot
         self.weather_client = WeatherClient(api_key)
         self.subscription_manager = WeatherSubscriptionManager()
-        self.daily_weather_alert.start()
+
+    async def cog_load(self):
+        if not self.daily_weather_alert.is_running():
+            self.daily_weather_alert.start()
 
     def cog_unload(self):
         self.daily_weather_alert.cancel()
+        self.subscription_manager.close()
 
     # ── 백그라운드 태스크: 매일 07:00 날씨 알림 ──────────────────
     @tasks.loop(time=dt_time(hour=7, minute=0))
@@ -130,7 +130,7 @@ class WeatherHandler(commands.Cog):
                 try:
                     user = await self.bot.fetch_user(sub['user_id'])
                 except:
-                    print(f"⚠️ 사용자를 찾을 수 없음: {sub['user_id']}")
+                    log.warning("weather.user_missing", "⚠️ 사용자를 찾을 수 없음", user_id=sub['user_id'])
                     continue
 
             city = sub['city']
@@ -157,11 +157,11 @@ class WeatherHandler(commands.Cog):
 
             try:
                 await user.send(embed=embed)
-                print(f"📨 날씨 알림 전송 (DM): {city} → {user.name}")
+                log.info("weather.alert_sent", "📨 날씨 알림 전송 (DM)", city=city, user_id=user.id)
             except discord.Forbidden:
-                print(f"⚠️ DM 전송 실패 (차단됨): {user.name}")
+                log.warning("weather.dm_forbidden", "⚠️ DM 전송 실패 (차단됨)", user_id=user.id)
             except Exception as e:
-                print(f"❌ 날씨 알림 전송 실패: {e}")
+                log.error("weather.alert_failed", "❌ 날씨 알림 전송 실패", city=city, error=str(e))
 
     @daily_weather_alert.before_loop
     async def before_daily_weather_alert(self):
@@ -326,7 +326,7 @@ class WeatherHandler(commands.Cog):
 
         try:
             await interaction.user.send(embed=forecast_embed)
-            print(f"📨 날씨 등록 즉시 전송 (DM): {city} → {interaction.user.name}")
+            log.info("weather.register_sent", "📨 날씨 등록 즉시 전송 (DM)", city=city, user_id=interaction.user.id)
         except discord.Forbidden:
             # DM 차단된 경우 ephemeral 채널 메시지로 전송
             await interaction.followup.send(
@@ -334,9 +334,9 @@ class WeatherHandler(commands.Cog):
                 embed=forecast_embed,
                 ephemeral=True
             )
-            print(f"⚠️ DM 차단 (채널 대체 전송): {interaction.user.name}")
+            log.warning("weather.dm_forbidden", "⚠️ DM 차단 (채널 대체 전송)", user_id=interaction.user.id)
         except Exception as e:
-            print(f"❌ 예보 전송 실패: {e}")
+            log.error("weather.register_failed", "❌ 예보 전송 실패", city=city, error=str(e))
 
     @weather_group.command(name="unregister", description="날씨 알림 해제")
     async def weather_unregister(self, interaction: discord.Interaction):
@@ -380,4 +380,4 @@ async def setup(bot: commands.Bot):
     if not hasattr(bot, 'weather_api_key'):
         raise RuntimeError("bot.weather_api_key가 설정되지 않았습니다.")
     await bot.add_cog(WeatherHandler(bot, bot.weather_api_key))
-    print("✅ WeatherHandler Cog 동적 로드 완료")
\ No newline at end of file
+    log.info("cog.loaded", "✅ WeatherHandler Cog 동적 로드 완료", cog="WeatherHandler")
\ No newline at end of file
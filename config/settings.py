@@ -31,4 +31,140 @@ AVAILABLE_PROMPTS = [
 ]
 DEFAULT_PROMPT_INDEX = 0
 # 멀티 페르소나 프롬프트 빌더 전용 채널
-CHANNEL_PERSONA = 1462774351740014633
\ No newline at end of file
+CHANNEL_PERSONA = 1462774351740014633
+# 예약 메시지 다운타임 보정 정책
+# 'send': 놓친 예약을 늦게라도 전송 | 'coalesce': 채널별 1개 메시지로 묶어 전송 | 'drop': 전송 없이 안내만
+SCHEDULE_MISSED_POLICY = 'coalesce'
+SCHEDULE_MISSED_GRACE_SECONDS = 60    # 이 시간 이내의 지연은 정상 전송으로 처리
+SCHEDULE_MISSED_MAX_PER_ITEM = 5      # 반복 예약 1건당 보정 대상으로 나열할 최대 발생 횟수
+
+# JSON 저장소 저널 설정 (utils/journal_store.py)
+JOURNAL_FLUSH_INTERVAL = 0.2   # 초 — 이 간격으로 모인 변경을 한 번에 fsync
+JOURNAL_COMPACT_EVERY = 500    # 저널 연산 수가 이 값을 넘으면 스냅샷으로 압축
+
+# 저장소 백엔드: 'journal'(JSON + append-only 저널) | 'sqlite'(인덱스 기반, JSON은 가져오기/내보내기용)
+STORAGE_BACKEND = 'journal'
+SQLITE_DB_FILE = 'data/peanut.db'
+SQLITE_COMMIT_EVERY = 100      # 쓰기가 계속 밀려들 때 최소 이 건수마다 commit
+
+# /summarize map-reduce 요약 설정 (utils/summarizer.py)
+SUMMARY_MODEL = 'gemini-2.5-flash-lite'   # 구간 요약/병합용 저비용 모델
+SUMMARY_CHUNK_TOKENS = 6000               # 구간 1개당 최대 입력 토큰 (추정치)
+SUMMARY_CONCURRENCY = 4                   # 동시 구간 요약 요청 수
+SUMMARY_MAX_MESSAGES = 5000               # 1회 요약 시 읽을 최대 메시지 수
+
+# 채널 다이제스트 (cogs/channel_digest.py) — 시간 단위 버킷 사전 요약
+DIGEST_CHANNELS = [CHANNEL_FREE, CHANNEL_BOT]   # 대화를 수집할 채널
+DIGEST_BUCKET_FILE = 'data/digests/buckets.json'
+DIGEST_COVERAGE_FILE = 'data/digests/coverage.json'
+DIGEST_RETENTION_HOURS = 72       # 이보다 오래된 버킷은 삭제 (/summarize 빠른 경로 최대 범위)
+DIGEST_BACKFILL_HOURS = 24        # 재시작 시 놓친 구간을 채널 기록에서 다시 채울 최대 시간
+DIGEST_TICK_SECONDS = 60          # 버킷 마감/백그라운드 요약 주기
+
+# Gemini API 공용 속도 제한 (utils/rate_limiter.py) — API 등급에 맞게 조정
+# 모델 → (분당 요청 수, 분당 입력 토큰 수)
+RATE_LIMITS = {
+    'gemini-3-pro-preview':   (5, 250000),
+    'gemini-2.5-flash':       (10, 250000),
+    'gemini-3-flash-preview': (10, 250000),
+    'gemini-2.5-flash-lite':  (15, 250000),
+}
+RATE_LIMIT_DEFAULT = (10, 250000)
+# 우선순위별로 남겨둘 여유분 비율 — 하위 작업은 버킷이 이만큼 남아 있을 때만 호출
+RATE_LIMIT_HEADROOM = {'chat': 0.0, 'reaction': 0.2, 'background': 0.4}
+RATE_LIMIT_CHAT_MAX_WAIT = 30       # 초 — 답장이 한도 대기로 이보다 오래 걸리면 오류 처리
+RATE_LIMIT_REACTION_MAX_WAIT = 3    # 초 — 감정 리액션은 한도에 걸리면 짧게 기다리고 생략
+
+# Gemini 호출 재시도 / 헤지 (utils/resilience.py)
+GEMINI_RETRY_ATTEMPTS = 3          # 최초 호출 포함 최대 시도 횟수
+GEMINI_RETRY_BASE_DELAY = 1.0      # 초 — 지수 백오프 기준값
+GEMINI_RETRY_MAX_DELAY = 20.0      # 초 — 이보다 긴 대기(Retry-After 포함)가 필요하면 포기
+GEMINI_HEDGE_ENABLED = True        # 채팅 답장이 p95 를 넘기면 같은 요청을 하나 더 보냄
+GEMINI_HEDGE_PERCENTILE = 95
+GEMINI_HEDGE_MIN_SAMPLES = 20      # 응답 시간 표본이 이만큼 모이기 전에는 헤지하지 않음
+GEMINI_HEDGE_MIN_DELAY = 2.0       # 초 — 헤지 시작 최소 대기 시간
+
+# 모델 대체(fallback) 체인 — 선택된 모델이 느리거나 한도 초과일 때 순서대로 시도
+MODEL_FALLBACK_CHAIN = {
+    'gemini-3-pro-preview':   ['gemini-2.5-flash', 'gemini-2.5-flash-lite'],
+    'gemini-3-flash-preview': ['gemini-2.5-flash', 'gemini-2.5-flash-lite'],
+    'gemini-2.5-flash':       ['gemini-2.5-flash-lite'],
+    'gemini-2.5-flash-lite':  [],
+}
+MODEL_FALLBACK_DEADLINE = 25        # 초 — 체인의 마지막이 아닌 모델은 이 안에 응답 없으면 다음 모델로
+MODEL_FALLBACK_QUEUE_WAIT = 5       # 초 — 마지막이 아닌 모델의 속도 제한 대기 상한
+MODEL_FALLBACK_LATENCY_P50 = 15.0   # 초 — 최근 응답 시간 중앙값이 이보다 크면 잠시 건너뜀
+MODEL_FALLBACK_COOLDOWN = 120       # 초 — 느림/오류로 건너뛴 모델을 다시 시도하기까지 시간
+
+# genai 공용 클라이언트 HTTP 설정 (utils/genai_pool.py)
+GENAI_HTTP_TIMEOUT = 60          # 초 — 요청 1건 HTTP 타임아웃
+GENAI_MAX_CONNECTIONS = 20       # 동시 연결 상한 (동기/비동기 풀 각각)
+GENAI_MAX_KEEPALIVE = 10         # 유지할 유휴 연결 수
+GENAI_KEEPALIVE_EXPIRY = 60      # 초 — 유휴 연결 유지 시간
+
+# 수집 대기 중 추측 생성 (cogs/chat_handler.py)
+# 첫 메시지가 오면 바로 생성을 시작하고, 대기 시간 안에 메시지가 더 오면 버리고(요청 취소) 다시 시작
+# 버려진 요청도 속도 제한 / 비용 / 사용자 한도를 쓰므로 기본은 꺼짐 — 연속 메시지가 드문 서버에서만 켤 것
+SPECULATIVE_GENERATION = False
+SPECULATIVE_MAX_RESTARTS = 2      # 대기 시간 1회당 재시작 상한 (초과 시 대기 종료 후 일반 생성)
+
+# 페르소나 세션 저장소 (cogs/persona_handler.py)
+PERSONA_SESSION_FILE = 'data/persona_sessions.json'
+PERSONA_SESSION_TTL_HOURS = 6     # 이 시간 동안 대화가 없으면 세션 종료
+PERSONA_MAX_SESSIONS = 200        # 동시 보관 세션 상한 (초과 시 가장 오래 쉰 세션부터 종료)
+PERSONA_HISTORY_LIMIT = 80        # 세션당 보관할 최대 메시지 수
+PERSONA_AUTO_HANDOFF = True       # 단계 결과 블록 감지 시 다음 단계로 자동 전달 (!persona auto on/off 로 개인 설정)
+
+# 공용 메시지 전송기 (utils/outbound.py)
+OUTBOUND_MAX_CHARS = 2000         # Discord 메시지 1개 글자 수 상한
+OUTBOUND_CHANNEL_BURST = 5        # 채널당 OUTBOUND_CHANNEL_WINDOW 초 동안 보낼 수 있는 메시지 수
+OUTBOUND_CHANNEL_WINDOW = 5.0     # 초
+
+# 런타임 계측 (utils/metrics.py, cogs/metrics_handler.py)
+METRICS_HOST = '127.0.0.1'        # Prometheus 노출 주소 (로컬 전용)
+METRICS_PORT = 9464               # GET /metrics — 0 이면 HTTP 노출 끔 (/metrics 명령어는 유지)
+LOOP_LAG_INTERVAL = 0.5           # 초 — 이벤트 루프 지연 감시 주기
+
+# 구조화 로깅 (utils/logger.py)
+LOG_LEVEL = 'INFO'
+LOG_FORMAT = 'json'               # 'json' (JSON lines) / 'text' (로컬 개발용 한 줄 요약)
+LOG_FILE = None                   # None 이면 stdout, 경로를 지정하면 파일에 추가
+LOG_QUEUE_SIZE = 10000            # 출력 대기 큐 상한 — 가득 차면 기다리지 않고 버림
+LOG_SAMPLE_RATES = {              # 메시지마다 생기는 이벤트는 일부만 기록 (WARNING 이상은 항상 기록)
+    'emotion.analyzed':   0.1,
+    'emotion.skipped':    0.1,
+    'reaction.added':     0.1,
+    'reaction.bot_reply': 0.1,
+    'chat.media_detected': 0.5,
+}
+LOG_LIBRARY_LEVELS = {            # 요청마다 INFO 를 남기는 라이브러리 로거 수준 조정
+    'httpx':        'WARNING',
+    'google_genai': 'WARNING',
+}
+
+# Gemini 토큰 / 비용 집계 (utils/usage.py) — 단가는 요금표 변경 시 갱신
+USAGE_FILE = 'data/usage.json'
+USAGE_FLUSH_INTERVAL = 60         # 초 — 바뀐 합계를 저장소에 기록하는 주기
+USAGE_PRICES = {                  # 모델 → (입력, 출력) 100만 토큰당 USD (thinking 토큰은 출력 단가)
+    'gemini-3-pro-preview':   (2.00, 12.00),
+    'gemini-3-flash-preview': (0.50, 3.00),
+    'gemini-2.5-flash':       (0.30, 2.50),
+    'gemini-2.5-flash-lite':  (0.10, 0.40),
+}
+USAGE_CACHED_INPUT_RATIO = 0.25   # 캐시된 입력 토큰은 입력 단가의 이 비율만 청구
+
+# 사용자별 Gemini 호출 한도 (utils/quota.py) + 사용자 간 공정 대기열 가중치 (utils/rate_limiter.py)
+USER_QUOTA_DEFAULT = {'rpm': 6, 'tpm': 60000, 'weight': 1.0}
+USER_QUOTA_ROLES = {              # 서버 역할 ID → 덮어쓸 항목 (여러 역할이면 항목별 최댓값)
+    # 123456789012345678: {'rpm': 20, 'tpm': 200000, 'weight': 3.0},
+}
+USER_QUOTA_MAX_WAIT = 20          # 초 — 한도가 이 안에 채워지지 않으면 기다리지 않고 "잠시 후" 안내
+USER_QUOTA_IDLE_SECONDS = 600     # 초 — 이만큼 호출이 없던 사용자의 버킷은 정리 (1분이면 가득 참)
+
+# 시작 순서 (bot.py setup_hook)
+DEFERRED_COGS = (                 # 게이트웨이 연결과 겹쳐 백그라운드에서 로드할 선택 Cog (빼면 setup_hook 에서 먼저 로드)
+    'PersonaHandler',
+    'Scheduler',
+    'WeatherHandler',
+)
+COMMAND_SYNC_FILE = 'data/command_sync.json'   # 범위별 마지막 슬래시 커맨드 동기화 해시 (같으면 시작 시 sync 생략)
@@ -0,0 +1,150 @@
+import json
+
+import pytest
+
+from utils.journal_store import JournalStore, read_json_records
+
+
+def _write_snapshot(path, records, collection='memories'):
+    path.write_text(json.dumps({collection: records}, ensure_ascii=False), encoding='utf-8')
+
+
+def _snapshot(path, collection='memories'):
+    return json.loads(path.read_text(encoding='utf-8'))[collection]
+
+
+@pytest.fixture
+def memo_file(tmp_path):
+    path = tmp_path / 'memories.json'
+    _write_snapshot(path, [
+        {'id': 1, 'content': '첫 메모'},
+        {'id': 8, 'content': '커피 좋아함'},
+        {'id': 8, 'content': '커피 좋아하는데 아이스만'},
+    ])
+    return path
+
+
+def test_duplicate_int_key_gets_fresh_key(memo_file):
+    records, dirty, conflicts = read_json_records(str(memo_file), 'memories', 'id')
+    assert sorted(records) == [1, 8, 9]
+    assert records[8]['content'] == '커피 좋아함'
+    assert records[9]['content'] == '커피 좋아하는데 아이스만'
+    assert dirty and not conflicts
+
+
+def test_duplicate_int_key_survives_close_and_reload(memo_file):
+    store = JournalStore(str(memo_file), 'memories', flush_interval=0.01)
+    assert len(store.load()) == 3
+    store.close()
+
+    assert sorted(r['id'] for r in _snapshot(memo_file)) == [1, 8, 9]
+    reloaded = JournalStore(str(memo_file), 'memories', flush_interval=0.01)
+    assert len(reloaded.load()) == 3
+    reloaded.close()
+
+
+def test_duplicate_non_int_key_keeps_snapshot(tmp_path):
+    path = tmp_path / 'subs.json'
+    original = [{'user_id': 'a', 'city': 'Seoul'}, {'user_id': 'a', 'city': 'Suwon'}]
+    _write_snapshot(path, original, collection='subscriptions')
+
+    store = JournalStore(str(path), 'subscriptions', key_field='user_id', flush_interval=0.01)
+    store.load()
+    store.put({'user_id': 'b', 'city': 'Busan'})
+    store.close()
+
+    # 원본 스냅샷은 그대로, 변경은 저널에 남아 다음 로드 때 재생
+    assert _snapshot(path, 'subscriptions') == original
+    records, _, conflicts = read_json_records(str(path), 'subscriptions', 'user_id')
+    assert conflicts == ['a']
+    assert records['b']['city'] == 'Busan'
+
+
+def _journal_lines(path):
+    journal = path.parent / (path.name + '.journal')
+    return journal.read_text(encoding='utf-8').splitlines() if journal.exists() else []
+
+
+def test_journal_replayed_after_crash(tmp_path):
+    path = tmp_path / 'memories.json'
+    store = JournalStore(str(path), 'memories', flush_interval=0.01)
+    store.load()
+    assert store.flush(timeout=5)   # 신규 파일 → 빈 스냅샷 생성까지 대기
+    store.put({'id': 1, 'content': '첫 메모'})
+    store.put({'id': 2, 'content': '두 번째'})
+    store.delete(1)
+    store.put({'id': 2, 'content': '두 번째 (수정)'})
+    assert store.flush(timeout=5)
+    # close() 없이 종료 — 스냅샷은 비어 있고 변경은 저널에만 있음
+    assert _snapshot(path) == []
+    assert len(_journal_lines(path)) == 4
+
+    records, dirty, _ = read_json_records(str(path), 'memories', 'id')
+    assert dirty
+    assert records == {2: {'id': 2, 'content': '두 번째 (수정)'}}
+
+
+def test_torn_journal_tail_is_ignored(tmp_path):
+    path = tmp_path / 'memories.json'
+    _write_snapshot(path, [{'id': 1, 'content': '첫 메모'}])
+    (tmp_path / 'memories.json.journal').write_text(
+        json.dumps({'op': 'put', 'key': 2, 'value': {'id': 2, 'content': '두 번째'}}) + '\n'
+        + '{"op": "put", "key": 3, "val', encoding='utf-8'
+    )
+
+    store = JournalStore(str(path), 'memories', flush_interval=0.01)
+    assert [r['id'] for r in store.load()] == [1, 2]
+    store.close()
+    # 로드 직후 압축 → 잘린 줄이 사라지고 스냅샷에 반영
+    assert [r['id'] for r in _snapshot(path)] == [1, 2]
+    assert _journal_lines(path) == []
+
+
+def test_compaction_after_compact_every_ops(tmp_path):
+    path = tmp_path / 'memories.json'
+    store = JournalStore(str(path), 'memories', flush_interval=0.01, compact_every=5)
+    store.load()
+    for i in range(1, 6):
+        store.put({'id': i, 'content': f'메모 {i}'})
+    assert store.flush(timeout=5)
+
+    assert [r['id'] for r in _snapshot(path)] == [1, 2, 3, 4, 5]
+    assert _journal_lines(path) == []
+
+    store.clear()
+    store.close()
+    assert _snapshot(path) == []
+
+
+def test_find_uses_index_after_updates(tmp_path):
+    store = JournalStore(str(tmp_path / 'schedules.json'), 'schedules',
+                         index_fields=('user_id',), flush_interval=0.01)
+    store.load()
+    store.put({'id': 1, 'user_id': 10, 'time': '09:00'})
+    store.put({'id': 2, 'user_id': 20, 'time': '08:00'})
+    store.put({'id': 3, 'user_id': 10, 'time': '07:00'})
+    store.put({'id': 1, 'user_id': 20, 'time': '09:00'})   # 사용자 변경 → 인덱스 이동
+    store.delete(3)
+
+    assert [r['id'] for r in store.find(user_id=20, order_by='time')] == [2, 1]
+    assert store.find(user_id=10) == []
+    store.close()
+
+
+def test_unreadable_snapshot_keeps_writes_in_journal(tmp_path):
+    path = tmp_path / 'memories.json'
+    path.write_text('{"memories": [', encoding='utf-8')
+    store = JournalStore(str(path), 'memories', flush_interval=0.01, compact_every=1)
+    with pytest.raises(json.JSONDecodeError):
+        store.load()
+
+    store.put({'id': 1, 'content': '새 메모'})
+    assert store.flush(timeout=5)
+    store.close()
+
+    # 손상된 스냅샷은 그대로, 변경은 저널에 남아 파일 정리 후 재생됨
+    assert path.read_text(encoding='utf-8') == '{"memories": ['
+    _write_snapshot(path, [{'id': 2, 'content': '복구한 메모'}])
+    reloaded = JournalStore(str(path), 'memories', flush_interval=0.01)
+    assert sorted(r['id'] for r in reloaded.load()) == [1, 2]
+    reloaded.close()
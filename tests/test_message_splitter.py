@@ -0,0 +1,71 @@
+import pytest
+
+from config.settings import OUTBOUND_MAX_CHARS
+from utils.message_splitter import MessageSplitter, StreamSplitter
+from benchmarks.bench_message_splitter import LegacyMessageSplitter
+
+
+# 줄 길이가 고른 목록 → v1 과 같은 줄 묶음 (빠른 경로)
+UNIFORM_LINES = [
+    'a\nb\nc\nd\ne',
+    '첫째\\n둘째\\n셋째\\n넷째',
+    '\n'.join(f'{i}. 오늘 할 일 목록 항목이에요' for i in range(1, 31)),
+    '하나\n둘',
+]
+
+
+@pytest.mark.parametrize('text', UNIFORM_LINES)
+def test_uniform_lines_match_v1(text):
+    assert MessageSplitter.smart_split(text) == LegacyMessageSplitter.smart_split(text)
+    assert MessageSplitter.split_by_lines(text) == LegacyMessageSplitter.split_by_lines(text)
+    assert list(MessageSplitter.iter_split(text)) == LegacyMessageSplitter.smart_split(text)
+
+
+def test_uneven_lines_balanced_by_length():
+    text = '\n'.join(['짧음', '짧음', '짧음', '이 줄은 앞의 세 줄을 합친 것보다 훨씬 길게 쓴 설명 줄입니다', '끝'])
+    assert MessageSplitter.smart_split(text) == [
+        '짧음\n짧음\n짧음', '이 줄은 앞의 세 줄을 합친 것보다 훨씬 길게 쓴 설명 줄입니다', '끝'
+    ]
+
+
+def test_short_reply_splits_at_korean_sentence_ends():
+    text = '오늘 날씨 진짜 좋다 ㅋㅋ 산책 갈래요 점심은 3.5 인분 먹었어'
+    assert MessageSplitter.smart_split(text) == ['오늘 날씨 진짜 좋다 ㅋㅋ', '산책 갈래요', '점심은 3.5 인분 먹었어']
+
+
+def test_empty_text_has_no_chunks():
+    assert MessageSplitter.smart_split('') == []
+    assert MessageSplitter.smart_split('  \n ') == []
+
+
+def test_short_lines_keep_v1_split_points():
+    assert MessageSplitter.smart_split('a\nb\nc\nd\ne') == ['a\nb', 'c\nd', 'e']
+
+
+def test_long_text_balanced_at_sentence_ends():
+    text = ' '.join('이건 꽤 긴 문장이에요. 중간에 3.5 같은 숫자도 있고요!' for _ in range(100))
+    assert len(text) > OUTBOUND_MAX_CHARS
+    chunks = MessageSplitter.smart_split(text)
+    assert len(chunks) == 3
+    assert ' '.join(chunks) == text
+    assert all(c.endswith(('요.', '요!')) for c in chunks)
+    assert max(map(len, chunks)) - min(map(len, chunks)) < 100
+
+
+def test_long_lines_keep_every_line():
+    lines = [f'{i}. 오늘 할 일 목록 항목이에요 — 세부 설명 조금 더 길게 적어 둠' for i in range(1, 101)]
+    text = '\n'.join(lines)
+    assert len(text) > OUTBOUND_MAX_CHARS
+    chunks = MessageSplitter.smart_split(text)
+    assert len(chunks) == 3
+    assert '\n'.join(chunks).split('\n') == lines
+
+
+def test_stream_splitter_emits_at_boundaries():
+    text = '첫 문장이에요. 두 번째 문장이에요.\n세 번째 줄이에요'
+    splitter = StreamSplitter(min_chars=5)
+    chunks = []
+    for i in range(0, len(text), 3):
+        chunks += splitter.feed(text[i:i + 3])
+    chunks += splitter.flush()
+    assert chunks == ['첫 문장이에요.', '두 번째 문장이에요.', '세 번째 줄이에요']
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import cogs.persona_handler as persona_handler
+from cogs.persona_handler import PersonaHandler, PersonaSessionStore
+
+EXTRACTION_BLOCK = "### [Extraction Result]\n- **Goal:** 블로그 글 요약\n- **Target Audience:** 개발자"
+EXTRACTION_REPLY = f"정리했어요.\n\n---\n{EXTRACTION_BLOCK}\n---\n다음 단계로 넘어가세요."
+STRATEGY_REPLY = "---\n### 🛠 선택된 프롬프트 전략\n\n**1. 적용 기법 (Techniques)**\n- CoT\n\n--\n**[Next Step]**\n복사하세요."
+
+
+@pytest.fixture
+def handler(tmp_path, monkeypatch):
+    store = PersonaSessionStore(str(tmp_path / 'sessions.json'))
+    monkeypatch.setattr(persona_handler, 'PersonaSessionStore', lambda: store)
+    handler = PersonaHandler(bot=None, api_key='', client=object())
+
+    async def sent(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(handler, '_send_reply', sent)
+    handler.store.start(1, 'extraction')
+    handler.store.append(1, '블로그 요약 프롬프트', EXTRACTION_REPLY)
+    yield handler
+    handler.store.close()
+
+
+def _handoff(handler, reply=EXTRACTION_REPLY, text='블로그 요약 프롬프트', module='extraction', artifacts=None):
+    async def run():
+        done = asyncio.get_running_loop().create_future()
+        done.set_result(None)
+        sending = await handler._auto_handoff(None, 1, module, text, reply, artifacts or {}, done)
+        await sending
+    asyncio.run(run())
+
+
+def test_failed_generation_keeps_previous_stage(handler, monkeypatch):
+    def fail(history, text):
+        raise RuntimeError("503")
+
+    monkeypatch.setattr(handler.sessions['technique'], 'generate', fail)
+    with pytest.raises(RuntimeError):
+        _handoff(handler)
+
+    record = handler.store.get(1)
+    assert record['module'] == 'extraction'
+    assert len(record['history']) == 2
+
+
+def test_successful_generation_moves_to_next_stage(handler, monkeypatch):
+    monkeypatch.setattr(handler.sessions['technique'], 'generate', lambda history, text: "전략 검토 중")
+    _handoff(handler)
+
+    record = handler.store.get(1)
+    assert record['module'] == 'technique'
+    assert record['artifacts']['extraction'].startswith('### [Extraction Result]')
+    assert [turn['role'] for turn in record['history']] == ['user', 'model']
+
+
+def test_session_ended_during_generation_is_not_restarted(handler, monkeypatch):
+    def generate(history, text):
+        handler.store.end(1)
+        return "전략 검토 중"
+
+    monkeypatch.setattr(handler.sessions['technique'], 'generate', generate)
+    _handoff(handler)
+    assert handler.store.get(1) is None
+
+
+def test_session_restarted_during_generation_is_not_overwritten(handler, monkeypatch):
+    def generate(history, text):
+        handler.store.start(1, 'generator')
+        return "전략 검토 중"
+
+    monkeypatch.setattr(handler.sessions['technique'], 'generate', generate)
+    _handoff(handler)
+
+    record = handler.store.get(1)
+    assert record['module'] == 'generator'
+    assert record['history'] == [] and record['artifacts'] == {}
+
+
+def test_auto_turned_off_during_generation_stops_handoff(handler, monkeypatch):
+    def generate(history, text):
+        handler.store.set_auto(1, False)
+        return "전략 검토 중"
+
+    monkeypatch.setattr(handler.sessions['technique'], 'generate', generate)
+    _handoff(handler)
+    assert handler.store.get(1)['module'] == 'extraction'
+
+
+def test_pasted_extraction_result_is_handed_off(handler, monkeypatch):
+    seen = []
+    monkeypatch.setattr(handler.sessions['technique'], 'generate', lambda history, text: seen.append(text) or "검토 중")
+    _handoff(handler, reply="좋아요, 이 내용으로 진행할까요?", text=f"이거 써 주세요\n---\n{EXTRACTION_BLOCK}\n---")
+
+    assert seen == [EXTRACTION_BLOCK]
+    assert handler.store.get(1)['module'] == 'technique'
+
+
+def test_pasted_extraction_in_manual_technique_session_reaches_generator(handler, monkeypatch):
+    seen = []
+    monkeypatch.setattr(handler.sessions['generator'], 'generate', lambda history, text: seen.append(text) or "최종 프롬프트")
+    handler.store.start(1, 'technique')
+    artifacts = handler._collect_pasted(f"---\n{EXTRACTION_BLOCK}\n---", {})
+    handler.store.append(1, '추출 결과 붙여넣기', '어떤 어조를 원하세요?', artifacts=artifacts)
+
+    _handoff(handler, reply=STRATEGY_REPLY, text='친근하게요', module='technique',
+             artifacts=dict(handler.store.get(1)['artifacts']))
+
+    assert seen[0].startswith(EXTRACTION_BLOCK)
+    assert '선택된 프롬프트 전략' in seen[0]
+    assert handler.store.get(1)['module'] == 'generator'
+
+
+class _AsyncNull:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+class FakeChannel:
+    id = persona_handler.CHANNEL_PERSONA
+
+    def typing(self):
+        return _AsyncNull()
+
+    async def send(self, *args, **kwargs):
+        return None
+
+
+def test_messages_from_same_user_are_processed_in_order(handler, monkeypatch):
+    handler.store.start(1, 'extraction')
+    seen = []
+    first_started = threading.Event()
+    release_first = threading.Event()
+
+    def generate(history, text):
+        seen.append((text, len(history)))
+        if text == '첫 번째':
+            first_started.set()
+            release_first.wait(5)
+        return f"{text} 답장"
+
+    monkeypatch.setattr(handler.sessions['extraction'], 'generate', generate)
+    channel = FakeChannel()
+    author = SimpleNamespace(id=1, bot=False, roles=())
+
+    def message(text):
+        return SimpleNamespace(author=author, channel=channel, content=text)
+
+    async def main():
+        first = asyncio.create_task(handler.on_message(message('첫 번째')))
+        await asyncio.to_thread(first_started.wait, 5)
+        second = asyncio.create_task(handler.on_message(message('두 번째')))
+        await asyncio.sleep(0.05)
+        release_first.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(main())
+    # 두 번째 메시지는 첫 번째 턴이 기록된 히스토리로 생성
+    assert seen == [('첫 번째', 0), ('두 번째', 2)]
+    assert len(handler.store.get(1)['history']) == 4
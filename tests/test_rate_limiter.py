@@ -0,0 +1,78 @@
+import asyncio
+import contextvars
+import time
+
+import pytest
+
+from utils.rate_limiter import Priority, RateLimiter, RateLimitTimeout, bind_requester
+
+MODEL = 'gemini-test'
+
+
+def _limiter(rpm=600, tpm=1_000_000, headroom=None):
+    return RateLimiter({MODEL: (rpm, tpm)}, (10, 10_000), headroom or {})
+
+
+def _drain(limiter, n):
+    for _ in range(n):
+        limiter.acquire(MODEL, 0, Priority.CHAT, timeout=1)
+
+
+def test_burst_up_to_capacity_then_timeout():
+    limiter = _limiter(rpm=5)
+    start = time.monotonic()
+    _drain(limiter, 5)
+    assert time.monotonic() - start < 0.1
+
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(MODEL, 0, Priority.CHAT, timeout=0.05)
+
+
+def test_token_bucket_limits_large_prompts():
+    limiter = _limiter(tpm=1000)
+    limiter.acquire(MODEL, 900, timeout=0.1)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(MODEL, 500, timeout=0.05)
+
+
+def test_oversized_request_passes_when_bucket_full():
+    limiter = _limiter(tpm=1000)
+    limiter.acquire(MODEL, 5000, timeout=0.1)
+    assert limiter.snapshot()[MODEL]['tpm'] < 0
+
+
+def test_settle_refunds_overestimate():
+    limiter = _limiter(tpm=1000)
+    limiter.acquire(MODEL, 900, timeout=0.1)
+    limiter.settle(MODEL, 900, 100)
+    limiter.acquire(MODEL, 500, timeout=0.05)
+
+
+def test_lower_priority_keeps_headroom():
+    limiter = _limiter(rpm=10, headroom={'background': 0.5})
+    _drain(limiter, 5)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(MODEL, 0, Priority.BACKGROUND, timeout=0.05)
+    # 사용자 답장은 남은 여유분 사용 가능
+    limiter.acquire(MODEL, 0, Priority.CHAT, timeout=0.05)
+
+
+def test_fair_queue_lets_light_user_ahead():
+    limiter = _limiter(rpm=600)
+    _drain(limiter, 600)
+    granted = []
+
+    async def request(user_id):
+        bind_requester(user_id)
+        await limiter.acquire_async(MODEL, 100, Priority.CHAT, timeout=5)
+        granted.append(user_id)
+
+    async def main():
+        # 사용자 1 이 3건을 먼저 몰아 보낸 뒤 사용자 2 가 1건
+        tasks = [asyncio.create_task(request(1), context=contextvars.copy_context()) for _ in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request(2), context=contextvars.copy_context()))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert granted == [1, 2, 1, 1]
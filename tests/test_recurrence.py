@@ -0,0 +1,106 @@
+from datetime import datetime
+
+import pytest
+
+from utils.recurrence import CronRule, RRule, parse_recurrence
+
+# 2026-10-19 은 월요일
+ANCHOR = datetime(2026, 10, 19, 9, 0)
+
+
+def _next(expr, after, anchor=ANCHOR):
+    return parse_recurrence(expr).next_after(after, anchor)
+
+
+def test_before_anchor_returns_anchor():
+    assert _next('daily', datetime(2026, 10, 1)) == ANCHOR
+
+
+@pytest.mark.parametrize('expr', ['daily', '매일', 'FREQ=DAILY', 'RRULE:FREQ=DAILY'])
+def test_daily_aliases(expr):
+    assert _next(expr, datetime(2026, 10, 21, 10, 0)) == datetime(2026, 10, 22, 9, 0)
+
+
+def test_occurrence_time_is_exclusive():
+    assert _next('daily', ANCHOR) == datetime(2026, 10, 20, 9, 0)
+
+
+def test_fixed_step_skips_arithmetically():
+    rule = parse_recurrence('FREQ=MINUTELY;INTERVAL=7')
+    after = datetime(2036, 10, 19, 9, 0)
+    nxt = rule.next_after(after, ANCHOR)
+    assert nxt > after
+    assert (nxt - ANCHOR).total_seconds() % (7 * 60) == 0
+    assert (nxt - after).total_seconds() <= 7 * 60
+
+
+def test_weekdays_skip_weekend():
+    # 금요일 9시 이후 → 다음 월요일
+    assert _next('weekdays', datetime(2026, 10, 23, 9, 0)) == datetime(2026, 10, 26, 9, 0)
+
+
+def test_weekly_interval_with_byday():
+    rule = 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE'
+    assert _next(rule, ANCHOR) == datetime(2026, 10, 21, 9, 0)
+    # 다음 주는 건너뛰고 그다음 주 월요일
+    assert _next(rule, datetime(2026, 10, 21, 9, 0)) == datetime(2026, 11, 2, 9, 0)
+
+
+def test_monthly_skips_missing_days():
+    anchor = datetime(2026, 1, 31, 8, 30)
+    assert _next('monthly', anchor, anchor) == datetime(2026, 3, 31, 8, 30)
+
+
+def test_until_ends_rule():
+    rule = 'FREQ=DAILY;UNTIL=2026-10-20T23:59'
+    assert _next(rule, ANCHOR) == datetime(2026, 10, 20, 9, 0)
+    assert _next(rule, datetime(2026, 10, 20, 9, 0)) is None
+
+
+def test_rrule_fields_parsed():
+    rule = parse_recurrence('freq=weekly;byday=fr,mo;count=3')
+    assert isinstance(rule, RRule)
+    assert (rule.freq, rule.byday, rule.count) == ('WEEKLY', [0, 4], 3)
+
+
+def test_cron_weekdays_at_nine():
+    rule = parse_recurrence('cron 0 9 * * 1-5')
+    assert isinstance(rule, CronRule)
+    # 토요일 → 월요일 9시
+    assert rule.next_after(datetime(2026, 10, 24, 12, 0), ANCHOR) == datetime(2026, 10, 26, 9, 0)
+
+
+def test_cron_without_prefix_and_sunday_as_seven():
+    assert _next('30 7 * * 7', ANCHOR) == datetime(2026, 10, 25, 7, 30)
+
+
+def test_cron_day_of_month_or_weekday():
+    # 일/요일 둘 다 지정 → OR (1일 또는 일요일)
+    assert _next('cron 0 0 1 * 0', ANCHOR) == datetime(2026, 10, 25, 0, 0)
+
+
+def test_cron_sparse_leap_day():
+    assert _next('cron 0 0 29 2 *', ANCHOR) == datetime(2028, 2, 29, 0, 0)
+
+
+def test_cron_steps_and_lists():
+    rule = parse_recurrence('cron */15 9,18 * * *')
+    assert rule.next_after(datetime(2026, 10, 19, 9, 50), ANCHOR) == datetime(2026, 10, 19, 18, 0)
+
+
+@pytest.mark.parametrize('expr', [
+    '',
+    'yearly',
+    'FREQ=YEARLY',
+    'FREQ=DAILY;BYDAY=MO',
+    'FREQ=WEEKLY;BYDAY=XX',
+    'FREQ=DAILY;INTERVAL=0',
+    'FREQ=DAILY;UNTIL=내일',
+    'FREQ=DAILY;BYMONTH=1',
+    'cron 61 * * * *',
+    'cron 0 9 * *',
+    'cron a b c d e',
+])
+def test_invalid_rules_raise_value_error(expr):
+    with pytest.raises(ValueError):
+        parse_recurrence(expr)
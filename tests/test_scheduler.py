@@ -0,0 +1,251 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import cogs.scheduler as scheduler
+from cogs.scheduler import Scheduler, ScheduleManager
+
+BASE = datetime(2026, 10, 19, 9, 0)   # 월요일
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+
+class FakeBot:
+    async def wait_until_ready(self):
+        return None
+
+    def get_channel(self, channel_id):
+        return FakeChannel(channel_id)
+
+
+class FakeOutbound:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, channel, text, **kwargs):
+        self.sent.append((channel.id, text, time.time()))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ScheduleManager(str(tmp_path / 'schedules.json'))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def cog(manager, monkeypatch):
+    sent = FakeOutbound()
+    monkeypatch.setattr(scheduler, 'ScheduleManager', lambda: manager)
+    monkeypatch.setattr(scheduler, 'outbound', sent)
+    cog = Scheduler(FakeBot())
+    cog.sent = sent.sent
+    return cog
+
+
+def _add(manager, when, message='알림', repeats=None, channel_id=100):
+    return manager.add(channel_id, 1, when, message, repeats)
+
+
+# ── heap 디스패처: ScheduleManager ─────────────────────────────────
+def test_next_due_at_is_earliest(manager):
+    assert manager.next_due_at() is None
+    _add(manager, BASE + timedelta(hours=2))
+    _add(manager, BASE + timedelta(hours=1))
+    assert manager.next_due_at() == (BASE + timedelta(hours=1)).timestamp()
+
+
+def test_pop_due_returns_each_schedule_once_in_order(manager):
+    late = _add(manager, BASE + timedelta(minutes=2), '두 번째')
+    early = _add(manager, BASE + timedelta(minutes=1), '첫 번째')
+    future = _add(manager, BASE + timedelta(hours=1), '나중')
+
+    now = (BASE + timedelta(minutes=5)).timestamp()
+    assert [s['id'] for s in manager.pop_due_schedules(now)] == [early['id'], late['id']]
+    assert manager.pop_due_schedules(now) == []
+    assert manager.next_due_at() == datetime.fromisoformat(future['time']).timestamp()
+
+
+def test_delete_invalidates_heap_entry_lazily(manager):
+    first = _add(manager, BASE + timedelta(minutes=1))
+    second = _add(manager, BASE + timedelta(minutes=2))
+    assert manager.delete(first['id'], user_id=1) is not None
+    assert len(manager._heap) == 2   # heap 항목은 남아 있고 조회 시 제거
+
+    assert manager.next_due_at() == datetime.fromisoformat(second['time']).timestamp()
+    assert len(manager._heap) == 1
+    due = manager.pop_due_schedules((BASE + timedelta(hours=1)).timestamp())
+    assert [s['id'] for s in due] == [second['id']]
+
+
+def test_delete_by_other_user_is_refused(manager):
+    s = _add(manager, BASE + timedelta(minutes=1))
+    assert manager.delete(s['id'], user_id=2) is None
+    assert manager.get(s['id']) is not None
+
+
+def test_reschedule_replaces_old_heap_entry(manager):
+    s = _add(manager, BASE, repeats='daily')
+    manager.reschedule(s, now=BASE + timedelta(minutes=1))
+
+    assert manager.get(s['id'])['time'] == (BASE + timedelta(days=1)).isoformat()
+    # 오늘 09:00 항목은 stale → 꺼내지 않음
+    assert manager.pop_due_schedules((BASE + timedelta(hours=1)).timestamp()) == []
+    assert manager.next_due_at() == (BASE + timedelta(days=1)).timestamp()
+
+
+def test_reschedule_removes_finished_rule(manager):
+    s = _add(manager, BASE, repeats='FREQ=DAILY;COUNT=2')
+    manager.reschedule(s, now=BASE)
+    again = manager.pop_due_schedules((BASE + timedelta(days=1, hours=1)).timestamp())[0]
+    assert manager.reschedule(again, now=BASE + timedelta(days=1)) is None
+    assert manager.get(s['id']) is None
+    assert manager.next_due_at() is None
+
+
+def test_heap_rebuilt_from_store_on_reload(tmp_path, manager):
+    _add(manager, BASE + timedelta(minutes=3))
+    _add(manager, BASE + timedelta(minutes=1), repeats='hourly')
+    manager.close()
+
+    reloaded = ScheduleManager(str(tmp_path / 'schedules.json'))
+    assert reloaded.next_due_at() == (BASE + timedelta(minutes=1)).timestamp()
+    assert reloaded.add(100, 1, BASE, '새 예약')['id'] == 3
+    reloaded.close()
+
+
+# ── heap 디스패처: 대기 / 깨우기 ───────────────────────────────────
+def _run_dispatcher(cog, body):
+    async def main():
+        await cog.cog_load()
+        try:
+            await asyncio.sleep(0.05)   # 디스패처가 대기 상태로 들어갈 때까지
+            await body()
+        finally:
+            cog._dispatch_task.cancel()
+    asyncio.run(main())
+
+
+def test_dispatcher_wakes_for_earlier_schedule(cog, manager):
+    async def body():
+        _add(manager, datetime.now() + timedelta(hours=1), '나중')
+        cog._notify_scheduled(datetime.now() + timedelta(hours=1))
+        await asyncio.sleep(0.05)
+
+        due = datetime.now() + timedelta(seconds=0.2)
+        _add(manager, due, '곧')
+        cog._notify_scheduled(due)
+        await asyncio.sleep(0.5)
+
+        assert [text for _, text, _ in cog.sent] == ['곧']
+        assert 0 <= cog.sent[0][2] - due.timestamp() < 0.2
+
+    _run_dispatcher(cog, body)
+    assert [s['message'] for s in manager.schedules] == ['나중']
+
+
+def test_dispatcher_reschedules_repeating_schedule(cog, manager):
+    async def body():
+        due = datetime.now() + timedelta(seconds=0.1)
+        s = _add(manager, due, '매분', repeats='FREQ=MINUTELY')
+        cog._notify_scheduled(due)
+        await asyncio.sleep(0.4)
+
+        assert [text for _, text, _ in cog.sent] == ['매분']
+        assert manager.get(s['id'])['time'] == (due + timedelta(minutes=1)).isoformat()
+
+    _run_dispatcher(cog, body)
+
+
+# ── 놓친 예약 보정 (다운타임 3일) ─────────────────────────────────
+NOW = BASE + timedelta(days=3, hours=1)   # 목요일 10:00
+
+
+@pytest.fixture
+def offline(manager):
+    """월요일 09:00 부터 목요일 10:00 까지 꺼져 있던 상황"""
+    ids = {
+        'once':   _add(manager, BASE + timedelta(hours=1), '일회성', channel_id=100)['id'],
+        'daily':  _add(manager, BASE, '매일', repeats='daily', channel_id=100)['id'],
+        'hourly': _add(manager, BASE, '매시간', repeats='hourly', channel_id=200)['id'],
+        'count':  _add(manager, BASE, '두 번만', repeats='FREQ=DAILY;COUNT=2', channel_id=200)['id'],
+        'future': _add(manager, NOW + timedelta(hours=1), '나중', channel_id=100)['id'],
+    }
+    return ids
+
+
+def test_reconcile_missed_across_days(manager, offline):
+    missed = {s['id']: (occurrences, total) for s, occurrences, total in manager.reconcile_missed(now=NOW)}
+
+    assert set(missed) == {offline['once'], offline['daily'], offline['hourly'], offline['count']}
+    assert missed[offline['once']] == ([BASE + timedelta(hours=1)], 1)
+    assert missed[offline['daily']] == ([BASE + timedelta(days=d) for d in range(4)], 4)
+    assert missed[offline['count']] == ([BASE, BASE + timedelta(days=1)], 2)
+    # 끝없는 규칙은 최대 SCHEDULE_MISSED_MAX_PER_ITEM 개만 나열하고 나머지는 건너뜀
+    occurrences, total = missed[offline['hourly']]
+    assert occurrences == [BASE + timedelta(hours=h) for h in range(5)] and total == 5
+
+    # 일회성 / 끝난 반복은 삭제, 반복은 NOW 이후 다음 발생으로, 미래 예약은 그대로
+    assert manager.get(offline['once']) is None
+    assert manager.get(offline['count']) is None
+    assert manager.get(offline['daily'])['time'] == (BASE + timedelta(days=4)).isoformat()
+    assert manager.get(offline['daily'])['fired'] == 4
+    assert manager.get(offline['hourly'])['time'] == NOW.isoformat()
+    assert manager.get(offline['future'])['time'] == (NOW + timedelta(hours=1)).isoformat()
+    assert manager.reconcile_missed(now=NOW) == []
+
+
+def test_reconcile_missed_respects_grace(manager):
+    s = _add(manager, NOW - timedelta(seconds=30))
+    assert manager.reconcile_missed(now=NOW, grace_seconds=60) == []
+    assert manager.get(s['id']) is not None
+
+
+def _catch_up(cog, manager, monkeypatch, policy):
+    monkeypatch.setattr(scheduler, 'SCHEDULE_MISSED_POLICY', policy)
+    reconcile = manager.reconcile_missed
+    monkeypatch.setattr(manager, 'reconcile_missed', lambda: reconcile(now=NOW))
+    asyncio.run(cog._catch_up_missed())
+    return [(channel_id, text) for channel_id, text, _ in cog.sent]
+
+
+def test_send_policy_sends_every_listed_occurrence(cog, manager, offline, monkeypatch):
+    sent = _catch_up(cog, manager, monkeypatch, 'send')
+
+    assert len(sent) == 1 + 4 + 5 + 2
+    assert all(text.startswith('⏰ *지연 전송') for _, text in sent)
+    daily = [text for _, text in sent if text.endswith('\n매일')]
+    assert daily == [f"⏰ *지연 전송 — 예약 시각 10-{d} 09:00*\n매일" for d in (19, 20, 21, 22)]
+    assert manager.get(offline['once']) is None
+
+
+def test_coalesce_policy_sends_one_summary_per_channel(cog, manager, offline, monkeypatch):
+    sent = dict(_catch_up(cog, manager, monkeypatch, 'coalesce'))
+
+    assert set(sent) == {100, 200}
+    assert sent[100].startswith('⏰ 봇이 오프라인이던 동안 놓친 예약 메시지 2건')
+    assert '`10-19 10:00` 일회성' in sent[100]
+    assert '`10-19 09:00` (×4) 매일' in sent[100]
+    assert '`10-19 09:00` (×5+) 매시간' in sent[200]
+    assert '`10-19 09:00` (×2) 두 번만' in sent[200]
+    assert manager.get(offline['daily'])['time'] == (BASE + timedelta(days=4)).isoformat()
+
+
+def test_drop_policy_only_reports_skipped_ids(cog, manager, offline, monkeypatch):
+    sent = dict(_catch_up(cog, manager, monkeypatch, 'drop'))
+
+    assert sent[100] == (f"⚠️ 봇이 오프라인이던 동안 예약 2건(ID: {offline['daily']}, {offline['once']})이 "
+                         "전송되지 못해 건너뛰었습니다.")
+    assert '2건' in sent[200]
+    assert manager.get(offline['once']) is None
+    assert manager.get(offline['hourly'])['time'] == NOW.isoformat()
+
+
+def test_unknown_policy_falls_back_to_coalesce(cog, manager, offline, monkeypatch):
+    sent = dict(_catch_up(cog, manager, monkeypatch, 'resend'))
+    assert sent[100].startswith('⏰ 봇이 오프라인이던 동안 놓친 예약 메시지')
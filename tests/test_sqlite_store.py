@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+from utils.sqlite_store import SQLiteStore
+
+
+def _write_snapshot(path, records, collection='schedules'):
+    path.write_text(json.dumps({collection: records}, ensure_ascii=False), encoding='utf-8')
+
+
+def _snapshot(path, collection='schedules'):
+    return json.loads(path.read_text(encoding='utf-8'))[collection]
+
+
+def _open(tmp_path, json_path):
+    store = SQLiteStore(str(tmp_path / 'peanut.db'), str(json_path), 'schedules',
+                        index_fields=('user_id',))
+    store.load()
+    return store
+
+
+@pytest.fixture
+def json_path(tmp_path):
+    path = tmp_path / 'schedules.json'
+    _write_snapshot(path, [
+        {'id': 1, 'user_id': 10, 'message': '물 마시기'},
+        {'id': 2, 'user_id': 20, 'message': '회의'},
+    ])
+    return path
+
+
+def test_reads_do_not_wait_for_worker(tmp_path, json_path, monkeypatch):
+    store = _open(tmp_path, json_path)
+
+    def blocked(*args, **kwargs):
+        raise AssertionError("조회가 전용 스레드를 기다림")
+
+    monkeypatch.setattr(store._worker, 'call', blocked)
+    store.put({'id': 3, 'user_id': 10, 'message': '산책'})
+    assert store.get(1)['message'] == '물 마시기'
+    assert [r['id'] for r in store.find(user_id=10)] == [1, 3]
+    assert len(store) == 3
+
+
+def test_close_exports_snapshot(tmp_path, json_path):
+    store = _open(tmp_path, json_path)
+    store.delete(2)
+    store.close()
+    assert [r['id'] for r in _snapshot(json_path)] == [1]
+
+
+def test_old_snapshot_not_reimported_after_crash(tmp_path, json_path):
+    store = _open(tmp_path, json_path)
+    store.clear()
+    store.flush()
+    # close() 없이 종료된 상황 — JSON 은 가져올 때 그대로
+
+    reopened = _open(tmp_path, json_path)
+    assert reopened.all() == []
+
+
+def test_newer_snapshot_is_reimported(tmp_path, json_path):
+    store = _open(tmp_path, json_path)
+    store.close()
+
+    # 저널 백엔드로 돌아가서 JSON 만 갱신된 상황
+    _write_snapshot(json_path, [{'id': 5, 'user_id': 10, 'message': '새 예약'}])
+    mtime = os.path.getmtime(json_path) + 10
+    os.utime(json_path, (mtime, mtime))
+
+    reopened = _open(tmp_path, json_path)
+    assert [r['id'] for r in reopened.all()] == [5]
+
+
+def test_failed_import_does_not_overwrite_json(tmp_path):
+    json_path = tmp_path / 'schedules.json'
+    json_path.write_text('{"schedules": [', encoding='utf-8')
+    store = SQLiteStore(str(tmp_path / 'peanut.db'), str(json_path), 'schedules', index_fields=('user_id',))
+    with pytest.raises(json.JSONDecodeError):
+        store.load()
+
+    store.put({'id': 1, 'user_id': 10, 'message': '메모리에만'})
+    store.close()
+    assert json_path.read_text(encoding='utf-8') == '{"schedules": ['
+
+    # JSON 을 고치면 다음 실행에서 정상적으로 가져옴 (실패한 실행의 쓰기로 DB 가 채워지지 않음)
+    _write_snapshot(json_path, [{'id': 2, 'user_id': 20, 'message': '회의'}])
+    reopened = _open(tmp_path, json_path)
+    assert [r['id'] for r in reopened.all()] == [2]
+    reopened.close()
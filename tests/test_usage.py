@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from utils.journal_store import JournalStore
+from utils.usage import UsageTracker
+
+
+def _response(prompt=100, output=10):
+    return SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=prompt, candidates_token_count=output))
+
+
+def _store(tmp_path):
+    return JournalStore(str(tmp_path / 'usage.json'), 'usage')
+
+
+def _calls(tracker):
+    return {key: totals['calls'] for key, totals in tracker.totals('model')}
+
+
+def test_second_open_does_not_double_totals(tmp_path):
+    tracker = UsageTracker()
+    tracker.record('flash', 'chat', _response(), 0.1)
+    store = _store(tmp_path)
+    tracker.open(store)
+    tracker.flush()
+    store.flush()
+    tracker.open(_store(tmp_path))
+    assert _calls(tracker) == {'flash': 1}
+    tracker.close()
+
+
+def test_reopen_after_close_restores_totals(tmp_path):
+    tracker = UsageTracker()
+    tracker.open(_store(tmp_path))
+    tracker.record('flash', 'chat', _response(), 0.1)
+    tracker.close()
+
+    tracker.record('flash', 'chat', _response(), 0.1)   # 닫혀 있는 동안의 호출도 유지
+    tracker.open(_store(tmp_path))
+    assert _calls(tracker) == {'flash': 2}
+    assert tracker.totals('model')[0][1]['prompt'] == 200
+    tracker.close()
@@ -0,0 +1,95 @@
+"""
+슬래시 커맨드 동기화 (v1.0)
+
+시작할 때마다 서버(guild) / 전역 트리를 둘 다 Discord 에 올리던 것을
+커맨드 구성이 바뀐 경우에만 올리도록 합니다. (sync 는 요청 제한이 빡빡한 API — 재시작이 잦으면 429)
+
+[구조]
+- tree_hash(): 트리가 Discord 로 보낼 payload(to_dict)를 이름순 정렬 → JSON → sha256
+  (Cog 로드 순서가 달라도 같은 구성이면 같은 해시)
+- 범위(application_id + guild / global)마다 마지막으로 올린 해시를 저장소에 보관 (COMMAND_SYNC_FILE)
+- 해시가 같으면 건너뜀, 다르거나 기록이 없으면 sync 후 해시 기록 (실패하면 기록하지 않음 → 다음 시작 때 재시도)
+- force=True (/sync): 해시와 무관하게 올림 — Discord 쪽이 다른 경로로 바뀐 경우 복구용
+
+[사용]
+    command_sync = CommandSync(bot.tree, guild=discord.Object(id=SERVER_ID))
+    await command_sync.sync_all()             # 시작 시
+    await command_sync.sync_all(force=True)   # /sync
+"""
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import discord
+from discord import app_commands
+
+from config.settings import COMMAND_SYNC_FILE
+from utils.storage import open_store
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+COMMAND_SYNC_TOTAL = 'peanut_command_sync_total'
+
+
+def tree_hash(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """guild(None = 전역) 범위에 등록될 커맨드 payload 의 해시"""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+                     key=lambda data: (data.get('type', 1), data['name']))
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class CommandSync:
+    """범위별 마지막 동기화 해시를 기억하고, 바뀐 범위만 sync"""
+
+    def __init__(self, tree: app_commands.CommandTree, guild: discord.abc.Snowflake,
+                 filepath: str = COMMAND_SYNC_FILE):
+        self.tree = tree
+        self.guild = guild
+        self._store = open_store(filepath, collection="scopes", key_field="scope")
+        try:
+            self._store.load()
+        except Exception as e:
+            log.warning("commands.sync_state_load_failed", "⚠️ 커맨드 동기화 기록 로드 실패 (전체 동기화)", error=str(e))
+
+    def _scope(self, guild: Optional[discord.abc.Snowflake]) -> str:
+        # 봇(애플리케이션)이 바뀌면 기록도 따로 — 개발 / 운영 봇이 data/ 를 공유해도 안전
+        return f"{self.tree.client.application_id}:{guild.id if guild else 'global'}"
+
+    async def sync(self, guild: Optional[discord.abc.Snowflake] = None,
+                   force: bool = False) -> Optional[List[app_commands.AppCommand]]:
+        """바뀌었거나 force 면 sync 후 결과 목록, 건너뛰면 None (실패 시 예외 그대로)"""
+        scope = self._scope(guild)
+        digest = tree_hash(self.tree, guild)
+        record = self._store.get(scope)
+        if not force and record is not None and record.get('hash') == digest:
+            metrics.inc(COMMAND_SYNC_TOTAL, outcome='skipped')
+            return None
+
+        synced = await self.tree.sync(guild=guild)
+        self._store.put({
+            "scope": scope,
+            "hash": digest,
+            "count": len(synced),
+            "synced_at": datetime.now().isoformat(),
+        })
+        metrics.inc(COMMAND_SYNC_TOTAL, outcome='forced' if force else 'changed')
+        return synced
+
+    async def sync_all(self, force: bool = False) -> Dict[str, Optional[List[app_commands.AppCommand]]]:
+        """전역 커맨드를 서버로 복사 → 전역은 비움 → 두 범위 동시 동기화 (범위별 결과 / 예외)"""
+        # Guild 커맨드를 전역 커맨드와 동일하게 복사 (Discord 반영 즉시), 전역은 비워서 중복 표시 방지
+        self.tree.copy_global_to(guild=self.guild)
+        self.tree.clear_commands(guild=None)
+
+        guild_result, global_result = await asyncio.gather(
+            self.sync(self.guild, force=force), self.sync(None, force=force), return_exceptions=True
+        )
+        return {'guild': guild_result, 'global': global_result}
+
+    def close(self):
+        self._store.close()
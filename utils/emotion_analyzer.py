@@ -1,5 +1,5 @@
 """
-감정 분석 유틸리티 (v1.1)
+감정 분석 유틸리티 (v1.5)
 
 Gemini API를 사용해 메시지의 감정을 분석하고
 Discord 이모지 리액션 목록을 반환합니다.
@@ -14,16 +14,39 @@ Discord 이모지 리액션 목록을 반환합니다.
 - FIX: ANALYSIS_MODEL 하드코딩 제거
        → GeminiClient 인스턴스를 직접 참조하여
          /model 변경 시 감정 분석 모델도 자동으로 동기화
+
+[v1.2 변경]
+- FEATURE: 공용 속도 제한기(REACTION 우선순위) 적용
+  한도가 빠듯하면 RATE_LIMIT_REACTION_MAX_WAIT 만 기다리고 리액션 생략 → 답장에 양보
+
+[v1.3 변경]
+- PERF: 전용 genai.Client 대신 공용 클라이언트 사용 (utils/genai_pool, client 인자로 주입 가능)
+
+[v1.4 변경]
+- utils/metrics 계측: emotion/api (API 호출만), emotion/total (한도 대기 포함 전체)
+
+[v1.5 변경]
+- 응답의 토큰 사용량을 utils/usage 에 기록 (기능 'emotion')
 """
 from google import genai
 from google.genai.types import GenerateContentConfig
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 import json
 import re
+import time
+
+from config.settings import RATE_LIMIT_REACTION_MAX_WAIT
+from utils.genai_pool import get_genai_client
+from utils.metrics import metrics
+from utils.usage import usage
+from utils.rate_limiter import rate_limiter, Priority, RateLimitTimeout, estimate_tokens, prompt_tokens
+from utils.logger import get_logger
 
 if TYPE_CHECKING:
     from utils.gemini_client import GeminiClient
 
+log = get_logger(__name__)
+
 # 감정 → 이모지 매핑 테이블
 EMOTION_EMOJI_MAP: dict[str, str] = {
     # 긍정
@@ -85,8 +108,8 @@ class EmotionAnalyzer:
     MIN_CONFIDENCE = 0.5
     MIN_TEXT_LEN   = 2
 
-    def __init__(self, api_key: str, gemini_client: "GeminiClient"):
-        self.client         = genai.Client(api_key=api_key)
+    def __init__(self, api_key: str, gemini_client: "GeminiClient", client: Optional[genai.Client] = None):
+        self.client         = client or get_genai_client(api_key)
         self.gemini_client  = gemini_client   # model_name 동기화용
         self._config        = GenerateContentConfig(
             temperature=0.1,
@@ -104,6 +127,10 @@ class EmotionAnalyzer:
         텍스트 감정 분석 (동기) → Discord 이모지 리스트 반환
         asyncio.to_thread()로 감싸서 호출할 것.
         """
+        with metrics.stage('emotion', 'total'):
+            return self._analyze(text)
+
+    def _analyze(self, text: str) -> List[str]:
         text = text.strip()
 
         if len(text) < self.MIN_TEXT_LEN:
@@ -112,12 +139,25 @@ class EmotionAnalyzer:
         if len(text) > 200:
             text = text[:200] + "..."
 
+        model    = self.current_model   # 항상 최신 모델 사용
+        contents = ANALYSIS_PROMPT + text
+        tokens   = estimate_tokens(contents)
+        try:
+            rate_limiter.acquire(model, tokens, Priority.REACTION, timeout=RATE_LIMIT_REACTION_MAX_WAIT)
+        except RateLimitTimeout:
+            log.info("emotion.skipped", "⏭️ 감정 분석 생략 (호출 한도 여유 없음)")
+            return []
+
         try:
-            response = self.client.models.generate_content(
-                model=self.current_model,   # 항상 최신 모델 사용
-                contents=ANALYSIS_PROMPT + text,
-                config=self._config,
-            )
+            started = time.monotonic()
+            with metrics.stage('emotion', 'api'):
+                response = self.client.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=self._config,
+                )
+            usage.record(model, 'emotion', response, time.monotonic() - started)
+            rate_limiter.settle(model, tokens, prompt_tokens(response))
             raw = response.text.strip()
             raw = re.sub(r"```json|```", "", raw).strip()
 
@@ -133,9 +173,10 @@ class EmotionAnalyzer:
                 for e in emotions
                 if e in EMOTION_EMOJI_MAP
             ]
-            print(f"🎭 감정 분석 [{self.current_model}]: {emotions} ({confidence:.2f}) → {emojis}")
+            log.info("emotion.analyzed", "🎭 감정 분석", model=model, emotions=emotions, confidence=confidence, emojis=emojis)
             return emojis
 
         except Exception as e:
-            print(f"⚠️ 감정 분석 실패 (무시됨): {e}")
+            metrics.error('emotion', 'api')
+            log.warning("emotion.failed", "⚠️ 감정 분석 실패 (무시됨)", error=str(e))
             return []
\ No newline at end of file
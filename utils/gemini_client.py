@@ -1,17 +1,82 @@
 """
-Gemini API 클라이언트 관리 유틸리티 (v4.1 - 최적화: 미사용 import 제거)
+Gemini API 클라이언트 관리 유틸리티 (v4.9 - 취소 가능한 채팅 생성)
+
+[v4.9 변경]
+- FEATURE: generate_response_async() — generate_response 와 같은 시스템 프롬프트 / 대체 체인을
+  client.aio 로 실행. 태스크를 취소하면 요청 자체가 끊김 (추측 생성용, cogs/chat_handler.py)
+  헤지 요청은 보내지 않음 (동기 경로 전용)
+
+[v4.8 변경]
+- FIX: 대체 체인의 마감 시간(MODEL_FALLBACK_DEADLINE)이 지나면 호출자만 다음 모델로 넘어가고
+  버려진 요청은 스레드에서 끝까지 실행 → 속도 제한 / 비용을 계속 쓰고 뒤늦게 집계까지 하던 문제
+  · 시도마다 남은 시간을 요청 타임아웃(http_options.timeout)과 한도 대기 상한으로 사용 → 마감 시각에 요청 자체가 끝남
+  · 재시도 / 헤지 요청도 같은 마감 시각을 공유
+
+[v4.7 변경]
+- FEATURE: 모든 응답의 usage_metadata 를 utils/usage 에 기록 (기능: chat / media / generate_text_async 의 feature)
+  헤지 / 재시도로 실제 완료된 호출은 각각 집계
+
+[v4.6 변경]
+- PERF: genai.Client 를 직접 만들지 않고 utils/genai_pool 의 API 키별 공용 클라이언트 사용
+  (client 인자로 주입 가능)
+
+[v4.5 변경]
+- FEATURE: MODEL_FALLBACK_CHAIN — 선택된 모델이 마감 시간 초과/재시도 후에도 일시적 오류/
+  속도 제한 대기 초과/최근 응답 시간 과다일 때 다음 모델로 자동 전환
+  · 문제가 생긴 모델은 MODEL_FALLBACK_COOLDOWN 동안 체인에서 건너뜀
+- CHANGE: generate_response / generate_response_with_image 가 GenerationResult 반환
+  (text, model=실제 응답한 모델, fallback=대체 여부) — 모델별 응답 수는 served_counts 에 집계
+
+[v4.4 변경]
+- FEATURE: 429/5xx/타임아웃은 지터 지수 백오프로 재시도 (Retry-After 준수, utils/resilience.py)
+- FEATURE: 채팅 답장은 모델별 p95 응답 시간을 넘기면 헤지 요청을 보내 먼저 온 응답 사용
+
+[v4.3 변경]
+- FEATURE: 모든 호출 전에 utils/rate_limiter 의 모델별 RPM/TPM 허가를 받음
+  · generate_response / 이미지 분석: CHAT 우선순위 (최대 RATE_LIMIT_CHAT_MAX_WAIT 대기)
+  · generate_text_async: 기본 BACKGROUND 우선순위 (요약 등)
+  · 응답의 usage_metadata 로 토큰 추정치 보정
+
+[v4.2 변경]
+- FEATURE: generate_text_async() — 시스템 프롬프트 없이 client.aio 로 단발 생성
+  요약 등 백그라운드 작업이 스레드 없이 이벤트 루프 위에서 동시 실행되도록 함
 """
 from google import genai
-from google.genai.types import GenerateContentConfig
-from typing import List, Dict, Optional
+from google.genai.types import GenerateContentConfig, HttpOptions
+from typing import List, Dict, NamedTuple, Optional
 import base64
+import time
+
+from config.settings import (
+    RATE_LIMIT_CHAT_MAX_WAIT, GEMINI_HEDGE_ENABLED, GEMINI_HEDGE_PERCENTILE,
+    MODEL_FALLBACK_CHAIN, MODEL_FALLBACK_DEADLINE, MODEL_FALLBACK_QUEUE_WAIT,
+    MODEL_FALLBACK_LATENCY_P50, MODEL_FALLBACK_COOLDOWN
+)
+from utils.genai_pool import get_genai_client
+from utils.rate_limiter import rate_limiter, Priority, RateLimitTimeout, estimate_tokens, prompt_tokens
+from utils.resilience import (
+    call_with_retry, call_with_retry_async, hedged_call, remaining,
+    is_retryable, latency_tracker, DeadlineExceeded
+)
+from utils.usage import usage
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class GenerationResult(NamedTuple):
+    """생성 결과 + 실제로 응답한 모델"""
+    text: str
+    model: str
+    fallback: bool
 
 
 class GeminiClient:
     """Gemini API와의 상호작용을 관리하는 클래스 (Vision 포함)"""
     
-    def __init__(self, api_key: str, model_name: str, temperature: float, top_p: float, max_output_tokens: int):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key: str, model_name: str, temperature: float, top_p: float, max_output_tokens: int,
+                 client: Optional[genai.Client] = None):
+        self.client = client or get_genai_client(api_key)
         self.model_name = model_name
         self.temperature = temperature
         self.top_p = top_p
@@ -20,6 +85,10 @@ class GeminiClient:
         self.base_prompt = ""
         self.memory_text = ""
         self.current_prompt_file = ""
+        # 모델 대체 상태: 건너뛸 모델 → 재시도 가능 시각(monotonic) / 실제 응답 모델 집계
+        self._degraded_until: Dict[str, float] = {}
+        self.served_counts: Dict[str, int] = {}
+        self.fallback_count = 0
     
     def load_system_prompt(self, prompt_file: str) -> bool:
         """시스템 프롬프트 파일 로드"""
@@ -28,10 +97,10 @@ class GeminiClient:
                 self.base_prompt = f.read()
             self.system_prompt = self.base_prompt
             self.current_prompt_file = prompt_file
-            print(f"✅ 프롬프트 파일 로드 완료: {prompt_file}")
+            log.info("prompt.loaded", f"✅ 프롬프트 파일 로드 완료: {prompt_file}", file=prompt_file)
             return True
         except FileNotFoundError:
-            print(f"⚠️ {prompt_file} 파일을 찾을 수 없습니다.")
+            log.warning("prompt.missing", f"⚠️ {prompt_file} 파일을 찾을 수 없습니다.", file=prompt_file)
             self.base_prompt = "당신은 '땅콩'이라는 사람의 성격을 가진 친근한 챗봇입니다."
             self.system_prompt = self.base_prompt
             self.current_prompt_file = "default"
@@ -59,7 +128,7 @@ class GeminiClient:
         """메모리 텍스트 업데이트 및 시스템 프롬프트 갱신"""
         self.memory_text = memory_text
         self.system_prompt = f"{self.base_prompt}\n\n{self.memory_text}" if self.memory_text else self.base_prompt
-        print(f"🧠 메모리 업데이트 완료 - 프롬프트 길이: {len(self.system_prompt)} 문자")
+        log.info("prompt.memories_updated", "🧠 메모리 업데이트 완료", prompt_chars=len(self.system_prompt))
     
     def _convert_history_format(self, history: List[Dict]) -> List[Dict]:
         """history 형식 변환"""
@@ -78,23 +147,169 @@ class GeminiClient:
         
         return converted
     
-    def generate_response(self, context: str, history: List[Dict] = None) -> str:
+    def _estimate_input_tokens(self, messages: List[Dict]) -> int:
+        """시스템 프롬프트 + 메시지 텍스트 기준 입력 토큰 추정 (이미지는 제외)"""
+        text_len = sum(
+            len(part.get("text", ""))
+            for msg in messages for part in msg["parts"] if isinstance(part, dict)
+        )
+        return estimate_tokens(self.system_prompt) + text_len // 2
+    
+    @staticmethod
+    def _attempt_config(config: GenerateContentConfig, deadline: Optional[float]) -> GenerateContentConfig:
+        """마감 시각이 있으면 남은 시간을 이 요청의 HTTP 타임아웃으로 (지났으면 DeadlineExceeded)"""
+        left = remaining(deadline)
+        if left is None:
+            return config
+        return config.model_copy(update={'http_options': HttpOptions(timeout=max(1, int(left * 1000)))})
+
+    def _call(self, model: str, messages: List[Dict], config: GenerateContentConfig, feature: str,
+              priority: Priority = Priority.CHAT, hedge: bool = True,
+              queue_wait: float = RATE_LIMIT_CHAT_MAX_WAIT, deadline: Optional[float] = None):
+        """속도 제한 허가 후 동기 호출 (일시적 오류 재시도 + 느린 응답 헤지, deadline 이 있으면 그 시각에 요청 종료)"""
+        tokens = self._estimate_input_tokens(messages)
+
+        def attempt(max_wait: float = queue_wait):
+            left = remaining(deadline)
+            rate_limiter.acquire(model, tokens, priority, timeout=max_wait if left is None else min(max_wait, left))
+            started = time.monotonic()
+            response = self.client.models.generate_content(
+                model=model, contents=messages, config=self._attempt_config(config, deadline)
+            )
+            elapsed = time.monotonic() - started
+            latency_tracker.record(model, elapsed)
+            usage.record(model, feature, response, elapsed)
+            rate_limiter.settle(model, tokens, prompt_tokens(response))
+            return response
+
+        def once():
+            if not (hedge and GEMINI_HEDGE_ENABLED):
+                return attempt()
+            delay = latency_tracker.percentile(model, GEMINI_HEDGE_PERCENTILE)
+            # 헤지 요청은 한도 여유가 있을 때만 (기다리지 않음)
+            return hedged_call(attempt, delay, backup=lambda: attempt(max_wait=0))
+
+        return call_with_retry(once, label=f"[{model}] ", deadline=deadline)
+    
+    # ------------------------------------------------------------------ #
+    #  모델 대체 체인
+    # ------------------------------------------------------------------ #
+    def _fallback_chain(self, model: str) -> List[str]:
+        """시도할 모델 순서 — 쉬는 중인 모델은 제외 (모두 쉬는 중이면 전체 체인)"""
+        chain = [model] + [m for m in MODEL_FALLBACK_CHAIN.get(model, []) if m != model]
+        now = time.monotonic()
+        healthy = []
+        for m in chain:
+            if self._degraded_until.get(m, 0) > now:
+                continue
+            p50 = latency_tracker.percentile(m, 50)
+            if p50 is not None and p50 > MODEL_FALLBACK_LATENCY_P50 and m != chain[-1]:
+                # 표본을 비워 쿨다운 후에는 새 측정값으로 다시 판단
+                self._mark_degraded(m, f"최근 응답 중앙값 {p50:.1f}초")
+                latency_tracker.reset(m)
+                continue
+            healthy.append(m)
+        return healthy or chain
+    
+    def _mark_degraded(self, model: str, reason: str):
+        self._degraded_until[model] = time.monotonic() + MODEL_FALLBACK_COOLDOWN
+        log.warning("gemini.model_degraded", f"⚠️ {model} 일시 제외 ({MODEL_FALLBACK_COOLDOWN}초)", model=model, reason=reason)
+    
+    def _generate(self, messages: List[Dict], config: GenerateContentConfig, feature: str) -> GenerationResult:
+        """선택된 모델부터 대체 체인을 따라 생성"""
+        requested = self.model_name
+        chain = self._fallback_chain(requested)
+        for i, model in enumerate(chain):
+            last = i == len(chain) - 1
+            try:
+                if last:
+                    response = self._call(model, messages, config, feature)
+                else:
+                    response = self._call(model, messages, config, feature, queue_wait=MODEL_FALLBACK_QUEUE_WAIT,
+                                          deadline=time.monotonic() + MODEL_FALLBACK_DEADLINE)
+            except Exception as e:
+                self._fall_back(e, chain, i)
+                continue
+            return self._served(response, model, requested)
+        raise AssertionError("unreachable")
+
+    async def _call_async(self, model: str, messages: List[Dict], config: GenerateContentConfig, feature: str,
+                          priority: Priority = Priority.CHAT,
+                          queue_wait: float = RATE_LIMIT_CHAT_MAX_WAIT, deadline: Optional[float] = None):
+        """_call 의 코루틴 버전 (헤지 없음) — 취소하면 대기 / 요청이 그 자리에서 끝남"""
+        tokens = self._estimate_input_tokens(messages)
+
+        async def attempt():
+            left = remaining(deadline)
+            await rate_limiter.acquire_async(model, tokens, priority,
+                                             timeout=queue_wait if left is None else min(queue_wait, left))
+            started = time.monotonic()
+            response = await self.client.aio.models.generate_content(
+                model=model, contents=messages, config=self._attempt_config(config, deadline)
+            )
+            elapsed = time.monotonic() - started
+            latency_tracker.record(model, elapsed)
+            usage.record(model, feature, response, elapsed)
+            rate_limiter.settle(model, tokens, prompt_tokens(response))
+            return response
+
+        return await call_with_retry_async(attempt, label=f"[{model}] ", deadline=deadline)
+
+    async def _generate_async(self, messages: List[Dict], config: GenerateContentConfig,
+                              feature: str) -> GenerationResult:
+        """_generate 의 코루틴 버전"""
+        requested = self.model_name
+        chain = self._fallback_chain(requested)
+        for i, model in enumerate(chain):
+            last = i == len(chain) - 1
+            try:
+                if last:
+                    response = await self._call_async(model, messages, config, feature)
+                else:
+                    response = await self._call_async(model, messages, config, feature,
+                                                      queue_wait=MODEL_FALLBACK_QUEUE_WAIT,
+                                                      deadline=time.monotonic() + MODEL_FALLBACK_DEADLINE)
+            except Exception as e:
+                self._fall_back(e, chain, i)
+                continue
+            return self._served(response, model, requested)
+        raise AssertionError("unreachable")
+
+    def _fall_back(self, error: Exception, chain: List[str], i: int):
+        """다음 모델로 넘어갈 오류면 표시 / 기록, 아니면(또는 마지막 모델이면) 그대로 올림"""
+        if i == len(chain) - 1 or not (is_retryable(error) or isinstance(error, (DeadlineExceeded, RateLimitTimeout))):
+            raise error
+        self._mark_degraded(chain[i], str(error)[:120])
+        log.info("gemini.fallback", f"↪️ 모델 대체: {chain[i]} → {chain[i + 1]}", model=chain[i], fallback=chain[i + 1])
+
+    def _served(self, response, model: str, requested: str) -> GenerationResult:
+        fallback = model != requested
+        self.served_counts[model] = self.served_counts.get(model, 0) + 1
+        if fallback:
+            self.fallback_count += 1
+        return GenerationResult(response.text, model, fallback)
+    
+    def generate_response(self, context: str, history: List[Dict] = None) -> GenerationResult:
         """대화 컨텍스트를 기반으로 응답 생성 (텍스트만)"""
         try:
             config = self.create_config()
             converted_history = self._convert_history_format(history) if history else []
             messages = converted_history + [{"role": "user", "parts": [{"text": context}]}]
-            
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=messages,
-                config=config
-            )
-            return response.text
+            return self._generate(messages, config, 'chat')
+        except Exception as e:
+            raise Exception(f"응답 생성 실패: {e}")
+
+    async def generate_response_async(self, context: str, history: List[Dict] = None) -> GenerationResult:
+        """generate_response 의 코루틴 버전 (client.aio — 태스크 취소 시 요청 중단)"""
+        try:
+            config = self.create_config()
+            converted_history = self._convert_history_format(history) if history else []
+            messages = converted_history + [{"role": "user", "parts": [{"text": context}]}]
+            return await self._generate_async(messages, config, 'chat')
         except Exception as e:
             raise Exception(f"응답 생성 실패: {e}")
     
-    def generate_response_with_image(self, text: str, image_data: bytes, mime_type: str = "image/png", history: List[Dict] = None) -> str:
+    def generate_response_with_image(self, text: str, image_data: bytes, mime_type: str = "image/png", history: List[Dict] = None) -> GenerationResult:
         """이미지와 텍스트를 함께 분석하여 응답 생성"""
         try:
             config = self.create_config()
@@ -103,21 +318,46 @@ class GeminiClient:
             image_part = {"inline_data": {"mime_type": mime_type, "data": base64.b64encode(image_data).decode('utf-8')}}
             current_message = {"role": "user", "parts": [{"text": text}, image_part]}
             messages = converted_history + [current_message]
-            
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=messages,
-                config=config
-            )
-            return response.text
+            return self._generate(messages, config, 'media')
         except Exception as e:
             raise Exception(f"이미지 분석 실패: {e}")
     
+    async def generate_text_async(self, prompt: str, model: str = None,
+                                  max_output_tokens: int = 2048, temperature: float = 0.3,
+                                  priority: Priority = Priority.BACKGROUND, feature: str = 'text') -> str:
+        """시스템 프롬프트/히스토리 없이 단발 텍스트 생성 (비동기)"""
+        try:
+            model = model or self.model_name
+            config = GenerateContentConfig(
+                temperature=temperature,
+                max_output_tokens=max_output_tokens
+            )
+            tokens = estimate_tokens(prompt)
+
+            async def attempt():
+                await rate_limiter.acquire_async(model, tokens, priority)
+                started = time.monotonic()
+                response = await self.client.aio.models.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config=config
+                )
+                elapsed = time.monotonic() - started
+                latency_tracker.record(model, elapsed)
+                usage.record(model, feature, response, elapsed)
+                rate_limiter.settle(model, tokens, prompt_tokens(response))
+                return response
+
+            response = await call_with_retry_async(attempt, label=f"[{model}] ")
+            return response.text or ""
+        except Exception as e:
+            raise Exception(f"응답 생성 실패: {e}")
+
     def analyze_image(self, image_data: bytes, mime_type: str = "image/png", prompt: str = None) -> str:
         """이미지 단독 분석"""
         if prompt is None:
             prompt = "이 이미지에 대해 자세히 설명해주세요. 무엇이 보이나요?"
-        return self.generate_response_with_image(prompt, image_data, mime_type)
+        return self.generate_response_with_image(prompt, image_data, mime_type).text
     
     async def download_and_encode_image(self, url: str) -> tuple:
         """URL에서 이미지 다운로드 및 인코딩"""
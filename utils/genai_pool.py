@@ -0,0 +1,72 @@
+"""
+공용 genai.Client 제공자 (v1.0)
+
+GeminiClient / EmotionAnalyzer / PersonaSession 이 각자 genai.Client 를 만들면서
+연결 풀·인증 설정이 인스턴스 수만큼 늘어나던 문제를 막기 위해
+API 키당 하나의 클라이언트를 만들어 모든 사용처가 공유합니다.
+
+[설정]
+- GENAI_HTTP_TIMEOUT:       요청 1건의 HTTP 타임아웃 (초)
+- GENAI_MAX_CONNECTIONS:    동시 연결 상한 (동기/비동기 풀 각각)
+- GENAI_MAX_KEEPALIVE:      유지할 유휴 연결 수
+- GENAI_KEEPALIVE_EXPIRY:   유휴 연결 유지 시간 (초)
+
+동기 호출(to_thread)과 client.aio 호출은 각각 전용 httpx 풀을 사용합니다.
+"""
+import atexit
+import threading
+from typing import Dict
+
+import httpx
+from google import genai
+from google.genai import types
+
+from config.settings import (
+    GENAI_HTTP_TIMEOUT, GENAI_MAX_CONNECTIONS, GENAI_MAX_KEEPALIVE, GENAI_KEEPALIVE_EXPIRY
+)
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_clients: Dict[str, genai.Client] = {}
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=GENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=GENAI_MAX_KEEPALIVE,
+        keepalive_expiry=GENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_genai_client(api_key: str) -> genai.Client:
+    """API 키에 해당하는 공용 클라이언트 반환 (최초 호출 시 생성)"""
+    with _lock:
+        client = _clients.get(api_key)
+        if client is None:
+            timeout = httpx.Timeout(GENAI_HTTP_TIMEOUT)
+            client = _clients[api_key] = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    timeout=int(GENAI_HTTP_TIMEOUT * 1000),
+                    httpx_client=httpx.Client(limits=_limits(), timeout=timeout),
+                    httpx_async_client=httpx.AsyncClient(limits=_limits(), timeout=timeout),
+                ),
+            )
+            log.info("genai.client_created", "✅ genai 공용 클라이언트 생성", max_connections=GENAI_MAX_CONNECTIONS)
+        return client
+
+
+def close_genai_clients():
+    """동기 연결 풀 정리 (비동기 풀은 이벤트 루프 종료와 함께 정리됨)"""
+    with _lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception as e:
+                log.warning("genai.close_failed", "⚠️ genai 클라이언트 종료 실패", error=str(e))
+        _clients.clear()
+
+
+atexit.register(close_genai_clients)
@@ -0,0 +1,382 @@
+"""
+JSON 영속화 엔진 (v1.4 - 로드 실패 시 저널 전용 기록)
+
+ScheduleManager / WeatherSubscriptionManager / MemoManager 가 공유하는 저장 계층.
+
+[배경]
+- 기존: 변경 1건마다 전체 파일을 json.dump(indent=2) 로 재작성
+  → O(n) 쓰기, 이벤트 루프 blocking, 쓰기 도중 종료 시 파일 잘림
+- 변경: 레코드 단위 연산(put/delete/clear)을 저널(<파일>.journal)에 한 줄씩 추가
+
+[동작]
+- 쓰기:  put/delete 는 메모리 반영 + 큐 적재만 수행 (O(1), 루프 blocking 없음)
+- 기록:  백그라운드 스레드가 flush_interval 동안 모인 연산을 한 번에 write + fsync
+- 압축:  compact_every 개 연산마다 스냅샷(<파일>)을 임시 파일에 쓰고 fsync 후 os.replace
+         → 저널 비움. 교체 후 저널 비우기 전에 종료되어도 연산이 멱등이라 재생 결과 동일
+- 로드:  스냅샷 + 저널 재생. 마지막 줄이 잘려 있으면 무시 후 즉시 압축
+
+[v1.4 변경]
+- BUG FIX: 스냅샷/저널을 읽지 못하면 load() 가 기록 스레드를 시작하기 전에 예외를 던져,
+  호출 측이 경고만 남기고 계속 쓰는 동안 put/delete 가 큐에만 쌓이고 디스크에 전혀 기록되지 않던 문제
+  → 실패해도 기록 스레드를 시작하고 저널에만 기록 (손상된 스냅샷은 압축으로 덮어쓰지 않음),
+    오류 로그 후 예외는 그대로 전달. 파일을 정리하고 재시작하면 그동안의 변경이 저널에서 재생됨
+
+[v1.3 변경]
+- REFACTOR: 메모리 레코드 + 해시 인덱스 조회 부분을 RecordIndex 로 분리 (SQLiteStore 와 공유)
+
+[v1.2 변경]
+- BUG FIX: 스냅샷에 같은 키가 두 번 있으면 나중 레코드가 앞 레코드를 덮어쓰고,
+  다음 압축(close → atexit 포함)이 줄어든 목록으로 스냅샷을 다시 써서 레코드가 영구 삭제되던 문제
+  · 정수 키는 나중 레코드에 최대 + 1 키를 새로 발급 (메모 ID 8 중복 → 9)
+  · 그 밖의 키는 원본 스냅샷을 덮어쓰지 않고 오류 로그 (변경은 저널에만 기록)
+
+[v1.1 변경]
+- FEATURE: index_fields 로 지정한 필드에 메모리 해시 인덱스 유지 → find() O(1)
+  (SQLiteStore 와 동일한 조회 인터페이스, utils/storage.py 참고)
+
+스냅샷 파일은 기존 JSON 형식({"<collection>": [...]})을 그대로 유지하므로
+사람이 직접 열어보거나 이전 버전으로 되돌려도 호환됩니다.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import JOURNAL_FLUSH_INTERVAL, JOURNAL_COMPACT_EVERY
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_FLUSH = object()
+_COMPACT = object()
+_CLOSE = object()
+
+
+def read_json_records(path: str, collection: str, key_field: str) -> Tuple[Dict[Any, Dict], bool, List]:
+    """
+    스냅샷 + 저널을 읽어 {key: record} 반환.
+    두 번째 값은 저널 재생/파일 부재/키 재발급으로 스냅샷 재작성이 필요한지 여부.
+    세 번째 값은 해결하지 못한 중복 키 목록 — 비어 있지 않으면 스냅샷을 덮어쓰면 안 됨.
+
+    스냅샷 안에서 키가 겹치면 (직접 편집 / 이전 버전의 ID 충돌) 나중 레코드를 버리지 않음:
+    - 정수 키: 나중 레코드에 새 키(최대 + 1) 발급 → 다음 압축 때 스냅샷에 반영
+    - 그 외 키: 나중 레코드로 조회하되 중복 키로 보고 (원본 스냅샷 보존)
+    """
+    journal_path = path + '.journal'
+    records: Dict[Any, Dict] = {}
+    conflicts: List = []
+    dirty = not os.path.exists(path)
+    if not dirty:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f).get(collection, [])
+        next_int = max((r[key_field] for r in snapshot if _is_int_key(r[key_field])), default=0) + 1
+        for r in snapshot:
+            key = r[key_field]
+            if key in records:
+                if _is_int_key(key):
+                    r = dict(r, **{key_field: next_int})
+                    log.warning("journal.duplicate_key", "⚠️ 스냅샷 중복 키 — 나중 레코드에 새 키 발급",
+                                path=path, key=key, new_key=next_int)
+                    next_int += 1
+                    dirty = True
+                else:
+                    conflicts.append(key)
+                    log.error("journal.duplicate_key", "❌ 스냅샷 중복 키 — 스냅샷을 덮어쓰지 않음 (직접 정리 필요)",
+                              path=path, key=key)
+            records[r[key_field]] = r
+
+    if os.path.exists(journal_path):
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                dirty = True
+                try:
+                    op = json.loads(line)
+                except json.JSONDecodeError:
+                    log.warning("journal.torn_tail", "⚠️ 저널 마지막 줄 손상 (무시)", path=journal_path)
+                    break
+                _apply_op(records, op)
+    return records, dirty, conflicts
+
+
+def _is_int_key(key) -> bool:
+    return isinstance(key, int) and not isinstance(key, bool)
+
+
+def _apply_op(records: Dict[Any, Dict], op: Dict):
+    kind = op['op']
+    if kind == 'put':
+        records[op['key']] = op['value']
+    elif kind == 'del':
+        records.pop(op['key'], None)
+    elif kind == 'clear':
+        records.clear()
+
+
+class RecordIndex:
+    """
+    메모리 레코드 dict + index_fields 해시 인덱스 (조회 전용 공통 부분)
+    JournalStore / SQLiteStore 가 공유 — 조회는 항상 메모리에서 처리 (이벤트 루프 blocking 없음)
+    """
+
+    def _init_records(self, index_fields: Sequence[str] = ()):
+        self.index_fields = tuple(index_fields)
+        # 삽입 순서 유지
+        self._records: Dict[Any, Dict] = {}
+        # field → value → {key: None} (삽입 순서 유지용 dict) / key → 인덱싱된 값
+        self._indexes: Dict[str, Dict[Any, Dict[Any, None]]] = {f: {} for f in self.index_fields}
+        self._indexed: Dict[Any, Tuple] = {}
+
+    def _reset_records(self, records: Dict[Any, Dict]):
+        self._records = records
+        self._indexed = {}
+        self._indexes = {f: {} for f in self.index_fields}
+        for key, record in records.items():
+            self._index_put(key, record)
+
+    def _record_put(self, record: Dict) -> Any:
+        key = record[self.key_field]
+        self._records[key] = record
+        self._index_put(key, record)
+        return key
+
+    def _record_delete(self, key) -> Optional[Dict]:
+        record = self._records.pop(key, None)
+        if record is not None:
+            self._index_remove(key)
+        return record
+
+    # ------------------------------------------------------------------ #
+    #  보조 인덱스
+    # ------------------------------------------------------------------ #
+    def _index_put(self, key, record: Dict):
+        if not self.index_fields:
+            return
+        self._index_remove(key)
+        values = tuple(record.get(f) for f in self.index_fields)
+        self._indexed[key] = values
+        for field, value in zip(self.index_fields, values):
+            self._indexes[field].setdefault(value, {})[key] = None
+
+    def _index_remove(self, key):
+        values = self._indexed.pop(key, None)
+        if values is None:
+            return
+        for field, value in zip(self.index_fields, values):
+            bucket = self._indexes[field].get(value)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._indexes[field][value]
+
+    # ------------------------------------------------------------------ #
+    #  조회
+    # ------------------------------------------------------------------ #
+    def all(self) -> List[Dict]:
+        return list(self._records.values())
+
+    def get(self, key) -> Optional[Dict]:
+        return self._records.get(key)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def keys(self):
+        return self._records.keys()
+
+    def find(self, order_by: Optional[str] = None, **where) -> List[Dict]:
+        """필드 일치 조회 — 첫 조건은 인덱스로, 나머지는 후보 안에서 필터"""
+        if not where:
+            result = self.all()
+        else:
+            items = list(where.items())
+            field, value = items[0]
+            if field in self._indexes:
+                keys = self._indexes[field].get(value, {})
+                candidates = [self._records[k] for k in keys]
+            else:
+                candidates = [r for r in self._records.values() if r.get(field) == value]
+            result = [r for r in candidates if all(r.get(f) == v for f, v in items[1:])]
+        if order_by:
+            result.sort(key=lambda r: r.get(order_by))
+        return result
+
+
+class JournalStore(RecordIndex):
+    """키 기반 레코드 컬렉션을 저널 + 스냅샷으로 영속화"""
+
+    def __init__(
+        self,
+        path: str,
+        collection: str,
+        key_field: str = 'id',
+        snapshot_fn: Optional[Callable[[List[Dict]], Dict]] = None,
+        index_fields: Sequence[str] = (),
+        flush_interval: float = JOURNAL_FLUSH_INTERVAL,
+        compact_every: int = JOURNAL_COMPACT_EVERY,
+    ):
+        self.path           = path
+        self.journal_path   = path + '.journal'
+        self.collection     = collection
+        self.key_field      = key_field
+        self.snapshot_fn    = snapshot_fn or (lambda records: {collection: records})
+        self.flush_interval = flush_interval
+        self.compact_every  = compact_every
+        # 이벤트 루프 측 상태 (조회용)
+        self._init_records(index_fields)
+        # 기록 스레드 측 상태 (스냅샷용) — 루프 측 dict 와 공유하지 않음
+        self._mirror: Dict[Any, Dict] = {}
+        self._ops_since_snapshot = 0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # 스냅샷에 해결하지 못한 중복 키가 있으면 압축하지 않음 (저널에만 기록 → 원본 레코드 보존)
+        self._preserve_snapshot = False
+
+    # ------------------------------------------------------------------ #
+    #  로드
+    # ------------------------------------------------------------------ #
+    def load(self) -> List[Dict]:
+        """스냅샷 + 저널 재생 후 레코드 목록 반환 (기록 스레드 시작)"""
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        try:
+            records, dirty, conflicts = read_json_records(self.path, self.collection, self.key_field)
+        except Exception as e:
+            # 이후 변경은 저널에만 남김 — 읽지 못한 스냅샷을 빈 목록으로 압축해 덮어쓰지 않음
+            self._preserve_snapshot = True
+            self._start()
+            log.error("journal.load_failed", "❌ 스냅샷/저널 로드 실패 — 스냅샷 보존, 이후 변경은 저널에만 기록",
+                      path=self.path, error=str(e))
+            raise
+        self._preserve_snapshot = bool(conflicts)
+        self._reset_records(records)
+        copied = json.loads(json.dumps(list(records.values()), ensure_ascii=False))
+        self._mirror = {r[self.key_field]: r for r in copied}
+        self._start()
+
+        # 재생한 저널(또는 신규 파일)은 즉시 스냅샷으로 정리 — 잘린 줄 뒤에 이어 쓰는 일 방지
+        if dirty and not self._preserve_snapshot:
+            self._queue.put(_COMPACT)
+        return list(records.values())
+
+    # ------------------------------------------------------------------ #
+    #  변경 (O(1), 기록은 백그라운드)
+    # ------------------------------------------------------------------ #
+    def put(self, record: Dict):
+        """레코드 추가/갱신 — 레코드를 제자리 수정한 뒤에도 반드시 호출할 것"""
+        key = self._record_put(record)
+        self._enqueue({'op': 'put', 'key': key, 'value': record})
+
+    def delete(self, key) -> Optional[Dict]:
+        record = self._record_delete(key)
+        if record is not None:
+            self._enqueue({'op': 'del', 'key': key})
+        return record
+
+    def clear(self):
+        self._reset_records({})
+        self._enqueue({'op': 'clear'})
+
+    def _enqueue(self, op: Dict):
+        # 직렬화는 호출 시점에 수행 → 이후 레코드가 수정되어도 기록 내용 불변
+        self._queue.put(json.dumps(op, ensure_ascii=False))
+
+    # ------------------------------------------------------------------ #
+    #  flush / close
+    # ------------------------------------------------------------------ #
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """지금까지의 연산이 디스크에 fsync 될 때까지 대기 (blocking — 루프에서는 to_thread 사용)"""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self):
+        """남은 연산 기록 + 최종 스냅샷 후 기록 스레드 종료"""
+        if self._closed or self._thread is None:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout=10)
+
+    # ------------------------------------------------------------------ #
+    #  기록 스레드
+    # ------------------------------------------------------------------ #
+    def _start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._writer, name=f"journal-{self.collection}", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _writer(self):
+        while True:
+            batch = [self._queue.get()]
+            # group commit: flush_interval 동안 들어온 연산을 모아서 한 번에 fsync
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not _CLOSE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._process(batch)
+            except Exception:
+                log.exception("journal.write_failed", "❌ 저널 기록 실패", collection=self.collection)
+
+            if batch[-1] is _CLOSE:
+                return
+
+    def _process(self, batch: list):
+        lines: List[str] = []
+        waiters: List[threading.Event] = []
+        compact = False
+
+        for item in batch:
+            if isinstance(item, str):
+                lines.append(item)
+                _apply_op(self._mirror, json.loads(item))
+            elif isinstance(item, tuple) and item[0] is _FLUSH:
+                waiters.append(item[1])
+            elif item is _COMPACT or item is _CLOSE:
+                compact = True
+
+        if lines:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._ops_since_snapshot += len(lines)
+
+        if (compact or self._ops_since_snapshot >= self.compact_every) and not self._preserve_snapshot:
+            self._compact()
+
+        for w in waiters:
+            w.set()
+
+    def _compact(self):
+        """스냅샷 원자적 교체 후 저널 비우기"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot_fn(list(self._mirror.values())), f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        with open(self.journal_path, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._ops_since_snapshot = 0
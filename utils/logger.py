@@ -0,0 +1,278 @@
+"""
+구조화 로깅 (v1.0)
+
+Cog / 유틸이 이벤트 루프 스레드에서 바로 print() 하던 것을 대체합니다.
+stdout(journald)이 느리면 print() 가 그대로 루프를 막았고, 한 줄 문자열이라 기계적으로 분석할 수 없었습니다.
+
+[사용]
+    log = get_logger(__name__)
+    log.info("chat.reply", "💬 응답 전송", user_id=user_id, chars=len(text))
+- 첫 인자 event: 점으로 구분한 이벤트 이름 (필터 / 샘플링 / 집계 키)
+- 두 번째 인자: 사람이 읽는 메시지 (기존 print 문구)
+- 나머지 키워드: JSON 필드
+
+[구조]
+- 호출 스레드는 레코드를 큐에 넣기만 함 (QueueHandler)
+  → 포맷 / 쓰기는 백그라운드 스레드 (QueueListener)
+  → 큐가 가득 차면 기다리지 않고 버리고, 버린 수는 다음 기록의 dropped 필드로 보고
+- 상관 ID (contextvars): bind_cid() 로 설정하면 같은 태스크, 그 안에서 만든 태스크, to_thread 에 전파
+  (한 태스크가 여러 작업을 차례로 처리하면 with cid_scope(...) 로 작업마다 범위 지정)
+  · 채팅: 수집 시작 시 발급 → 수집 / 생성 / 전송 / 봇 응답 리액션이 같은 cid
+  · link_message() 로 메시지 ID 와 cid 를 연결 → 다른 리스너(감정 리액션)도 cid_for_message() 로 같은 cid 사용
+- 샘플링: LOG_SAMPLE_RATES 에 있는 이벤트는 그 비율만큼만 기록 (기록된 줄에 sample_rate 필드)
+  WARNING 이상은 항상 기록
+- 루트 로거에 연결 → discord.py 로그도 같은 형식 / 같은 큐로 출력
+  (요청마다 INFO 를 남기는 httpx / google_genai 는 LOG_LIBRARY_LEVELS 로 수준 조정)
+- LOG_FORMAT: 'json' (JSON lines) / 'text' (로컬 개발용 한 줄 요약)
+"""
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from config.settings import (
+    LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES, LOG_LIBRARY_LEVELS
+)
+
+_cid: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('log_cid', default=None)
+
+# 메시지 ID → cid (최근 것만 보관)
+_MESSAGE_CID_LIMIT = 4096
+_message_cids: "OrderedDict[int, str]" = OrderedDict()
+_message_lock = threading.Lock()
+
+_setup_lock = threading.Lock()
+_queue: Optional[queue.Queue] = None
+_handler: Optional["_QueueHandler"] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+# ------------------------------------------------------------------ #
+#  상관 ID
+# ------------------------------------------------------------------ #
+def new_cid() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def bind_cid(cid: Optional[str] = None) -> str:
+    """현재 컨텍스트(태스크)의 cid 설정 — 생략하면 새로 발급"""
+    cid = cid or new_cid()
+    _cid.set(cid)
+    return cid
+
+
+@contextlib.contextmanager
+def cid_scope(cid: Optional[str] = None):
+    """with 블록 안에서만 cid 적용 (같은 태스크에서 여러 작업을 차례로 처리할 때)"""
+    token = _cid.set(cid or new_cid())
+    try:
+        yield _cid.get()
+    finally:
+        _cid.reset(token)
+
+
+def current_cid() -> Optional[str]:
+    return _cid.get()
+
+
+def link_message(message_id: int, cid: str):
+    with _message_lock:
+        _message_cids[message_id] = cid
+        _message_cids.move_to_end(message_id)
+        while len(_message_cids) > _MESSAGE_CID_LIMIT:
+            _message_cids.popitem(last=False)
+
+
+def cid_for_message(message_id: int) -> Optional[str]:
+    with _message_lock:
+        return _message_cids.get(message_id)
+
+
+# ------------------------------------------------------------------ #
+#  포맷터 (백그라운드 스레드에서 실행)
+# ------------------------------------------------------------------ #
+def _entry(record: logging.LogRecord) -> Dict:
+    entry = {
+        "ts":     datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+        "level":  record.levelname.lower(),
+        "logger": record.name,
+        "event":  getattr(record, 'event', None),
+        "msg":    record.getMessage(),
+    }
+    cid = getattr(record, 'cid', None)
+    if cid:
+        entry["cid"] = cid
+    entry.update(getattr(record, 'fields', None) or {})
+    return entry
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄 = JSON 객체 1개"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = _entry(record)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """12:34:56 INFO  💬 응답 전송  user_id=1 chars=42  [cid]"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = _entry(record)
+        fields = {k: v for k, v in entry.items() if k not in ('ts', 'level', 'logger', 'event', 'msg', 'cid')}
+        line = f"{datetime.fromtimestamp(record.created):%H:%M:%S} {record.levelname:<5} {entry['msg']}"
+        if fields:
+            line += "  " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if 'cid' in entry:
+            line += f"  [{entry['cid']}]"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+# ------------------------------------------------------------------ #
+#  핸들러
+# ------------------------------------------------------------------ #
+class _SampleFilter(logging.Filter):
+    """LOG_SAMPLE_RATES 의 이벤트를 비율만큼만 통과 (호출 스레드에서 실행 — 난수 1회)"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, 'event', None), 1.0)
+        if rate >= 1.0:
+            return True
+        if random.random() >= rate:
+            return False
+        record.fields = dict(getattr(record, 'fields', None) or {}, sample_rate=rate)
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """포맷은 리스너 스레드에 맡기고, 큐가 가득 차면 기다리지 않고 버림"""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 메시지 인자만 여기서 합침 (이후 변경될 수 있는 객체 참조 방지) — 나머지 포맷은 리스너에서
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.dropped:
+            record.fields = dict(getattr(record, 'fields', None) or {}, dropped=self.dropped)
+        try:
+            self.queue.put_nowait(record)
+            self.dropped = 0
+        except queue.Full:
+            self.dropped += 1
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """쓰는 시점의 sys.stdout 사용 (리다이렉트 / 재설정 반영)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, file: Optional[str] = LOG_FILE):
+    """루트 로거에 큐 핸들러 연결 + 백그라운드 출력 스레드 시작 (여러 번 호출해도 1회만 적용)"""
+    global _queue, _handler, _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        target = logging.FileHandler(file, encoding='utf-8') if file else _StdoutHandler()
+        target.setFormatter(TextFormatter() if fmt == 'text' else JsonFormatter())
+
+        _queue = queue.Queue(LOG_QUEUE_SIZE)
+        _handler = _QueueHandler(_queue)
+        _handler.addFilter(_SampleFilter(LOG_SAMPLE_RATES))
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(level)
+        for name, lib_level in LOG_LIBRARY_LEVELS.items():
+            logging.getLogger(name).setLevel(lib_level)
+
+        _listener = logging.handlers.QueueListener(_queue, target)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def flush_logging():
+    """큐에 쌓인 기록이 모두 출력될 때까지 대기 (blocking)"""
+    if _queue is not None:
+        _queue.join()
+
+
+def shutdown_logging():
+    """남은 기록 출력 후 백그라운드 스레드 종료"""
+    global _queue, _handler, _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logging.getLogger().removeHandler(_handler)
+        for handler in _listener.handlers:
+            handler.close()
+        _queue = _handler = _listener = None
+
+
+# ------------------------------------------------------------------ #
+#  로거
+# ------------------------------------------------------------------ #
+class StructuredLogger:
+    """logging.Logger 래퍼 — (event, 메시지, **필드) 형태로 기록"""
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name)
+
+    def _log(self, level: int, event: str, msg: str, fields: Dict, exc_info=None):
+        if _listener is None:
+            setup_logging()
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, msg or event, exc_info=exc_info, stacklevel=3,
+                             extra={'event': event, 'fields': fields, 'cid': _cid.get()})
+
+    def debug(self, event: str, msg: str = "", **fields):
+        self._log(logging.DEBUG, event, msg, fields)
+
+    def info(self, event: str, msg: str = "", **fields):
+        self._log(logging.INFO, event, msg, fields)
+
+    def warning(self, event: str, msg: str = "", **fields):
+        self._log(logging.WARNING, event, msg, fields)
+
+    def error(self, event: str, msg: str = "", **fields):
+        self._log(logging.ERROR, event, msg, fields)
+
+    def exception(self, event: str, msg: str = "", **fields):
+        """except 블록 안에서 호출 — 트레이스백 포함"""
+        self._log(logging.ERROR, event, msg, fields, exc_info=True)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name)
@@ -1,63 +1,68 @@
 """
-메모 관리 유틸리티 (v2.1 - 버그수정)
+메모 관리 유틸리티 (v2.3 - 저장소 백엔드 선택)
 
 [수정 내역]
 - BUG FIX: add_memory 에서 ID를 len(memories)+1 로 생성하던 방식 →
   삭제 후 재추가 시 기존 ID 와 충돌하는 문제 해소.
   max(existing_ids, default=0) + 1 방식으로 항상 고유 ID 보장.
+- PERF: add/delete 마다 전체 파일 재작성(save_memories) → JournalStore 저널로 교체
+  id 키 기반 O(1) 삭제, 이벤트 루프 blocking 없는 백그라운드 fsync.
+  save_memories() 는 강제 flush 용도로만 유지.
+- FEATURE: STORAGE_BACKEND='sqlite' 선택 시 SQLite 테이블 사용 (JSON은 가져오기/내보내기)
 """
-import json
 import os
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from utils.storage import open_store
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def _memo_snapshot(memories: List[Dict]) -> Dict:
+    """스냅샷 파일 형식 (기존 peanut_memories.json 과 동일)"""
+    return {
+        'last_updated': datetime.now().isoformat(),
+        'total_count': len(memories),
+        'memories': memories,
+    }
+
 
 class MemoManager:
     def __init__(self, memo_file: str = 'data/memories/peanut_memories.json'):
         self.memo_file = memo_file
-        self.memories: List[Dict] = []
+        self._store = open_store(memo_file, collection='memories', key_field='id',
+                                 snapshot_fn=_memo_snapshot)
         self.load_memories()
 
+    @property
+    def memories(self) -> List[Dict]:
+        return self._store.all()
+
     def load_memories(self) -> bool:
         try:
-            if os.path.exists(self.memo_file):
-                with open(self.memo_file, 'r', encoding='utf-8') as f:
-                    self.memories = json.load(f).get('memories', [])
-                print(f"✅ 메모리 파일 로드 완료: {len(self.memories)}개 메모")
+            existed = os.path.exists(self.memo_file)
+            self._store.load()
+            if existed:
+                log.info("memo.loaded", "✅ 메모리 파일 로드 완료", count=len(self._store))
             else:
-                print(f"📝 새로운 메모리 파일 생성: {self.memo_file}")
-                self.memories = []
-                self.save_memories()
+                log.info("memo.created", "📝 새로운 메모리 파일 생성", path=self.memo_file)
             return True
         except Exception as e:
-            print(f"⚠️ 메모리 로드 오류: {e}")
-            self.memories = []
+            log.warning("memo.load_failed", "⚠️ 메모리 로드 오류", error=str(e))
             return False
 
-    def save_memories(self) -> bool:
-        try:
-            os.makedirs(os.path.dirname(self.memo_file), exist_ok=True)
-            with open(self.memo_file, 'w', encoding='utf-8') as f:
-                json.dump(
-                    {
-                        'last_updated': datetime.now().isoformat(),
-                        'total_count': len(self.memories),
-                        'memories': self.memories,
-                    },
-                    f,
-                    ensure_ascii=False,
-                    indent=2
-                )
-            return True
-        except Exception as e:
-            print(f"❌ 메모리 저장 오류: {e}")
-            return False
+    def save_memories(self, timeout: Optional[float] = 5.0) -> bool:
+        """저널에 쌓인 변경을 디스크에 강제 반영 (blocking)"""
+        return self._store.flush(timeout)
+
+    def close(self):
+        self._store.close()
 
     def _next_id(self) -> int:
         """BUG FIX: 삭제 후 재추가 시 ID 중복 방지 - 현재 최대 ID + 1 반환"""
-        if not self.memories:
-            return 1
-        return max(m['id'] for m in self.memories) + 1
+        return max(self._store.keys(), default=0) + 1
 
     def add_memory(self, content: str, author: str = "관리자") -> Dict:
         memory = {
@@ -67,44 +72,35 @@ class MemoManager:
             'timestamp': datetime.now().isoformat(),
             'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         }
-        self.memories.append(memory)
-        self.save_memories()
+        self._store.put(memory)
         return memory
 
     def delete_memory(self, content: str) -> Optional[Dict]:
-        for i, m in enumerate(self.memories):
+        for m in self.memories:
             if m['content'] == content or content in m['content']:
-                deleted = self.memories.pop(i)
-                self.save_memories()
-                return deleted
+                return self._store.delete(m['id'])
         return None
 
     def delete_memory_by_id(self, memory_id: int) -> Optional[Dict]:
-        for i, m in enumerate(self.memories):
-            if m['id'] == memory_id:
-                deleted = self.memories.pop(i)
-                self.save_memories()
-                return deleted
-        return None
+        return self._store.delete(memory_id)
 
     def search_memories(self, keyword: str) -> List[Dict]:
         return [m for m in self.memories if keyword.lower() in m['content'].lower()]
 
     def get_all_memories(self) -> List[Dict]:
-        return self.memories.copy()
+        return self.memories
 
     def get_memory_count(self) -> int:
-        return len(self.memories)
+        return len(self._store)
 
     def get_memories_as_text(self) -> str:
-        if not self.memories:
+        if not len(self._store):
             return "아직 저장된 취향이나 기억이 없습니다."
         return "=== 땅콩의 취향과 기억 ===\n" + "\n".join(
             f"- {m['content']}" for m in self.memories
         )
 
     def clear_all_memories(self) -> int:
-        count = len(self.memories)
-        self.memories = []
-        self.save_memories()
-        return count
\ No newline at end of file
+        count = len(self._store)
+        self._store.clear()
+        return count
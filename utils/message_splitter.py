@@ -1,51 +1,200 @@
+"""
+메시지 분할기 (v2.2 - 단일 엔진 + 줄 묶음 빠른 경로)
+
+[v2.2 변경]
+- REFACTOR: v2.1 의 길이별 분기(OUTBOUND_MAX_CHARS 이하는 v1 코드 그대로) 제거
+  → 짧은 답장도 사전 컴파일된 경계 정규식 / 한국어 문장 끝 인식을 사용 (실제 트래픽 대부분이 짧은 답장)
+- 줄 모드 빠른 경로: v1 과 같은 줄 수 기준 묶음이 글자 수로도 고르면 그대로 사용
+  ('a\nb\nc\nd\ne' → ['a\nb', 'c\nd', 'e']), 한 묶음에 긴 줄이 쏠릴 때만 글자 수 균형 분할
+- PERF: smart_split 등은 제너레이터를 한 겹 덜 거쳐 바로 목록 생성
+- BUG FIX: 목표 지점 앞 경계를 찾을 때 finditer(endpos=target) 로 문자열을 잘라,
+  "좋다 ㅋㅋ" 처럼 웃음 바로 앞 공백이 경계로 잡혀 ㅋㅋ 가 다음 조각으로 넘어가던 문제
+
+[v2.0 변경]
+- PERF: 경계 정규식은 모듈 로드 시 1회 컴파일
+  (이전: count 2회 + replace/split/join 여러 번 + 매 호출 re.split 재컴파일 + 구분자 재결합 루프)
+  · 문장 모드: 전체를 문장으로 쪼개지 않고 k/parts 지점 주변만 훑어 가장 가까운 경계에서 자름
+  · 줄 모드: split 1회 + 누적 길이 이분 탐색 → 줄 수와 무관하게 parts 번만 계산
+- FEATURE: 한국어 문장 끝 인식 — ~요 / ~다 / ~죠 / ~네 / ~까, ㅋㅋ·ㅎㅎ·ㅠㅠ, 물결(~)
+  · 숫자 안의 마침표("3.5")는 문장 끝으로 보지 않음 (뒤에 공백/줄바꿈/끝이 와야 함)
+- FEATURE: 조각 수가 아닌 글자 수 기준으로 균형 분할 (짧은 문장 여러 개 + 긴 문장 1개 편중 방지)
+- FEATURE: iter_split() 제너레이터 / StreamSplitter (스트리밍 텍스트를 받는 대로 조각 방출)
+
+이스케이프된 줄바꿈('\\n' 두 글자)은 실제 줄바꿈과 같게 취급합니다.
+"""
 import re
-from typing import List
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Iterator, List, Optional
 
-class MessageSplitter:
-    @staticmethod
-    def split_by_lines(text: str, parts: int = 3) -> List[str]:
-        text = text.replace('\\n', '\n')
-        lines = text.split('\n')
-        if len(lines) <= parts:
-            return [l for l in lines if l.strip()]
-        
-        lines_per_part = len(lines) // parts
-        remainder = len(lines) % parts
+ESCAPED_NEWLINE = '\\n'
+
+# 조각 경계: 줄바꿈(실제/이스케이프) 또는 문장 끝 뒤의 공백
+# · 문장 끝: 마침표류, 물결, ㅋㅋ/ㅎㅎ/ㅠㅠ, ~요/~다/~죠/~네/~까 (뒤에 공백이 와야 함 → "3.5" 는 제외)
+# · 공백 앞의 한 글자짜리 '다'/'요' ("다 같이") 는 문장 끝이 아님
+# · 바로 뒤에 ㅋㅋ/ㅎㅎ/물결이 오면 같은 문장으로 봄 ("있다 ㅋㅋ")
+_BREAK_RE = re.compile(
+    r'[ \t]*(?:\\n|\n)\s*'
+    r'|(?<=[.!?…~ㅋㅎㅠㅜ요다죠네까])(?<!\s[요다죠네까])\s+(?![ㅋㅎㅠㅜ~])'
+)
+
+# 줄 수 기준 묶음이 균등 분할 지점에서 평균 줄 길이 × 이 값 이내면 그대로 사용 → v1 과 같은 묶음 (빠른 경로)
+_UNIFORM_SLACK = 2
+
+
+def _nearest_break(text: str, target: int, lo: int) -> Optional[re.Match]:
+    """target 위치에 가장 가까운 경계 (lo 이전은 제외). 주변만 훑음"""
+    after = _BREAK_RE.search(text, target)
+    # 뒤쪽 경계까지의 거리만큼만 앞쪽을 훑음 (뒤쪽이 없으면 lo 까지)
+    start = lo if after is None else max(lo, 2 * target - after.start())
+    before = None
+    # endpos 로 자르면 뒤보기 조건((?![ㅋㅎㅠㅜ~]))이 잘린 끝을 보고 "좋다 |ㅋㅋ" 를 경계로 오인 → 직접 멈춤
+    for m in _BREAK_RE.finditer(text, start):
+        if m.start() >= target:
+            break
+        before = m
+    if before is None:
+        return after
+    if after is None or target - before.start() <= after.start() - target:
+        return before
+    return after
+
+
+def _split_sentences(text: str, parts: int) -> Iterator[str]:
+    """글자 수 기준 k/parts 지점마다 가장 가까운 경계에서 자름 (전체 문장을 나누지 않음)"""
+    prev = 0
+    for k in range(1, parts):
+        target = len(text) * k // parts
+        if target <= prev:
+            continue
+        m = _nearest_break(text, target, prev)
+        if m is None:
+            break
+        if m.start() <= prev:
+            continue
+        chunk = text[prev:m.start()].strip()
+        if chunk:
+            yield chunk
+        prev = m.end()
+    chunk = text[prev:].strip()
+    if chunk:
+        yield chunk
+
+
+def _balance(pieces: List[str], parts: int, sep: str) -> List[str]:
+    """
+    pieces 를 순서대로 parts 개 이하로 묶음 (각 묶음 글자 수가 비슷하도록).
+    누적 길이에서 k/parts 지점을 이분 탐색 → 목표 지점이 조각 중간이면 더 가까운 쪽 경계에서 끊음.
+    """
+    n = len(pieces)
+    if n <= parts:
+        return pieces
+    cum = list(accumulate(map(len, pieces)))
+    total = cum[-1]
+    cuts = [0]
+    for k in range(1, parts):
+        target = total * k / parts
+        i = bisect_left(cum, target)
+        before = cum[i - 1] if i else 0
+        cut = i + 1 if cum[i] - target <= target - before else i
+        # 각 묶음에 최소 1개, 남은 묶음마다 최소 1개씩 남김
+        cuts.append(min(max(cut, cuts[-1] + 1), n - (parts - k)))
+    cuts.append(n)
+    return [sep.join(pieces[cuts[k]:cuts[k + 1]]) for k in range(parts)]
+
+
+def _split_lines(text: str, parts: int) -> List[str]:
+    """
+    줄 단위로 parts 개 이하로 묶음.
+    빠른 경로: v1 과 같은 줄 수 기준 묶음을 먼저 만들고, 묶음마다 글자 수가 균등 분할 지점에서
+    평균 줄 길이 × _UNIFORM_SLACK 이내면 그대로 사용 (줄 길이가 고른 대부분의 목록 — v1 결과와 동일).
+    한쪽으로 쏠리면 빈 줄을 빼고 글자 수 균형 분할 (_balance).
+    """
+    lines = text.split('\n')
+    n = len(lines)
+    if n > parts:
+        size, extra = divmod(n, parts)
         chunks, start = [], 0
-        
-        for i in range(parts):
-            end = start + lines_per_part + (1 if i < remainder else 0)
+        for k in range(parts):
+            end = start + size + (k < extra)
             chunk = '\n'.join(lines[start:end]).strip()
-            if chunk: chunks.append(chunk)
+            if chunk:
+                chunks.append(chunk)
             start = end
-        return chunks
-    
+        target, slack = len(text) / parts, len(text) / n * _UNIFORM_SLACK
+        if all(abs(len(chunk) - target) <= slack for chunk in chunks):
+            return chunks
+    return _balance([l for l in map(str.strip, lines) if l], parts, '\n')
+
+
+def _split(text: str, parts: int, mode: str) -> Iterator[str]:
+    if ESCAPED_NEWLINE in text:
+        text = text.replace(ESCAPED_NEWLINE, '\n')
+    if mode == 'lines' or (mode == 'auto' and text.count('\n') >= parts):
+        return iter(_split_lines(text, parts))
+    return _split_sentences(text, parts)
+
+
+class MessageSplitter:
+    @staticmethod
+    def iter_split(text: str, parts: int = 3, mode: str = 'auto') -> Iterator[str]:
+        """
+        text 를 최대 parts 개 조각으로 나눠 순서대로 방출 (빈 텍스트는 조각 없음).
+        mode: 'lines' (줄 단위), 'sentences' (문장 단위), 'auto' (줄바꿈이 parts 개 이상이면 줄 단위)
+        """
+        return _split(text, parts, mode)
+
+    @staticmethod
+    def split_by_lines(text: str, parts: int = 3) -> List[str]:
+        return list(_split(text, parts, 'lines'))
+
     @staticmethod
     def split_by_sentences(text: str, parts: int = 3) -> List[str]:
-        text = text.replace('\\n', '\n')
-        sentences = re.split(r'([.!?\n])', text)
-        combined = []
-        for i in range(0, len(sentences) - 1, 2):
-            if i + 1 < len(sentences):
-                c = sentences[i] + sentences[i+1]
-                if c.strip(): combined.append(c.strip())
-        if len(sentences) % 2 == 1 and sentences[-1].strip():
-            combined.append(sentences[-1].strip())
-        if not combined: return [text]
-        if len(combined) <= parts: return combined
-        
-        spp = len(combined) // parts
-        rem = len(combined) % parts
-        chunks, start = [], 0
-        for i in range(parts):
-            end = start + spp + (1 if i < rem else 0)
-            chunk = ' '.join(combined[start:end]).strip()
-            if chunk: chunks.append(chunk)
-            start = end
-        return chunks
-    
+        return list(_split(text, parts, 'sentences'))
+
     @staticmethod
     def smart_split(text: str, parts: int = 3) -> List[str]:
-        if text.count('\n') >= parts or text.count('\\n') >= parts:
-            return MessageSplitter.split_by_lines(text, parts)
-        return MessageSplitter.split_by_sentences(text, parts)
\ No newline at end of file
+        return list(_split(text, parts, 'auto'))
+
+
+class StreamSplitter:
+    """
+    조금씩 도착하는 텍스트(스트리밍 응답)를 경계에서 끊어 방출.
+    모인 글자 수가 min_chars 이상이 된 첫 경계에서 조각 1개를 내보내고,
+    마지막에 flush() 로 남은 텍스트를 내보냅니다. 이미 훑은 부분은 다시 훑지 않습니다.
+    """
+
+    def __init__(self, min_chars: int = 80):
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._scanned = 0
+
+    def feed(self, text: str) -> List[str]:
+        """text 를 이어 붙이고 완성된 조각 목록 반환"""
+        buffer = self._buffer + text
+        ready = []
+        # 경계 앞 글자(lookbehind)와 버퍼 끝에서 잘린 '\\' 를 다시 보기 위해 두 글자 앞부터
+        pos = max(0, self._scanned - 2)
+        while True:
+            m = _BREAK_RE.search(buffer, max(pos, self.min_chars))
+            if m is None:
+                self._scanned = len(buffer)
+                break
+            # 버퍼 끝에 닿은 경계는 다음 입력과 이어질 수 있으므로 보류 (다음에 이 위치부터 다시 봄)
+            if m.end() == len(buffer):
+                self._scanned = m.start()
+                break
+            chunk = buffer[:m.start()].strip()
+            if chunk:
+                ready.append(chunk.replace(ESCAPED_NEWLINE, '\n'))
+            buffer = buffer[m.end():]
+            pos = 0
+        self._buffer = buffer
+        return ready
+
+    def flush(self) -> List[str]:
+        """남은 텍스트 전부 반환 (없으면 빈 목록)"""
+        text = self._buffer.strip().replace(ESCAPED_NEWLINE, '\n')
+        self._buffer = ""
+        self._scanned = 0
+        return [text] if text else []
@@ -0,0 +1,276 @@
+"""
+런타임 계측 (v1.0)
+
+느린 응답이 수집 대기 / to_thread 대기열 / Gemini 응답 / Discord 전송 중 어디서 생기는지
+구분할 수 있도록 단계별 소요 시간을 히스토그램으로 모읍니다.
+
+[구성]
+- Histogram: 고정 버킷 누적 카운트 + 합계 (Prometheus histogram 과 같은 형태, 메모리 일정)
+- metrics.stage(flow, stage): with 블록 소요 시간 → peanut_stage_seconds{flow, stage}
+  (동기 코드 / 코루틴 / to_thread 내부 어디서나 사용 가능 — 기록은 스레드 안전)
+- metrics.to_thread(task, fn, ...): asyncio.to_thread 대체
+  스레드 풀에서 실제로 실행되기까지 기다린 시간 → peanut_to_thread_wait_seconds{task}
+- LoopLagMonitor: 주기적으로 깨어나 예정보다 늦은 시간 → peanut_event_loop_lag_seconds
+  (동기 호출이 루프를 막고 있으면 커짐)
+- MetricsServer: METRICS_HOST:METRICS_PORT/metrics 에 Prometheus 텍스트 형식으로 노출
+
+기본 인스턴스는 모듈 변수 metrics 로 공유합니다.
+"""
+import asyncio
+import contextlib
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+# 초 단위 버킷 — 수 ms(루프 지연) ~ 1분(느린 생성)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_SECONDS     = 'peanut_stage_seconds'
+THREAD_WAIT       = 'peanut_to_thread_wait_seconds'
+LOOP_LAG          = 'peanut_event_loop_lag_seconds'
+ERRORS_TOTAL      = 'peanut_errors_total'
+
+HELP = {
+    STAGE_SECONDS: "처리 단계별 소요 시간",
+    THREAD_WAIT:   "asyncio.to_thread 제출 후 스레드 풀에서 실행되기까지 대기 시간",
+    LOOP_LAG:      "이벤트 루프 지연 (감시 태스크가 예정보다 늦게 깨어난 시간)",
+    ERRORS_TOTAL:  "단계별 오류 수",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """고정 버킷 히스토그램 (잠금은 Metrics 가 담당)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts  = [0] * (len(self.buckets) + 1)   # 마지막 칸 = +Inf
+        self.count   = 0
+        self.sum     = 0.0
+        self.max     = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """버킷 경계 사이 선형 보간으로 추정한 분위수 (+Inf 칸은 관측 최대값으로 상한)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if n and seen + n >= rank:
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+            lower = upper
+        return self.max
+
+
+class Metrics:
+    """히스토그램 / 카운터 / 게이지 모음 (라벨 조합마다 하나씩)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters:   Dict[Tuple[str, Labels], float] = {}
+        self._gauges:     Dict[Tuple[str, Labels], float] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, object]) -> Tuple[str, Labels]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    # ── 기록 ───────────────────────────────────────────────────────────
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def stage(self, flow: str, stage: str):
+        """with metrics.stage('chat', 'generate'): ..."""
+        return self.timer(STAGE_SECONDS, flow=flow, stage=stage)
+
+    def observe_stage(self, flow: str, stage: str, seconds: float):
+        self.observe(STAGE_SECONDS, seconds, flow=flow, stage=stage)
+
+    def error(self, flow: str, stage: str):
+        self.inc(ERRORS_TOTAL, flow=flow, stage=stage)
+
+    async def to_thread(self, task: str, func: Callable, *args, **kwargs):
+        """asyncio.to_thread + 스레드 풀 대기 시간 기록"""
+        submitted = time.perf_counter()
+
+        def run():
+            self.observe(THREAD_WAIT, time.perf_counter() - submitted, task=task)
+            return func(*args, **kwargs)
+
+        return await asyncio.to_thread(run)
+
+    # ── 조회 ───────────────────────────────────────────────────────────
+    def histograms(self, name: Optional[str] = None) -> List[Tuple[str, Dict[str, str], Histogram]]:
+        """(이름, 라벨, 히스토그램 사본) 목록"""
+        with self._lock:
+            items = [(n, dict(labels), _copy(h)) for (n, labels), h in self._histograms.items()
+                     if name is None or n == name]
+        return sorted(items, key=lambda item: (item[0], sorted(item[1].items())))
+
+    def counters(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            return sorted(((n, dict(labels), v) for (n, labels), v in self._counters.items()),
+                          key=lambda item: (item[0], sorted(item[1].items())))
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식 (0.0.4)"""
+        with self._lock:
+            histograms = [(n, labels, _copy(h)) for (n, labels), h in self._histograms.items()]
+            counters = list(self._counters.items())
+            gauges = list(self._gauges.items())
+
+        lines: List[str] = []
+        declared = set()
+
+        def declare(name: str, kind: str):
+            if name not in declared:
+                declared.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for name, labels, hist in sorted(histograms, key=lambda item: item[:2]):
+            declare(name, 'histogram')
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), hist.counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {hist.sum:.6f}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {hist.count}")
+        for (name, labels), value in sorted(counters):
+            declare(name, 'counter')
+            lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+        for (name, labels), value in sorted(gauges):
+            declare(name, 'gauge')
+            lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+        declare('peanut_uptime_seconds', 'gauge')
+        lines.append(f"peanut_uptime_seconds {time.time() - self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+            self.started = time.time()
+
+
+def _copy(hist: Histogram) -> Histogram:
+    clone = Histogram(hist.buckets)
+    clone.counts = list(hist.counts)
+    clone.count, clone.sum, clone.max = hist.count, hist.sum, hist.max
+    return clone
+
+
+def _fmt_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class LoopLagMonitor:
+    """interval 마다 깨어나 예정보다 늦은 시간을 기록하는 감시 태스크"""
+
+    def __init__(self, registry: "Metrics", interval: float = 0.5):
+        self.registry = registry
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.registry.observe(LOOP_LAG, lag)
+            self.registry.set_gauge('peanut_event_loop_lag_last_seconds', lag)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+class MetricsServer:
+    """GET /metrics 만 응답하는 로컬 HTTP 서버 (기본 127.0.0.1 — 외부에 열지 않음)"""
+
+    def __init__(self, registry: "Metrics", host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render_prometheus(),
+                            content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+metrics = Metrics()
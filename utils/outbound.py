@@ -0,0 +1,164 @@
+"""
+공용 메시지 전송기 (v1.0)
+
+Cog 마다 따로 channel.send() 를 호출하면서 생기던 문제를 한 곳에서 처리합니다.
+- PersonaHandler: 1900자 고정 위치로 잘라 단어/코드 블록 중간이 끊김
+- ChatHandler:    분할 모드가 꺼져 있으면 2000자를 넘는 응답 전송 자체가 실패
+
+[분할] split_for_discord()
+- OUTBOUND_MAX_CHARS 이하 조각으로 나누되 경계 우선순위는
+  코드 블록 경계 > 문단(빈 줄) > 줄바꿈 > 문장 끝 > 공백 > 글자 단위
+- 조각이 코드 블록 안에서 끝나면 ``` 로 닫고 다음 조각을 같은 언어의 ``` 로 다시 열어
+  각 조각이 독립적으로 올바르게 렌더링됨
+
+[전송] OutboundSender
+- 채널별 잠금: 한 응답의 조각들 사이에 다른 응답이 끼어들지 않음 (채널 간에는 동시 전송)
+- 채널별 전송 간격: OUTBOUND_CHANNEL_WINDOW 초 동안 OUTBOUND_CHANNEL_BURST 개까지
+  (Discord 채널 제한에 걸려 429 후 재시도하는 대신 미리 간격 조절)
+
+기본 인스턴스는 모듈 변수 outbound 로 공유합니다.
+"""
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import OUTBOUND_MAX_CHARS, OUTBOUND_CHANNEL_BURST, OUTBOUND_CHANNEL_WINDOW
+
+FENCE = "```"
+_FENCE_RE = re.compile(r'```([\w+#.-]*)(\n?)')
+# 코드 블록 경계: 펜스만 있는 줄
+_FENCE_LINE_RE = re.compile(r'^```[^\n`]*$', re.M)
+# 조각 경계 후보 (우선순위 순) — 매치의 end() 위치에서 자름
+_BOUNDARIES = (
+    re.compile(r'\n\s*\n'),
+    re.compile(r'\n'),
+    re.compile(r'(?:[.!?~]|[요다죠]|ㅋ{2,}|ㅎ{2,})[)"\']*[ \t]+'),
+    re.compile(r'[ \t]+'),
+)
+
+
+def _fence_state(text: str) -> Optional[str]:
+    """text 끝이 코드 블록 안이면 그 블록의 언어('' 가능), 밖이면 None"""
+    lang = None
+    for m in _FENCE_RE.finditer(text):
+        if lang is None:
+            lang = m.group(1) if m.group(2) else ''
+        else:
+            lang = None
+    return lang
+
+
+def _find_cut(window: str) -> int:
+    """window 안에서 자를 위치 (앞쪽 절반 이후의 가장 뒤 경계, 없으면 window 끝)"""
+    floor = len(window) // 2
+
+    fences = [m for m in _FENCE_LINE_RE.finditer(window)]
+    cuts = []
+    for i, m in enumerate(fences):
+        # 짝수 번째는 여는 펜스(앞에서 자름), 홀수 번째는 닫는 펜스(뒤에서 자름)
+        cuts.append(m.end() if i % 2 else m.start())
+    cuts = [c for c in cuts if c > floor]
+    if cuts:
+        return cuts[-1]
+
+    for pattern in _BOUNDARIES:
+        cut = -1
+        for m in pattern.finditer(window, floor):
+            cut = m.end()
+        if cut > 0:
+            return cut
+    return len(window)
+
+
+def split_for_discord(text: str, limit: int = OUTBOUND_MAX_CHARS) -> List[str]:
+    """limit 글자 이하 조각 목록 (빈 텍스트면 [])"""
+    text = text.strip()
+    chunks: List[str] = []
+    while text:
+        if len(text) <= limit:
+            chunks.append(text)
+            break
+        # 코드 블록을 닫을 자리("\n```") 확보
+        reserve = len(FENCE) + 1 if FENCE in text[:limit] else 0
+        window = text[:limit - reserve]
+        cut = _find_cut(window)
+        head, tail = text[:cut].rstrip(), text[cut:]
+
+        lang = _fence_state(head)
+        if lang is not None:
+            head = f"{head}\n{FENCE}"
+            tail = f"{FENCE}{lang}\n{tail.lstrip(chr(10))}"
+        else:
+            tail = tail.lstrip()
+        if head.strip():
+            chunks.append(head)
+        text = tail
+    return chunks
+
+
+class OutboundSender:
+    """채널별 순서 보장 + 전송 간격을 지키는 분할 전송기"""
+
+    def __init__(self, limit: int = OUTBOUND_MAX_CHARS, burst: int = OUTBOUND_CHANNEL_BURST,
+                 window: float = OUTBOUND_CHANNEL_WINDOW):
+        self.limit  = limit
+        self.burst  = burst
+        self.window = window
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # channel_id → 최근 전송 시각 (최대 burst 개)
+        self._sent_at: Dict[int, Deque[float]] = {}
+
+    @staticmethod
+    def _key(channel) -> int:
+        return getattr(channel, 'id', None) or id(channel)
+
+    async def _pace(self, key: int):
+        """최근 window 초 동안 burst 개를 보냈으면 가장 오래된 전송이 창을 벗어날 때까지 대기"""
+        history = self._sent_at.setdefault(key, deque(maxlen=self.burst))
+        if len(history) >= self.burst:
+            wait = history[0] + self.window - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        history.append(time.monotonic())
+
+    async def send(self, channel, text: str, *, prefix: str = "",
+                   header: Optional[str] = None) -> List:
+        """text 를 경계에 맞춰 나눠 전송 (각 조각 앞에 prefix). 보낸 메시지 목록 반환"""
+        return await self.send_parts(channel, [text], prefix=prefix, header=header)
+
+    async def send_parts(self, channel, parts: Sequence[str], *, prefix: str = "",
+                         header: Optional[str] = None,
+                         delay: Optional[Tuple[float, float]] = None) -> List:
+        """
+        이미 나눠진 parts 를 순서대로 전송 (한도를 넘는 part 는 다시 분할).
+        delay=(최소, 최대) 를 주면 part 사이에 무작위 간격을 둠 (분할 모드의 '타자 치는' 효과).
+        """
+        body_limit = self.limit - len(prefix)
+        groups = [split_for_discord(part, body_limit) for part in parts]
+        sent = []
+        key = self._key(channel)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+
+        async with lock:
+            if header:
+                await self._pace(key)
+                sent.append(await channel.send(header[:self.limit]))
+            first = True
+            for chunks in groups:
+                if not chunks:
+                    continue
+                if delay and not first:
+                    await asyncio.sleep(random.uniform(*delay))
+                first = False
+                for chunk in chunks:
+                    await self._pace(key)
+                    sent.append(await channel.send(f"{prefix}{chunk}"))
+        return sent
+
+
+outbound = OutboundSender()
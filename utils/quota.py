@@ -0,0 +1,147 @@
+"""
+사용자별 Gemini 호출 한도 (v1.0)
+
+한 사용자가 봇 채널에 메시지를 쏟아내면 생성 용량을 독차지해 다른 사람의 답장이 뒤로 밀리던 문제를 막습니다.
+
+[구조]
+- 사용자마다 분당 요청 수 / 분당 입력 토큰 수 토큰 버킷 2개 (utils/rate_limiter 와 같은 연속 충전 방식)
+- 한도는 서버 역할(role)별 설정: USER_QUOTA_DEFAULT 에 USER_QUOTA_ROLES 의 값을 덮어씀
+  (역할이 여러 개면 항목별로 가장 넉넉한 값, DM 등 역할이 없으면 기본값)
+- weight 는 utils/rate_limiter 공정 대기열의 몫 — bind_quota() 가 요청자로 함께 등록
+- 한도를 넘으면 바로 거절하지 않고 USER_QUOTA_MAX_WAIT 안에 채워질 때까지 기다림 (느려질 뿐 답장은 감)
+  그보다 오래 걸리면 False → 호출한 쪽이 QUOTA_NOTICE 로 "잠시 후" 안내
+
+[사용]
+    policy = bind_quota(message.author)                 # 리스너에서 1회
+    if not await user_quotas.acquire(user_id, tokens, policy): ...
+"""
+import asyncio
+import time
+from typing import Dict, NamedTuple, Tuple
+
+from config.settings import USER_QUOTA_DEFAULT, USER_QUOTA_ROLES, USER_QUOTA_MAX_WAIT, USER_QUOTA_IDLE_SECONDS
+from utils.rate_limiter import _Bucket, bind_requester
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class QuotaPolicy(NamedTuple):
+    """사용자 한도 (분당 요청 수, 분당 입력 토큰 수, 공정 대기열 가중치)"""
+    rpm: int
+    tpm: int
+    weight: float
+
+
+DEFAULT_POLICY = QuotaPolicy(**USER_QUOTA_DEFAULT)
+
+QUOTA_TOTAL = 'peanut_user_quota_total'
+QUOTA_NOTICE = "⏳ 메시지가 너무 빨리 쌓이고 있어요. 잠시 후에 다시 말 걸어 주세요!"
+
+
+def policy_for(member) -> QuotaPolicy:
+    """멤버의 역할로 한도 결정 (User / 역할 없음 → 기본값)"""
+    merged = dict(USER_QUOTA_DEFAULT)
+    for role in getattr(member, 'roles', ()):
+        override = USER_QUOTA_ROLES.get(role.id)
+        if override:
+            for field, value in override.items():
+                merged[field] = max(merged[field], value)
+    return QuotaPolicy(**merged)
+
+
+def bind_quota(member) -> QuotaPolicy:
+    """멤버의 한도를 계산하고 현재 컨텍스트의 공정 대기열 요청자로 등록"""
+    policy = policy_for(member)
+    bind_requester(member.id, policy.weight)
+    return policy
+
+
+class UserQuotas:
+    """사용자별 RPM / TPM 버킷 (이벤트 루프에서만 사용)"""
+
+    def __init__(self, max_wait: float = USER_QUOTA_MAX_WAIT, idle_seconds: float = USER_QUOTA_IDLE_SECONDS):
+        self.max_wait     = max_wait
+        self.idle_seconds = idle_seconds
+        # user_id → (정책, 요청 버킷, 토큰 버킷)
+        self._buckets: Dict[int, Tuple[QuotaPolicy, _Bucket, _Bucket]] = {}
+        self.throttled = 0      # 대기 후 통과
+        self.rejected  = 0      # 최대 대기 초과
+        self._pruned_at = time.monotonic()
+        self._notified: Dict[int, float] = {}   # user_id → 마지막 안내 시각
+
+    def _get(self, user_id: int, policy: QuotaPolicy) -> Tuple[_Bucket, _Bucket]:
+        entry = self._buckets.get(user_id)
+        if entry is None or entry[0] != policy:
+            # 새 사용자 또는 역할 변경 → 새 한도로 다시 시작
+            entry = self._buckets[user_id] = (policy, _Bucket(policy.rpm), _Bucket(policy.tpm))
+        return entry[1], entry[2]
+
+    def _wait_needed(self, user_id: int, tokens: int, policy: QuotaPolicy) -> float:
+        requests, token_bucket = self._get(user_id, policy)
+        now = time.monotonic()
+        requests.refill(now)
+        token_bucket.refill(now)
+        # 버킷 용량보다 큰 요청은 가득 찼을 때 통과 (영원히 대기 방지)
+        need = min(tokens, token_bucket.capacity)
+        return max(requests.wait_for(1), token_bucket.wait_for(need))
+
+    def available(self, user_id: int, tokens: int, policy: QuotaPolicy = DEFAULT_POLICY) -> bool:
+        """지금 여유가 있는지만 확인 (차감하지 않음)"""
+        return self._wait_needed(user_id, tokens, policy) <= 0
+
+    def try_acquire(self, user_id: int, tokens: int, policy: QuotaPolicy = DEFAULT_POLICY) -> bool:
+        """지금 여유가 있으면 차감 후 True (기다리지 않음)"""
+        if self._wait_needed(user_id, tokens, policy) > 0:
+            return False
+        requests, token_bucket = self._get(user_id, policy)
+        requests.level -= 1
+        token_bucket.level -= tokens
+        return True
+
+    async def acquire(self, user_id: int, tokens: int, policy: QuotaPolicy = DEFAULT_POLICY) -> bool:
+        """한도가 채워질 때까지 대기 후 차감 — max_wait 안에 안 되면 기다리지 않고 False"""
+        self._prune()
+        deadline = time.monotonic() + self.max_wait
+        throttled = False
+        while not self.try_acquire(user_id, tokens, policy):
+            wait = self._wait_needed(user_id, tokens, policy)
+            if time.monotonic() + wait > deadline:
+                self.rejected += 1
+                metrics.inc(QUOTA_TOTAL, outcome='rejected')
+                log.warning("quota.rejected", "⏳ 사용자 한도 초과 (대기 생략)", user_id=user_id, wait=round(wait, 1))
+                return False
+            if not throttled:
+                throttled = True
+                self.throttled += 1
+                metrics.inc(QUOTA_TOTAL, outcome='throttled')
+                log.info("quota.throttled", "⏳ 사용자 한도 대기", user_id=user_id, wait=round(wait, 1))
+            await asyncio.sleep(wait)
+        return True
+
+    def notice_due(self, user_id: int) -> bool:
+        """한도 초과 안내를 보낼 차례인지 (사용자당 USER_QUOTA_MAX_WAIT 에 1회 — 안내도 도배가 되지 않게)"""
+        now = time.monotonic()
+        if now - self._notified.get(user_id, 0.0) < self.max_wait:
+            return False
+        self._notified[user_id] = now
+        return True
+
+    def _prune(self):
+        """버킷이 가득 찬 채 오래 쉰 사용자 정리 (idle_seconds 마다 1회)"""
+        now = time.monotonic()
+        if now - self._pruned_at < self.idle_seconds:
+            return
+        self._pruned_at = now
+        idle = [uid for uid, (_, requests, _) in self._buckets.items()
+                if now - requests.updated > self.idle_seconds]
+        for uid in idle:
+            del self._buckets[uid]
+        self._notified = {uid: t for uid, t in self._notified.items() if now - t < self.max_wait}
+
+    def snapshot(self) -> Dict[str, int]:
+        return {'users': len(self._buckets), 'throttled': self.throttled, 'rejected': self.rejected}
+
+
+user_quotas = UserQuotas()
@@ -0,0 +1,236 @@
+"""
+Gemini API 공용 속도 제한기 (v1.1)
+
+[v1.1 변경]
+- FEATURE: 같은 우선순위 안에서 사용자 간 가중 공정 대기열 (start-time fair queuing)
+  · 리스너가 bind_requester(user_id, weight) 로 요청자를 지정하면 대기 순서를 태그로 결정
+    태그 = max(가상 시각, 그 사용자의 직전 완료 태그), 완료 태그 = 태그 + 토큰 / weight
+  · 한도가 빠듯할 때 요청을 몰아 보낸 사용자의 태그가 뒤로 밀려 가끔 쓰는 사용자가 먼저 허가받음
+  · 요청자가 없는 호출(배경 작업 등)은 도착 시각의 가상 시각을 태그로 사용
+
+GeminiClient / EmotionAnalyzer / PersonaSession / 요약기가 각자 API 를 호출하면서
+순간적으로 몰린 요청이 429 로 돌아와 사용자에게 오류로 노출되던 문제를 막습니다.
+
+[구조]
+- 모델별 토큰 버킷 2개: 분당 요청 수(RPM), 분당 입력 토큰 수(TPM)
+  · 버킷은 1분에 걸쳐 연속적으로 채워짐 (순간 몰림은 용량만큼 허용)
+- 우선순위: CHAT(사용자 답장) > REACTION(감정 리액션) > BACKGROUND(요약 등)
+  · 하위 클래스는 버킷에 여유분(RATE_LIMIT_HEADROOM)이 남아 있을 때만 사용 가능
+  · 상위 클래스가 대기 중이면 하위 클래스는 양보
+- 동기 호출(to_thread 내부)은 acquire(), 코루틴은 acquire_async() 사용
+- 응답의 실제 입력 토큰 수로 settle() 하면 추정 오차를 보정
+
+기본 인스턴스는 모듈 변수 rate_limiter 로 공유합니다.
+"""
+import asyncio
+import contextvars
+import itertools
+import threading
+import time
+from enum import IntEnum
+from typing import Dict, Optional, Tuple
+
+from config.settings import (
+    RATE_LIMITS, RATE_LIMIT_DEFAULT, RATE_LIMIT_HEADROOM
+)
+
+
+class Priority(IntEnum):
+    """작을수록 우선"""
+    CHAT       = 0
+    REACTION   = 1
+    BACKGROUND = 2
+
+
+class RateLimitTimeout(Exception):
+    """제한 시간 안에 호출 허가를 받지 못함"""
+
+
+# 공정 대기열 요청자 (user_id, weight) — 태스크 / to_thread / 헤지 스레드로 전파
+_requester: contextvars.ContextVar[Tuple[Optional[int], float]] = \
+    contextvars.ContextVar('rate_limit_requester', default=(None, 1.0))
+
+
+def bind_requester(user_id: Optional[int], weight: float = 1.0):
+    """현재 컨텍스트(태스크)의 Gemini 호출을 user_id 의 몫으로 대기열에 넣음"""
+    _requester.set((user_id, weight))
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 추정 (한글 위주 대화 기준 약 2자 = 1토큰, 보수적으로 계산)"""
+    return len(text) // 2 + 1
+
+
+def prompt_tokens(response) -> Optional[int]:
+    """응답의 실제 입력 토큰 수 (usage_metadata 없으면 None)"""
+    usage = getattr(response, 'usage_metadata', None)
+    return getattr(usage, 'prompt_token_count', None) if usage else None
+
+
+class _Bucket:
+    """분당 capacity 만큼 연속적으로 채워지는 토큰 버킷"""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.rate     = capacity / 60.0
+        self.level    = capacity
+        self.updated  = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """amount 만큼 채워지기까지 남은 시간(초)"""
+        return max(0.0, (amount - self.level) / self.rate)
+
+
+class RateLimiter:
+    """모델별 RPM/TPM 토큰 버킷 + 우선순위 클래스"""
+
+    # 대기 중 재확인 최대 간격 (다른 요청의 settle/우선순위 변화 반영)
+    POLL_INTERVAL = 0.5
+    # 사용자별 완료 태그 보관 상한 (넘으면 밀린 몫이 없는 사용자부터 정리)
+    FINISH_TAGS_LIMIT = 1024
+
+    def __init__(self, limits: Dict[str, Tuple[int, int]], default: Tuple[int, int],
+                 headroom: Dict[str, float]):
+        self.limits   = dict(limits)
+        self.default  = default
+        self.headroom = {p: headroom.get(p.name.lower(), 0.0) for p in Priority}
+        self._lock    = threading.Condition()
+        self._buckets: Dict[str, Tuple[_Bucket, _Bucket]] = {}
+        # model → 우선순위별 대기 수
+        self._waiting: Dict[str, Dict[Priority, int]] = {}
+        # 공정 대기열: (model, priority) → {ticket: 태그} / 가상 시각 / 사용자별 직전 완료 태그
+        self._tickets = itertools.count()
+        self._tags: Dict[Tuple[str, Priority], Dict[int, float]] = {}
+        self._vtime: Dict[Tuple[str, Priority], float] = {}
+        self._finish: Dict[Tuple[str, Priority, int], float] = {}
+
+    def _get(self, model: str) -> Tuple[_Bucket, _Bucket]:
+        buckets = self._buckets.get(model)
+        if buckets is None:
+            rpm, tpm = self.limits.get(model, self.default)
+            buckets = self._buckets[model] = (_Bucket(rpm), _Bucket(tpm))
+        return buckets
+
+    def _try_take(self, model: str, tokens: int, priority: Priority, ticket: int) -> float:
+        """허가되면 차감 후 0 반환, 아니면 재시도까지 대기 시간(초)"""
+        waiting = self._waiting.get(model, {})
+        if any(waiting.get(p, 0) for p in Priority if p < priority):
+            return self.POLL_INTERVAL
+        # 같은 우선순위에서 태그가 더 앞선 대기자에게 양보
+        tags = self._tags[(model, priority)]
+        mine = (tags[ticket], ticket)
+        if any((tag, other) < mine for other, tag in tags.items()):
+            return self.POLL_INTERVAL
+
+        requests, token_bucket = self._get(model)
+        now = time.monotonic()
+        requests.refill(now)
+        token_bucket.refill(now)
+
+        reserve = self.headroom[priority]
+        # 버킷 용량보다 큰 요청은 가득 찼을 때 통과시킴 (영원히 대기 방지)
+        need_tokens = min(tokens, token_bucket.capacity * (1 - reserve))
+        need_req = 1 + requests.capacity * reserve
+        need_tok = need_tokens + token_bucket.capacity * reserve
+
+        if requests.level >= need_req and token_bucket.level >= need_tok:
+            requests.level -= 1
+            token_bucket.level -= tokens
+            key = (model, priority)
+            self._vtime[key] = max(self._vtime.get(key, 0.0), mine[0])
+            return 0.0
+        return max(requests.wait_for(need_req), token_bucket.wait_for(need_tok), 0.01)
+
+    def _enter(self, model: str, priority: Priority, tokens: int) -> int:
+        """대기 등록 + 공정 대기열 태그 발급 → ticket"""
+        waiting = self._waiting.setdefault(model, {})
+        waiting[priority] = waiting.get(priority, 0) + 1
+
+        key = (model, priority)
+        user_id, weight = _requester.get()
+        start = self._vtime.get(key, 0.0)
+        if user_id is not None:
+            start = max(start, self._finish.get((model, priority, user_id), 0.0))
+            self._finish[(model, priority, user_id)] = start + max(tokens, 1) / max(weight, 0.01)
+        ticket = next(self._tickets)
+        self._tags.setdefault(key, {})[ticket] = start
+        return ticket
+
+    def _leave(self, model: str, priority: Priority, ticket: int):
+        self._waiting[model][priority] -= 1
+        del self._tags[(model, priority)][ticket]
+        if len(self._finish) > self.FINISH_TAGS_LIMIT:
+            # 가상 시각을 이미 지난 사용자 = 밀린 몫 없음 → 기록 불필요
+            self._finish = {k: f for k, f in self._finish.items() if f > self._vtime.get(k[:2], 0.0)}
+
+    def acquire(self, model: str, tokens: int = 0, priority: Priority = Priority.CHAT,
+                timeout: Optional[float] = None):
+        """호출 허가를 받을 때까지 대기 (blocking — to_thread 내부에서 사용)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            ticket = self._enter(model, priority, tokens)
+            try:
+                while True:
+                    wait = self._try_take(model, tokens, priority, ticket)
+                    if wait == 0.0:
+                        return
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise RateLimitTimeout(f"{model} 호출 한도 대기 시간 초과")
+                        wait = min(wait, remaining)
+                    self._lock.wait(min(wait, self.POLL_INTERVAL))
+            finally:
+                self._leave(model, priority, ticket)
+                self._lock.notify_all()
+
+    async def acquire_async(self, model: str, tokens: int = 0,
+                            priority: Priority = Priority.BACKGROUND,
+                            timeout: Optional[float] = None):
+        """acquire() 의 코루틴 버전 — 대기 중 이벤트 루프/스레드를 점유하지 않음"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            ticket = self._enter(model, priority, tokens)
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_take(model, tokens, priority, ticket)
+                if wait == 0.0:
+                    return
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RateLimitTimeout(f"{model} 호출 한도 대기 시간 초과")
+                    wait = min(wait, remaining)
+                await asyncio.sleep(min(wait, self.POLL_INTERVAL))
+        finally:
+            with self._lock:
+                self._leave(model, priority, ticket)
+                self._lock.notify_all()
+
+    def settle(self, model: str, estimated: int, actual: Optional[int]):
+        """실제 사용 토큰으로 추정치 보정 (usage_metadata 가 없으면 무시)"""
+        if actual is None:
+            return
+        with self._lock:
+            token_bucket = self._get(model)[1]
+            token_bucket.level = min(token_bucket.capacity, token_bucket.level + estimated - actual)
+            self._lock.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """모델별 현재 잔여량 (상태 표시용)"""
+        with self._lock:
+            now = time.monotonic()
+            result = {}
+            for model, (requests, token_bucket) in self._buckets.items():
+                requests.refill(now)
+                token_bucket.refill(now)
+                result[model] = {'rpm': requests.level, 'tpm': token_bucket.level}
+            return result
+
+
+rate_limiter = RateLimiter(RATE_LIMITS, RATE_LIMIT_DEFAULT, RATE_LIMIT_HEADROOM)
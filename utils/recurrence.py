@@ -0,0 +1,275 @@
+"""
+반복 규칙 유틸리티 (v1.0)
+
+예약 메시지의 반복 주기를 해석하고 다음 발생 시각을 계산합니다.
+
+[지원 형식]
+- 별칭:   daily / weekly / weekdays / weekends / hourly / monthly
+          (매일 / 매주 / 평일 / 주말 / 매시간 / 매월)
+- RRULE:  FREQ=DAILY;INTERVAL=2
+          FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=10
+          FREQ=HOURLY;UNTIL=2026-12-31T23:59
+  (FREQ: MINUTELY/HOURLY/DAILY/WEEKLY/MONTHLY, 시각은 최초 예약 시각 기준)
+- cron:   cron 0 9 * * 1-5   (분 시 일 월 요일, 요일 0/7=일요일)
+
+설계 원칙:
+- 다음 발생 시각만 계산: 과거 발생분을 순회하지 않고 산술적으로 건너뜀
+- 파싱은 예약 등록/로드 시 1회만 수행
+- 잘못된 규칙은 ValueError (메시지는 사용자에게 그대로 노출 가능)
+"""
+from calendar import monthrange
+from datetime import datetime, date, time as dt_time, timedelta
+from typing import Dict, List, Optional, Set, Union
+
+WEEKDAY_CODES = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+RULE_ALIASES: Dict[str, str] = {
+    'daily':    'FREQ=DAILY',
+    'weekly':   'FREQ=WEEKLY',
+    'weekdays': 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR',
+    'weekends': 'FREQ=WEEKLY;BYDAY=SA,SU',
+    'hourly':   'FREQ=HOURLY',
+    'monthly':  'FREQ=MONTHLY',
+    '매일':     'FREQ=DAILY',
+    '매주':     'FREQ=WEEKLY',
+    '평일':     'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR',
+    '주말':     'FREQ=WEEKLY;BYDAY=SA,SU',
+    '매시간':   'FREQ=HOURLY',
+    '매월':     'FREQ=MONTHLY',
+}
+
+_FIXED_STEPS = {
+    'MINUTELY': timedelta(minutes=1),
+    'HOURLY':   timedelta(hours=1),
+    'DAILY':    timedelta(days=1),
+}
+
+# cron 검색 상한 (2월 29일 같은 희소 규칙도 커버)
+_CRON_SEARCH_DAYS = 366 * 8
+
+
+class RRule:
+    """RRULE 부분집합 (FREQ / INTERVAL / BYDAY / COUNT / UNTIL)"""
+
+    def __init__(self, text: str, freq: str, interval: int = 1,
+                 byday: Optional[List[int]] = None, count: Optional[int] = None,
+                 until: Optional[datetime] = None):
+        self.text     = text
+        self.freq     = freq
+        self.interval = interval
+        self.byday    = byday
+        self.count    = count
+        self.until    = until
+
+    def next_after(self, after: datetime, anchor: datetime) -> Optional[datetime]:
+        """after 이후(초과) 첫 발생 시각. anchor는 최초 예약 시각. 종료 시 None"""
+        if self.freq in _FIXED_STEPS:
+            nxt = self._next_fixed(after, anchor, _FIXED_STEPS[self.freq] * self.interval)
+        elif self.freq == 'WEEKLY':
+            nxt = self._next_weekly(after, anchor)
+        else:
+            nxt = self._next_monthly(after, anchor)
+
+        if nxt is not None and self.until is not None and nxt > self.until:
+            return None
+        return nxt
+
+    @staticmethod
+    def _next_fixed(after: datetime, anchor: datetime, step: timedelta) -> datetime:
+        if after < anchor:
+            return anchor
+        k = (after - anchor) // step + 1
+        return anchor + step * k
+
+    def _next_weekly(self, after: datetime, anchor: datetime) -> datetime:
+        if not self.byday:
+            return self._next_fixed(after, anchor, timedelta(weeks=self.interval))
+
+        week0 = datetime.combine(anchor.date() - timedelta(days=anchor.weekday()), anchor.time())
+        period = timedelta(weeks=self.interval)
+        k = max(0, (after - week0) // period) if after > week0 else 0
+        # 해당 주기 주 + 다음 주기 주만 보면 반드시 발견됨
+        for w in (k, k + 1):
+            base = week0 + period * w
+            for wd in self.byday:
+                cand = base + timedelta(days=wd)
+                if cand > after and cand >= anchor:
+                    return cand
+        return week0 + period * (k + 2) + timedelta(days=self.byday[0])
+
+    def _next_monthly(self, after: datetime, anchor: datetime) -> Optional[datetime]:
+        if after < anchor:
+            return anchor
+        months = (after.year - anchor.year) * 12 + (after.month - anchor.month)
+        k = months // self.interval
+        # 31일처럼 없는 날짜는 건너뜀 (최대 4년 탐색)
+        for step in range(k, k + 48 // self.interval + 2):
+            total = anchor.month - 1 + step * self.interval
+            year, month = anchor.year + total // 12, total % 12 + 1
+            if anchor.day > monthrange(year, month)[1]:
+                continue
+            cand = anchor.replace(year=year, month=month)
+            if cand > after:
+                return cand
+        return None
+
+
+class CronRule:
+    """cron 5필드 규칙 (분 시 일 월 요일)"""
+
+    count = None
+    until = None
+
+    def __init__(self, text: str, minutes: Set[int], hours: Set[int], days: Set[int],
+                 months: Set[int], weekdays: Set[int], dom_any: bool, dow_any: bool):
+        self.text     = text
+        self.minutes  = sorted(minutes)
+        self.hours    = sorted(hours)
+        self.days     = days
+        self.months   = months
+        self.weekdays = weekdays     # cron 기준: 0=일요일
+        self.dom_any  = dom_any
+        self.dow_any  = dow_any
+
+    def _day_matches(self, d: date) -> bool:
+        if d.month not in self.months:
+            return False
+        dom_ok = d.day in self.days
+        dow_ok = (d.weekday() + 1) % 7 in self.weekdays
+        # cron 표준: 일/요일 둘 다 지정되면 OR, 하나만 지정되면 그 필드만
+        if self.dom_any:
+            return dow_ok
+        if self.dow_any:
+            return dom_ok
+        return dom_ok or dow_ok
+
+    def next_after(self, after: datetime, anchor: datetime) -> Optional[datetime]:
+        start = (after + timedelta(minutes=1)).replace(second=0, microsecond=0)
+        if start < anchor:
+            start = anchor.replace(second=0, microsecond=0)
+        day, start_h, start_m = start.date(), start.hour, start.minute
+        for _ in range(_CRON_SEARCH_DAYS):
+            if self._day_matches(day):
+                for h in self.hours:
+                    if h < start_h:
+                        continue
+                    for m in self.minutes:
+                        if h == start_h and m < start_m:
+                            continue
+                        return datetime.combine(day, dt_time(h, m))
+            day += timedelta(days=1)
+            start_h = start_m = 0
+        return None
+
+
+Rule = Union[RRule, CronRule]
+
+
+def _parse_cron_field(field: str, lo: int, hi: int, name: str) -> Set[int]:
+    values: Set[int] = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"cron {name} 간격은 1 이상이어야 합니다: {field}")
+        if part == '*':
+            start, end = lo, hi
+        elif '-' in part:
+            a, b = part.split('-', 1)
+            start, end = int(a), int(b)
+        else:
+            start = int(part)
+            end = hi if step > 1 else start
+        if not (lo <= start <= hi and lo <= end <= hi and start <= end):
+            raise ValueError(f"cron {name} 범위({lo}~{hi})를 벗어났습니다: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def _parse_cron(text: str) -> CronRule:
+    fields = text.split()
+    if len(fields) != 5:
+        raise ValueError("cron 규칙은 '분 시 일 월 요일' 5개 필드가 필요합니다.")
+    try:
+        minutes  = _parse_cron_field(fields[0], 0, 59, '분')
+        hours    = _parse_cron_field(fields[1], 0, 23, '시')
+        days     = _parse_cron_field(fields[2], 1, 31, '일')
+        months   = _parse_cron_field(fields[3], 1, 12, '월')
+        weekdays = {d % 7 for d in _parse_cron_field(fields[4], 0, 7, '요일')}
+    except ValueError as e:
+        if 'cron' in str(e):
+            raise
+        raise ValueError(f"cron 규칙을 해석할 수 없습니다: {text}")
+    return CronRule(
+        f"cron {text}", minutes, hours, days, months, weekdays,
+        dom_any=fields[2] == '*', dow_any=fields[4] == '*'
+    )
+
+
+def _parse_rrule(text: str) -> RRule:
+    parts: Dict[str, str] = {}
+    for item in text.upper().split(';'):
+        if not item:
+            continue
+        if '=' not in item:
+            raise ValueError(f"RRULE 항목 형식이 올바르지 않습니다: {item}")
+        key, value = item.split('=', 1)
+        parts[key.strip()] = value.strip()
+
+    freq = parts.pop('FREQ', None)
+    if freq not in ('MINUTELY', 'HOURLY', 'DAILY', 'WEEKLY', 'MONTHLY'):
+        raise ValueError("FREQ는 MINUTELY/HOURLY/DAILY/WEEKLY/MONTHLY 중 하나여야 합니다.")
+
+    try:
+        interval = int(parts.pop('INTERVAL', '1'))
+        count = int(parts.pop('COUNT')) if 'COUNT' in parts else None
+    except ValueError:
+        raise ValueError("INTERVAL/COUNT는 정수여야 합니다.")
+    if interval < 1 or (count is not None and count < 1):
+        raise ValueError("INTERVAL/COUNT는 1 이상이어야 합니다.")
+
+    byday = None
+    if 'BYDAY' in parts:
+        if freq != 'WEEKLY':
+            raise ValueError("BYDAY는 FREQ=WEEKLY 에서만 사용할 수 있습니다.")
+        codes = parts.pop('BYDAY').split(',')
+        if any(c not in WEEKDAY_CODES for c in codes):
+            raise ValueError("BYDAY는 MO,TU,WE,TH,FR,SA,SU 조합이어야 합니다.")
+        byday = sorted({WEEKDAY_CODES.index(c) for c in codes})
+
+    until = None
+    if 'UNTIL' in parts:
+        raw = parts.pop('UNTIL')
+        try:
+            until = datetime.fromisoformat(raw)
+        except ValueError:
+            raise ValueError(f"UNTIL 형식이 올바르지 않습니다: {raw}")
+
+    if parts:
+        raise ValueError(f"지원하지 않는 RRULE 항목: {', '.join(parts)}")
+
+    return RRule(text.upper(), freq, interval, byday, count, until)
+
+
+def parse_recurrence(expr: str) -> Rule:
+    """반복 규칙 문자열 → Rule (잘못된 형식이면 ValueError)"""
+    text = expr.strip()
+    if not text:
+        raise ValueError("반복 규칙이 비어 있습니다.")
+    alias = RULE_ALIASES.get(text.lower())
+    if alias:
+        return _parse_rrule(alias)
+    if text.lower().startswith('cron'):
+        return _parse_cron(text[4:].strip())
+    if text.upper().startswith('RRULE:'):
+        return _parse_rrule(text[6:])
+    if text.upper().startswith('FREQ='):
+        return _parse_rrule(text)
+    if len(text.split()) == 5:
+        return _parse_cron(text)
+    raise ValueError(
+        f"알 수 없는 반복 규칙: {text}\n"
+        "예: daily, weekdays, FREQ=WEEKLY;BYDAY=MO,WE, cron 0 9 * * 1-5"
+    )
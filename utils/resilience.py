@@ -0,0 +1,235 @@
+"""
+Gemini 호출 복원력 유틸리티 (v1.1 - 마감 시간은 요청 타임아웃으로)
+
+[v1.1 변경]
+- call_with_deadline() 제거 — 마감 시간에 호출자만 포기하고 작업 스레드는 요청을 끝까지 실행해서
+  버려진 요청이 속도 제한 / 비용을 계속 쓰고 뒤늦게 usage.record / settle 까지 하던 문제
+  → 호출하는 쪽이 남은 시간을 요청 타임아웃(http_options.timeout)으로 넘기고 (utils/gemini_client.py)
+    재시도는 deadline 을 넘기는 대기를 하지 않고 DeadlineExceeded
+
+[재시도]
+- is_retryable(): 429 / 408 / 5xx / 타임아웃 / 연결 오류만 재시도 대상
+- 지수 백오프 + full jitter: uniform(0, min(max_delay, base * 2^n))
+- 서버가 알려준 대기 시간(Retry-After 헤더, RetryInfo.retryDelay)이 있으면 그 값을 우선
+  · 그 값이 GEMINI_RETRY_MAX_DELAY 보다 길면 기다리지 않고 즉시 실패 (답장이 너무 늦어짐)
+
+[헤지 요청]
+- LatencyTracker 로 모델별 최근 응답 시간을 기록
+- 첫 요청이 p95 를 넘기면 같은 요청을 하나 더 보내고 먼저 끝난 결과 사용
+- 헤지 요청은 속도 제한기 여유가 있을 때만 (backup 이 실패하면 첫 요청을 계속 기다림)
+
+[마감 시간]
+- remaining(deadline): 남은 시간 (지났으면 DeadlineExceeded) — 요청 타임아웃 / 한도 대기 상한 계산용
+- call_with_retry(deadline=...): 재시도 대기가 마감 시간을 넘기면 기다리지 않고 DeadlineExceeded
+
+헤지 스레드 풀은 호출한 쪽의 contextvars(로그 cid, 토큰 집계 귀속)를 복사해 실행합니다.
+"""
+import asyncio
+import contextvars
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeout, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import httpx
+from google.genai import errors as genai_errors
+
+from config.settings import (
+    GEMINI_RETRY_ATTEMPTS, GEMINI_RETRY_BASE_DELAY, GEMINI_RETRY_MAX_DELAY,
+    GEMINI_HEDGE_MIN_SAMPLES, GEMINI_HEDGE_MIN_DELAY
+)
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+T = TypeVar('T')
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_DURATION_RE = re.compile(r'^\s*([\d.]+)\s*s?\s*$')
+
+# 헤지 풀은 실제 API 호출(말단 작업)만 실행
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gemini-hedge")
+
+
+def _submit(pool: ThreadPoolExecutor, fn: Callable[[], T]):
+    """현재 contextvars 를 복사해 풀에서 실행 (asyncio.to_thread 와 같은 동작)"""
+    return pool.submit(contextvars.copy_context().run, fn)
+
+
+class DeadlineExceeded(Exception):
+    """요청이 마감 시간 안에 끝나지 않음"""
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """마감 시각(time.monotonic 기준)까지 남은 초 — 마감이 없으면 None, 지났으면 DeadlineExceeded"""
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("마감 시간 안에 응답 없음")
+    return left
+
+
+# ---------------------------------------------------------------------- #
+#  오류 분류
+# ---------------------------------------------------------------------- #
+def is_retryable(exc: BaseException) -> bool:
+    """일시적 오류(재시도하면 성공할 수 있는 오류)인지 판단"""
+    if isinstance(exc, genai_errors.APIError):
+        return exc.code in RETRYABLE_STATUS
+    return isinstance(exc, (httpx.TimeoutException, httpx.TransportError,
+                            TimeoutError, ConnectionError))
+
+
+def _find_retry_delay(data: Any) -> Optional[float]:
+    """에러 본문에서 RetryInfo.retryDelay ("27s") 탐색"""
+    if isinstance(data, dict):
+        value = data.get('retryDelay')
+        if isinstance(value, str):
+            match = _DURATION_RE.match(value)
+            if match:
+                return float(match.group(1))
+        data = list(data.values())
+    if isinstance(data, list):
+        for item in data:
+            found = _find_retry_delay(item)
+            if found is not None:
+                return found
+    return None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """서버가 지정한 재시도 대기 시간(초). 없으면 None"""
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers:
+        value = headers.get('retry-after')
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                pass
+    return _find_retry_delay(getattr(exc, 'details', None))
+
+
+def backoff_delay(attempt: int, base: float = GEMINI_RETRY_BASE_DELAY,
+                  max_delay: float = GEMINI_RETRY_MAX_DELAY) -> float:
+    """attempt 번째(0부터) 재시도 전 대기 시간 — full jitter"""
+    return random.uniform(0, min(max_delay, base * (2 ** attempt)))
+
+
+def _next_delay(exc: BaseException, attempt: int, attempts: int) -> Optional[float]:
+    """재시도할 경우 대기 시간, 재시도하지 않을 경우 None"""
+    if attempt >= attempts - 1 or not is_retryable(exc):
+        return None
+    server_delay = retry_after(exc)
+    if server_delay is not None:
+        return server_delay if server_delay <= GEMINI_RETRY_MAX_DELAY else None
+    return backoff_delay(attempt)
+
+
+# ---------------------------------------------------------------------- #
+#  재시도
+# ---------------------------------------------------------------------- #
+def call_with_retry(fn: Callable[[], T], attempts: int = GEMINI_RETRY_ATTEMPTS, label: str = "",
+                    deadline: Optional[float] = None) -> T:
+    """동기 호출 재시도 (to_thread 내부에서 사용) — deadline 을 넘기는 재시도 대기는 하지 않음"""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            delay = _next_delay(e, attempt, attempts)
+            if delay is None:
+                raise
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise DeadlineExceeded(f"재시도 대기가 마감 시간을 넘김: {e}") from e
+            log.warning("gemini.retry", f"🔁 Gemini 재시도 {attempt + 1}/{attempts - 1}", label=label.strip(), delay=round(delay, 2), error=str(e))
+            time.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+async def call_with_retry_async(fn: Callable[[], Awaitable[T]], attempts: int = GEMINI_RETRY_ATTEMPTS,
+                                label: str = "", deadline: Optional[float] = None) -> T:
+    """코루틴 호출 재시도 — deadline 을 넘기는 재시도 대기는 하지 않음"""
+    for attempt in range(attempts):
+        try:
+            return await fn()
+        except Exception as e:
+            delay = _next_delay(e, attempt, attempts)
+            if delay is None:
+                raise
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise DeadlineExceeded(f"재시도 대기가 마감 시간을 넘김: {e}") from e
+            log.warning("gemini.retry", f"🔁 Gemini 재시도 {attempt + 1}/{attempts - 1}", label=label.strip(), delay=round(delay, 2), error=str(e))
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+# ---------------------------------------------------------------------- #
+#  응답 시간 추적 / 헤지
+# ---------------------------------------------------------------------- #
+class LatencyTracker:
+    """키(모델)별 최근 응답 시간 롤링 윈도우"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, key: str, pct: float, min_samples: int = GEMINI_HEDGE_MIN_SAMPLES) -> Optional[float]:
+        """최근 응답 시간의 pct 백분위수 (표본이 부족하면 None)"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(len(samples) * pct / 100))
+        return samples[index]
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def reset(self, key: str):
+        with self._lock:
+            self._samples.pop(key, None)
+
+
+latency_tracker = LatencyTracker()
+
+
+def hedged_call(primary: Callable[[], T], delay: Optional[float],
+                backup: Optional[Callable[[], T]] = None) -> T:
+    """
+    primary 가 delay 초 안에 끝나지 않으면 backup 을 동시에 실행하고 먼저 성공한 결과 반환.
+    delay 가 None 이면 primary 만 실행. 둘 다 실패하면 primary 의 오류를 올림.
+    늦게 끝난 쪽은 백그라운드에서 끝까지 실행된 뒤 버려집니다.
+    """
+    if delay is None:
+        return primary()
+    first = _submit(_hedge_pool, primary)
+    try:
+        return first.result(timeout=max(delay, GEMINI_HEDGE_MIN_DELAY))
+    except FutureTimeout:
+        pass
+
+    second = _submit(_hedge_pool, backup or primary)
+    pending = {first, second}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    log.info("gemini.hedge_won", "⚡ 헤지 요청이 먼저 응답", hedge_delay=round(delay, 2))
+                return future.result()
+    return first.result()
+
@@ -0,0 +1,308 @@
+"""
+SQLite 저장소 (v1.2 - 로드 실패 시 영속화 중단)
+
+JournalStore 와 동일한 인터페이스(load/get/all/find/put/delete/clear/flush/close)를
+SQLite 테이블 위에 구현합니다. STORAGE_BACKEND = 'sqlite' 일 때 사용됩니다.
+
+[설계]
+- 연결 1개 + 전용 스레드 1개를 모든 컬렉션이 공유 (sqlite3 연결은 스레드 간 공유 불가)
+- 쓰기(put/delete/clear): 메모리 반영 + 큐 적재 후 즉시 반환 → 이벤트 루프 blocking 없음
+  큐가 비는 시점(또는 SQLITE_COMMIT_EVERY 건마다)에 한 번에 commit
+- 읽기(get/find/all): load() 때 읽어 둔 메모리 레코드 + 해시 인덱스에서 처리 (RecordIndex 공유)
+- 컬렉션별 테이블: key PRIMARY KEY + data(JSON) + index_fields 컬럼(각각 인덱스)
+- JSON 파일은 가져오기/내보내기 형식으로 유지
+  · 처음 여는 컬렉션이 비어 있으면 기존 JSON 스냅샷(+저널)을 가져옴
+  · close() 시 (cog_unload 또는 atexit) 기존과 같은 형식으로 JSON 스냅샷을 원자적으로 내보냄
+  · 가져오기/내보내기 때의 JSON 수정 시각을 _json_sync 테이블에 기록
+    → 이후 JSON 이 더 새로울 때만 (저널 백엔드로 돌아갔다 온 경우 등) 다시 가져옴
+
+[v1.2 변경]
+- BUG FIX: load() 의 JSON 가져오기가 실패해도 (손상된 JSON / 중복 키) 이후 close() 가 빈 메모리 레코드로
+  JSON 을 내보내 원본 스냅샷을 덮어쓰던 문제
+  → 로드가 끝까지 성공한 경우에만 DB 쓰기 / JSON 내보내기 수행. 실패하면 이번 실행의 변경은 메모리에만 유지
+  (실패한 상태에서 DB 에 행이 생기면 다음 실행이 JSON 을 오래된 것으로 보고 가져오지 않으므로 쓰기도 막음)
+
+[v1.1 변경]
+- BUG FIX: get/find/all 이 전용 스레드 결과를 future.result() 로 기다려 이벤트 루프를 막던 문제
+  → 조회는 메모리에서 처리, SQLite 는 쓰기 전용 영속화 계층
+- BUG FIX: JSON 내보내기가 cog_unload → close() 에서만 실행되어, 정상 종료에도 스냅샷이 갱신되지 않던 문제
+  → load() 시 atexit 에 close() 등록 (공유 연결 종료보다 먼저 실행)
+- BUG FIX: 내보내기 없이 종료된 뒤 테이블이 비어 있으면 (전체 삭제 등) 오래된 JSON 을 다시 가져와
+  삭제한 레코드가 되살아나던 문제 → JSON 이 마지막 동기화 이후 바뀐 경우에만 가져옴
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import SQLITE_COMMIT_EVERY
+from utils.journal_store import RecordIndex, read_json_records
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_CLOSE = object()
+
+
+class _SQLiteWorker:
+    """단일 sqlite3 연결을 소유하는 전용 스레드"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="sqlite-store", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        pending = 0
+        while True:
+            item = self._queue.get()
+            if item is _CLOSE:
+                conn.commit()
+                conn.close()
+                return
+
+            fn, future, is_write = item
+            try:
+                result = fn(conn)
+                if future is not None:
+                    future.set_result(result)
+            except Exception as e:
+                if future is not None:
+                    future.set_exception(e)
+                else:
+                    log.error("sqlite.write_failed", "❌ SQLite 쓰기 실패", error=str(e))
+
+            if is_write:
+                pending += 1
+            if pending and (pending >= SQLITE_COMMIT_EVERY or self._queue.empty()):
+                try:
+                    conn.commit()
+                except Exception as e:
+                    log.error("sqlite.commit_failed", "❌ SQLite commit 실패", error=str(e))
+                pending = 0
+
+    def execute(self, fn: Callable[[sqlite3.Connection], Any]):
+        """쓰기 작업 적재 (결과를 기다리지 않음)"""
+        self._queue.put((fn, None, True))
+
+    def call(self, fn: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = None) -> Any:
+        """읽기 작업 실행 후 결과 반환 (앞선 쓰기 완료 후 실행됨)"""
+        future: Future = Future()
+        self._queue.put((fn, future, False))
+        return future.result(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join(timeout=10)
+
+
+_workers: Dict[str, _SQLiteWorker] = {}
+_workers_lock = threading.Lock()
+
+
+def _get_worker(db_path: str) -> _SQLiteWorker:
+    with _workers_lock:
+        worker = _workers.get(db_path)
+        if worker is None:
+            dirname = os.path.dirname(db_path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            worker = _workers[db_path] = _SQLiteWorker(db_path)
+        return worker
+
+
+class SQLiteStore(RecordIndex):
+    """키 기반 레코드 컬렉션을 SQLite 테이블로 영속화 (JournalStore 호환)"""
+
+    def __init__(
+        self,
+        db_path: str,
+        json_path: str,
+        collection: str,
+        key_field: str = 'id',
+        snapshot_fn: Optional[Callable[[List[Dict]], Dict]] = None,
+        index_fields: Sequence[str] = (),
+    ):
+        for name in (collection, *index_fields):
+            if not name.isidentifier():
+                raise ValueError(f"잘못된 테이블/컬럼 이름: {name}")
+        self.db_path      = db_path
+        self.path         = json_path
+        self.collection   = collection
+        self.key_field    = key_field
+        self.snapshot_fn  = snapshot_fn or (lambda records: {collection: records})
+        self._init_records(index_fields)
+        self._worker: Optional[_SQLiteWorker] = None
+        self._closed = False
+        # load() 가 끝까지 성공해야 True — 그 전에는 DB 쓰기 / JSON 내보내기 안 함
+        self._loaded = False
+
+        columns = ", ".join(f'"{f}"' for f in self.index_fields)
+        placeholders = ", ".join("?" for _ in range(2 + len(self.index_fields)))
+        updates = ", ".join(["data = excluded.data"] + [f'"{f}" = excluded."{f}"' for f in self.index_fields])
+        self._upsert_sql = (
+            f'INSERT INTO "{collection}" (key, data{", " + columns if columns else ""}) '
+            f'VALUES ({placeholders}) ON CONFLICT(key) DO UPDATE SET {updates}'
+        )
+
+    # ------------------------------------------------------------------ #
+    #  로드 / 스키마
+    # ------------------------------------------------------------------ #
+    def load(self) -> List[Dict]:
+        """테이블 준비 (필요하면 JSON 가져오기) → 전체 레코드를 메모리로 읽어 반환"""
+        try:
+            self._worker = _get_worker(self.db_path)
+            self._worker.call(self._create_schema)
+            synced_mtime, row_count = self._worker.call(self._sync_state)
+            json_mtime = self._json_mtime()
+
+            if synced_mtime is None:
+                # 처음 여는 컬렉션 (또는 v1.0 DB): 비어 있을 때만 가져옴
+                json_is_stale = row_count > 0
+            else:
+                # 마지막 가져오기/내보내기 이후 JSON 이 바뀌지 않았으면 DB 가 더 최신
+                json_is_stale = json_mtime is None or json_mtime <= synced_mtime
+            if json_mtime is not None and not json_is_stale:
+                self._import_json(json_mtime, replace=row_count > 0)
+
+            rows = self._worker.call(
+                lambda conn: conn.execute(f'SELECT data FROM "{self.collection}" ORDER BY rowid').fetchall()
+            )
+            records = (json.loads(data) for (data,) in rows)
+            self._reset_records({r[self.key_field]: r for r in records})
+            # _SQLiteWorker.close 보다 나중에 등록 → 종료 시 먼저 실행되어 내보내기 가능
+            atexit.register(self.close)
+        except Exception as e:
+            log.error("sqlite.load_failed", "❌ SQLite 로드 실패 — 이번 실행의 변경은 DB/JSON 에 저장하지 않음",
+                      collection=self.collection, error=str(e))
+            raise
+        self._loaded = True
+        return self.all()
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        extra = "".join(f', "{f}"' for f in self.index_fields)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.collection}" (key PRIMARY KEY, data TEXT NOT NULL{extra})')
+        for f in self.index_fields:
+            conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "idx_{self.collection}_{f}" ON "{self.collection}" ("{f}")'
+            )
+        conn.execute('CREATE TABLE IF NOT EXISTS "_json_sync" (collection PRIMARY KEY, mtime REAL NOT NULL)')
+        conn.commit()
+
+    def _sync_state(self, conn: sqlite3.Connection) -> Tuple[Optional[float], int]:
+        """(마지막으로 동기화한 JSON 수정 시각, 현재 행 수)"""
+        row = conn.execute('SELECT mtime FROM "_json_sync" WHERE collection = ?', (self.collection,)).fetchone()
+        count = conn.execute(f'SELECT COUNT(*) FROM "{self.collection}"').fetchone()[0]
+        return (row[0] if row else None), count
+
+    def _json_mtime(self) -> Optional[float]:
+        """스냅샷 / 저널 중 더 최근 수정 시각 (둘 다 없으면 None)"""
+        mtimes = [os.path.getmtime(p) for p in (self.path, self.path + '.journal') if os.path.exists(p)]
+        return max(mtimes, default=None)
+
+    def _mark_synced(self, conn: sqlite3.Connection, mtime: float):
+        conn.execute(
+            'INSERT INTO "_json_sync" (collection, mtime) VALUES (?, ?) '
+            'ON CONFLICT(collection) DO UPDATE SET mtime = excluded.mtime',
+            (self.collection, mtime),
+        )
+
+    def _import_json(self, json_mtime: float, replace: bool):
+        records, _, conflicts = read_json_records(self.path, self.collection, self.key_field)
+        if conflicts:
+            # 같은 키 레코드 중 하나를 버리고 가져오지 않음 — JSON 정리 후 다시 시작
+            raise ValueError(f"{self.path}: 중복 키 {conflicts[:5]} — SQLite 가져오기 중단")
+        rows = [self._row(r) for r in records.values()]
+
+        def import_rows(conn: sqlite3.Connection):
+            if replace:
+                conn.execute(f'DELETE FROM "{self.collection}"')
+            conn.executemany(self._upsert_sql, rows)
+            self._mark_synced(conn, json_mtime)
+            conn.commit()
+
+        self._worker.call(import_rows)
+        if replace:
+            log.warning("sqlite.reimported", f"⚠️ JSON 이 DB 보다 최신 → 다시 가져옴: {self.path} → {self.collection}",
+                        rows=len(rows))
+        else:
+            log.info("sqlite.imported", f"📥 SQLite 가져오기: {self.path} → {self.collection}", rows=len(rows))
+
+    def _row(self, record: Dict) -> tuple:
+        return (
+            record[self.key_field],
+            json.dumps(record, ensure_ascii=False),
+            *(record.get(f) for f in self.index_fields),
+        )
+
+    # ------------------------------------------------------------------ #
+    #  변경 (메모리 즉시 반영, 영속화는 전용 스레드에서 비동기 실행)
+    # ------------------------------------------------------------------ #
+    def put(self, record: Dict):
+        """레코드 추가/갱신 — 직렬화는 호출 시점에 수행 (제자리 수정 후에도 반드시 호출할 것)"""
+        row = self._row(record)
+        self._record_put(record)
+        if self._loaded:
+            self._worker.execute(lambda conn: conn.execute(self._upsert_sql, row))
+
+    def delete(self, key) -> Optional[Dict]:
+        record = self._record_delete(key)
+        if record is not None and self._loaded:
+            sql = f'DELETE FROM "{self.collection}" WHERE key = ?'
+            self._worker.execute(lambda conn: conn.execute(sql, (key,)))
+        return record
+
+    def clear(self):
+        self._reset_records({})
+        if self._loaded:
+            sql = f'DELETE FROM "{self.collection}"'
+            self._worker.execute(lambda conn: conn.execute(sql))
+
+    # ------------------------------------------------------------------ #
+    #  flush / 내보내기 / close
+    # ------------------------------------------------------------------ #
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """지금까지의 쓰기를 commit (blocking)"""
+        if self._worker is None:
+            return True
+        self._worker.call(lambda conn: conn.commit(), timeout)
+        return True
+
+    def export_json(self):
+        """기존 JSON 형식으로 스냅샷 내보내기 (임시 파일 → os.replace) 후 동기화 시각 기록"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot_fn(self.all()), f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # 이전 JournalStore 저널이 남아 있으면 백엔드 전환 시 중복 재생되므로 제거
+        if os.path.exists(self.path + '.journal'):
+            os.remove(self.path + '.journal')
+
+        # 앞서 적재된 쓰기와 같은 순서로 commit → 기록된 시각의 JSON 은 항상 DB 이하로 오래됨
+        mtime = os.path.getmtime(self.path)
+        self._worker.call(lambda conn: (self._mark_synced(conn, mtime), conn.commit()), timeout=10)
+
+    def close(self):
+        if self._closed or self._worker is None:
+            return
+        self._closed = True
+        if not self._loaded:
+            log.warning("sqlite.export_skipped", "⚠️ 로드 실패한 컬렉션 — JSON 내보내기 건너뜀 (원본 보존)",
+                        collection=self.collection)
+            return
+        try:
+            self.export_json()
+        except Exception as e:
+            log.error("sqlite.export_failed", "❌ JSON 내보내기 실패", collection=self.collection, error=str(e))
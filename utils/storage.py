@@ -0,0 +1,39 @@
+"""
+저장소 백엔드 선택 (v1.0)
+
+STORAGE_BACKEND 설정에 따라 JournalStore(JSON 저널) 또는 SQLiteStore 를 생성합니다.
+두 저장소는 같은 인터페이스를 제공하므로 Manager 코드는 백엔드를 신경 쓰지 않습니다.
+
+    load() / all() / get(key) / find(order_by=None, **where) / keys() / len()
+    put(record) / delete(key) / clear() / flush() / close()
+
+조회는 두 백엔드 모두 메모리(RecordIndex)에서 처리되며 저장된 dict 를 그대로 반환합니다.
+레코드를 수정했다면 반드시 put() 으로 다시 저장해야 디스크에 반영됩니다.
+"""
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+from config.settings import STORAGE_BACKEND, SQLITE_DB_FILE
+from utils.journal_store import JournalStore
+from utils.sqlite_store import SQLiteStore
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+RecordStore = Union[JournalStore, SQLiteStore]
+
+
+def open_store(
+    path: str,
+    collection: str,
+    key_field: str = 'id',
+    snapshot_fn: Optional[Callable[[List[Dict]], Dict]] = None,
+    index_fields: Sequence[str] = (),
+) -> RecordStore:
+    """설정된 백엔드로 컬렉션 저장소 생성 (path 는 JSON 스냅샷 경로)"""
+    if STORAGE_BACKEND == 'sqlite':
+        return SQLiteStore(SQLITE_DB_FILE, path, collection, key_field,
+                           snapshot_fn=snapshot_fn, index_fields=index_fields)
+    if STORAGE_BACKEND != 'journal':
+        log.warning("storage.unknown_backend", f"⚠️ 알 수 없는 STORAGE_BACKEND '{STORAGE_BACKEND}' → journal 사용")
+    return JournalStore(path, collection, key_field,
+                        snapshot_fn=snapshot_fn, index_fields=index_fields)
@@ -0,0 +1,141 @@
+"""
+대화 요약 유틸리티 (v1.0 - 비동기 map-reduce)
+
+긴 채널 기록을 이벤트 루프를 막지 않고 요약합니다.
+
+[동작]
+1. 수집:  메시지 줄을 async iterator 로 받아 토큰 추정치 기준 구간(chunk)으로 묶음
+          → 히스토리 페이지를 받는 동안 이미 완성된 구간은 바로 요약 시작
+2. map:   구간별 요약을 저비용 모델(SUMMARY_MODEL)로 동시 실행
+          (SUMMARY_CONCURRENCY 로 동시 요청 수 제한)
+3. reduce: 구간 요약들을 합쳐 다시 요약 — 합친 길이가 한 구간을 넘으면
+          같은 방식으로 여러 단계에 걸쳐 병합 (트리 reduce)
+
+구간이 1개뿐이면 map/reduce 없이 최종 요약 1회로 끝납니다.
+이미 요약된 구간(채널 다이제스트의 시간 버킷)은 merge_summaries() 로 reduce 만 수행합니다.
+모든 호출은 BACKGROUND 우선순위로 속도 제한기를 거치므로 사용자 답장을 밀어내지 않습니다.
+"""
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
+
+from config.settings import SUMMARY_MODEL, SUMMARY_CHUNK_TOKENS, SUMMARY_CONCURRENCY
+from utils.rate_limiter import Priority, estimate_tokens
+
+FINAL_PROMPT = "다음 대화를 간단히 요약해주세요:\n\n"
+MAP_PROMPT = (
+    "다음은 디스코드 대화의 일부입니다. "
+    "주요 주제, 결정된 내용, 누가 무엇을 말했는지 위주로 간결하게 요약해주세요:\n\n"
+)
+REDUCE_PROMPT = (
+    "다음은 긴 대화를 시간 순서대로 나눠 요약한 것입니다. "
+    "중복을 정리해 하나의 흐름으로 간단히 요약해주세요:\n\n"
+)
+
+
+def format_message(msg) -> Optional[str]:
+    """요약 대상 메시지 → 한 줄 텍스트 (봇/명령어/빈 메시지는 None)"""
+    if msg.author.bot or not msg.content or msg.content.startswith(('/', '!', '\\')):
+        return None
+    return f"{msg.author.name}: {msg.content}"
+
+
+async def _iterate(lines: List[str]) -> AsyncIterator[str]:
+    for line in lines:
+        yield line
+
+
+class ChannelSummarizer:
+    """채널 대화 map-reduce 요약기"""
+
+    def __init__(self, gemini_client, model: str = SUMMARY_MODEL,
+                 chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+                 concurrency: int = SUMMARY_CONCURRENCY):
+        self.gemini_client = gemini_client
+        self.model         = model
+        self.chunk_tokens  = chunk_tokens
+        self.concurrency   = concurrency
+
+    async def summarize_lines(self, lines: AsyncIterator[str]) -> Tuple[Optional[str], int]:
+        """
+        메시지 줄 스트림 요약 → (요약문, 메시지 수).
+        메시지가 없으면 (None, 0).
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks: List[asyncio.Task] = []
+        chunk: List[str] = []
+        chunk_tokens = 0
+        count = 0
+
+        try:
+            async for line in lines:
+                count += 1
+                tokens = estimate_tokens(line)
+                if chunk and chunk_tokens + tokens > self.chunk_tokens:
+                    tasks.append(asyncio.create_task(
+                        self._run(semaphore, MAP_PROMPT, "\n".join(chunk))
+                    ))
+                    chunk, chunk_tokens = [], 0
+                chunk.append(line)
+                chunk_tokens += tokens
+
+            if not count:
+                return None, 0
+
+            # 구간이 하나뿐이면 바로 최종 요약
+            if not tasks:
+                return await self._run(semaphore, FINAL_PROMPT, "\n".join(chunk)), count
+
+            tasks.append(asyncio.create_task(
+                self._run(semaphore, MAP_PROMPT, "\n".join(chunk))
+            ))
+            partials = await asyncio.gather(*tasks)
+        except BaseException:
+            for t in tasks:
+                t.cancel()
+            raise
+
+        return await self._reduce(semaphore, list(partials)), count
+
+    async def summarize_texts(self, lines: List[str]) -> Tuple[Optional[str], int]:
+        """이미 모아둔 메시지 줄 목록 요약"""
+        return await self.summarize_lines(_iterate(lines))
+
+    async def merge_summaries(self, partials: List[str]) -> str:
+        """미리 계산된 구간 요약들을 하나로 병합 (1개면 그대로 반환)"""
+        if len(partials) == 1:
+            return partials[0]
+        return await self._reduce(asyncio.Semaphore(self.concurrency), partials)
+
+    async def _reduce(self, semaphore: asyncio.Semaphore, partials: List[str]) -> str:
+        """구간 요약 병합 — 한 번에 담을 수 없으면 묶음 단위로 나눠 반복"""
+        while True:
+            groups: List[List[str]] = [[]]
+            group_tokens = 0
+            for text in partials:
+                tokens = estimate_tokens(text)
+                if groups[-1] and group_tokens + tokens > self.chunk_tokens:
+                    groups.append([])
+                    group_tokens = 0
+                groups[-1].append(text)
+                group_tokens += tokens
+
+            if len(groups) == 1:
+                return await self._run(semaphore, REDUCE_PROMPT, self._join(groups[0]))
+
+            # 묶음 수가 줄지 않으면(요약이 너무 긴 경우) 두 개씩 강제로 병합
+            if len(groups) >= len(partials):
+                groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+
+            partials = list(await asyncio.gather(*(
+                self._run(semaphore, REDUCE_PROMPT, self._join(g)) for g in groups
+            )))
+
+    @staticmethod
+    def _join(parts: List[str]) -> str:
+        return "\n\n".join(f"[{i}]\n{text}" for i, text in enumerate(parts, 1))
+
+    async def _run(self, semaphore: asyncio.Semaphore, prompt: str, body: str) -> str:
+        async with semaphore:
+            return await self.gemini_client.generate_text_async(
+                prompt + body, model=self.model, priority=Priority.BACKGROUND, feature='summary'
+            )
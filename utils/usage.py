@@ -0,0 +1,217 @@
+"""
+Gemini 토큰 / 비용 집계 (v1.1)
+
+generate_content 응답의 usage_metadata 를 호출마다 모아 모델 / 사용자 / 채널 / 기능별로 합산합니다.
+13KB 시스템 프롬프트처럼 입력 쪽이 비용 대부분을 차지하는지 확인하는 용도입니다.
+
+[기록]
+    usage.record(model, 'chat', response, seconds)
+- 호출 지점은 기능(feature)만 알려 주고, 사용자 / 채널은 상관 ID 와 같은 방식(contextvars)으로 전달
+  · 리스너가 bind_usage(user_id=..., channel_id=...) → 같은 태스크, 그 안에서 만든 태스크, to_thread 에 전파
+  · 지정하지 않은 호출(배경 요약 등)은 '-' 로 집계
+- 기록은 잠금 하나로 합계만 갱신 (스레드 풀 / 이벤트 루프 어디서나 호출 가능)
+- 같은 값을 utils/metrics 카운터(peanut_gemini_tokens_total 등)에도 더함 → Prometheus 노출
+
+[영속화]
+- open() 으로 저장소(open_store, 'dimension:key' 키)를 열고 이전 합계를 이어서 집계
+- flush() 는 마지막 flush 이후 바뀐 항목만 put — 이벤트 루프에서 주기적으로 호출 (USAGE_FLUSH_INTERVAL)
+
+[v1.1 변경]
+- BUG FIX: open() 을 다시 호출하면 (Cog 재로드 / 재접속 시 cog_load) 저장된 합계를 현재 합계에 또 더해
+  사용량이 두 배로 늘던 문제
+  · 저장소가 연결된 동안의 open() 은 무시 (경고 로그)
+  · close() 는 남은 항목을 기록한 뒤 메모리 합계를 비움 → 다음 open() 은 저장소 합계 + 그 사이 기록분
+
+[비용]
+USAGE_PRICES(100만 토큰당 USD) 기준 추정치. 캐시된 입력은 USAGE_CACHED_INPUT_RATIO 만큼만,
+thinking 토큰은 출력 단가로 계산합니다.
+"""
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import USAGE_PRICES, USAGE_CACHED_INPUT_RATIO
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+DIMENSIONS = ('model', 'feature', 'user', 'channel')
+UNATTRIBUTED = '-'
+
+TOKENS_TOTAL = 'peanut_gemini_tokens_total'
+CALLS_TOTAL  = 'peanut_gemini_calls_total'
+
+_FIELDS = ('calls', 'prompt', 'cached', 'output', 'thoughts', 'seconds', 'max_seconds', 'cost')
+
+# 사용자 / 채널 귀속 정보 (user_id, channel_id)
+_owner: contextvars.ContextVar[Tuple[Optional[int], Optional[int]]] = \
+    contextvars.ContextVar('usage_owner', default=(None, None))
+
+
+def bind_usage(user_id: Optional[int] = None, channel_id: Optional[int] = None):
+    """현재 컨텍스트(태스크)에서 생기는 Gemini 호출을 user_id / channel_id 로 집계"""
+    _owner.set((user_id, channel_id))
+
+
+@contextlib.contextmanager
+def usage_scope(user_id: Optional[int] = None, channel_id: Optional[int] = None):
+    """with 블록 안에서만 귀속 정보 적용"""
+    token = _owner.set((user_id, channel_id))
+    try:
+        yield
+    finally:
+        _owner.reset(token)
+
+
+def _count(usage, name: str) -> int:
+    return getattr(usage, name, None) or 0
+
+
+def estimate_cost(model: str, prompt: int, cached: int, output: int, thoughts: int) -> float:
+    """USD 추정 (단가 미등록 모델은 0)"""
+    price_in, price_out = USAGE_PRICES.get(model, (0.0, 0.0))
+    billed_in = (prompt - cached) + cached * USAGE_CACHED_INPUT_RATIO
+    return (billed_in * price_in + (output + thoughts) * price_out) / 1_000_000
+
+
+def _new_totals() -> Dict:
+    return {field: 0 for field in _FIELDS}
+
+
+class UsageTracker:
+    """차원(dimension)별 키마다 호출 수 / 토큰 / 지연 / 비용 합계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, Dict]] = {dim: {} for dim in DIMENSIONS}
+        self._dirty: set = set()
+        self._store = None
+        self.since = time.time()
+
+    # ── 기록 ───────────────────────────────────────────────────────────
+    def record(self, model: str, feature: str, response, seconds: float):
+        """응답 1건 집계 (usage_metadata 가 없으면 호출 수 / 지연만)"""
+        usage    = getattr(response, 'usage_metadata', None)
+        prompt   = _count(usage, 'prompt_token_count')
+        cached   = _count(usage, 'cached_content_token_count')
+        output   = _count(usage, 'candidates_token_count')
+        thoughts = _count(usage, 'thoughts_token_count')
+        cost     = estimate_cost(model, prompt, cached, output, thoughts)
+
+        user_id, channel_id = _owner.get()
+        keys = {
+            'model':   model,
+            'feature': feature,
+            'user':    str(user_id) if user_id else UNATTRIBUTED,
+            'channel': str(channel_id) if channel_id else UNATTRIBUTED,
+        }
+        with self._lock:
+            for dim, key in keys.items():
+                totals = self._totals[dim].get(key)
+                if totals is None:
+                    totals = self._totals[dim][key] = _new_totals()
+                totals['calls']    += 1
+                totals['prompt']   += prompt
+                totals['cached']   += cached
+                totals['output']   += output
+                totals['thoughts'] += thoughts
+                totals['seconds']  += seconds
+                totals['cost']     += cost
+                if seconds > totals['max_seconds']:
+                    totals['max_seconds'] = seconds
+                self._dirty.add((dim, key))
+
+        metrics.inc(CALLS_TOTAL, model=model, feature=feature)
+        for kind, value in (('prompt', prompt), ('cached', cached), ('output', output), ('thoughts', thoughts)):
+            if value:
+                metrics.inc(TOKENS_TOTAL, value, model=model, feature=feature, kind=kind)
+
+    # ── 조회 ───────────────────────────────────────────────────────────
+    def totals(self, dim: str) -> List[Tuple[str, Dict]]:
+        """(키, 합계 사본) 목록 — 비용 / 입력 토큰 큰 순"""
+        with self._lock:
+            items = [(key, dict(totals)) for key, totals in self._totals[dim].items()]
+        return sorted(items, key=lambda item: (item[1]['cost'], item[1]['prompt']), reverse=True)
+
+    def grand_total(self) -> Dict:
+        total = _new_totals()
+        for _, totals in self.totals('model'):
+            for field in _FIELDS:
+                if field == 'max_seconds':
+                    total[field] = max(total[field], totals[field])
+                else:
+                    total[field] += totals[field]
+        return total
+
+    # ── 영속화 ─────────────────────────────────────────────────────────
+    @property
+    def is_open(self) -> bool:
+        return self._store is not None
+
+    def open(self, store):
+        """저장소 연결 + 이전 합계 불러오기 (이벤트 루프에서 호출, 이미 연결되어 있으면 무시)"""
+        if self._store is not None:
+            log.warning("usage.already_open", "⚠️ 토큰 사용량 저장소가 이미 열려 있음 (다시 불러오지 않음)")
+            return
+        self._store = store
+        records = store.load()
+        if not any(record['dim'] == 'meta' for record in records):
+            store.put({"id": "meta:since", "dim": "meta", "key": "since", "since": self.since})
+        with self._lock:
+            for record in records:
+                dim, key = record['dim'], record['key']
+                if dim == 'meta':
+                    self.since = record.get('since', self.since)
+                    continue
+                if dim not in self._totals:
+                    continue
+                totals = self._totals[dim].setdefault(key, _new_totals())
+                for field in _FIELDS:
+                    value = record.get(field, 0)
+                    totals[field] = max(totals[field], value) if field == 'max_seconds' else totals[field] + value
+        log.info("usage.loaded", "✅ 토큰 사용량 로드", entries=len(records))
+
+    def flush(self) -> int:
+        """바뀐 항목만 저장소에 기록 (이벤트 루프에서 호출) → 기록한 항목 수"""
+        return self._flush()
+
+    def _flush(self, detach: bool = False) -> int:
+        if self._store is None:
+            return 0
+        store = self._store
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            records = [
+                {"id": f"{dim}:{key}", "dim": dim, "key": key, **self._totals[dim][key]}
+                for dim, key in dirty if key in self._totals[dim]
+            ]
+            if detach:
+                # 합계는 저장소에 넘김 — 다음 open() 이 다시 불러옴 (중복 합산 방지)
+                for dim in DIMENSIONS:
+                    self._totals[dim].clear()
+                self._store = None
+        for record in records:
+            store.put(record)
+        return len(records)
+
+    def close(self):
+        store = self._store
+        self._flush(detach=True)
+        if store is not None:
+            store.close()
+
+    def reset(self):
+        with self._lock:
+            for dim in DIMENSIONS:
+                self._totals[dim].clear()
+            self._dirty.clear()
+            self.since = time.time()
+        if self._store is not None:
+            self._store.clear()
+            self._store.put({"id": "meta:since", "dim": "meta", "key": "since", "since": self.since})
+
+
+usage = UsageTracker()
@@ -2,6 +2,11 @@ import aiohttp
 from typing import Dict, Optional, List
 from datetime import datetime
 
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
 class WeatherClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
@@ -40,13 +45,15 @@ class WeatherClient:
         """현재 날씨 조회"""
         params = {"q": city, "appid": self.api_key, "units": "metric", "lang": lang}
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/weather", params=params) as response:
-                    if response.status == 200:
-                        return self._parse_current_weather(await response.json())
-                    return None
+            with metrics.stage('weather', 'current'):
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(f"{self.base_url}/weather", params=params) as response:
+                        if response.status == 200:
+                            return self._parse_current_weather(await response.json())
+                        return None
         except Exception as e:
-            print(f"❌ 날씨 API 오류: {e}")
+            metrics.error('weather', 'current')
+            log.error("weather.current_failed", "❌ 날씨 API 오류", city=city, error=str(e))
             return None
     
     def _parse_current_weather(self, data: Dict) -> Dict:
@@ -78,13 +85,15 @@ class WeatherClient:
         """
         params = {"q": city, "appid": self.api_key, "units": "metric", "lang": lang}
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/forecast", params=params) as response:
-                    if response.status == 200:
-                        return self._parse_forecast(await response.json())
-                    return None
+            with metrics.stage('weather', 'forecast'):
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(f"{self.base_url}/forecast", params=params) as response:
+                        if response.status == 200:
+                            return self._parse_forecast(await response.json())
+                        return None
         except Exception as e:
-            print(f"❌ 예보 API 오류: {e}")
+            metrics.error('weather', 'forecast')
+            log.error("weather.forecast_failed", "❌ 예보 API 오류", city=city, error=str(e))
             return None
 
     def _parse_forecast(self, data: Dict) -> List[Dict]: